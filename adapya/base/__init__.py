@@ -7,22 +7,32 @@ adapya.base
 The adapya.base package contains se1.3.0 modules that are used
 in adapya:
 
+- arecordio: read and write records on asyncio streams
 - conv: simple text codepage conversion functions
 - datamap: storage data mapping to python objects
 - defs: basic buffer access and logging
 - dtconv: date and time conversions
+- dtfast: fast date and time conversions for Adabas datetime fields
 - dump: storage image access and printing
 - ecscodec: text encode/decode based on software-ag's code page numbers
 - ftptoolz: extra z/OS ftp features
+- instrument: counters, timers and histograms for measuring code
 - jconfig: manage configuration data in JSON file
 - recordio: process formated sequential files (variable blocked, etc.)
+- smfaggz: streaming group-by aggregation of SMF records
+- smfdedupz: drop duplicate SMF records of overlapping dumps
+- smfexportz: export SMF sections to CSV or JSON Lines files
+- smfgenz: generate synthetic SMF records
+- smfindexz: sparse time index for SMF dumps
+- smfrecordz: SMF record structures and reader
 - stck: mainframe timestamp conversions
 - xtea: simple encryption
 - zos: PDS/E directory member listing for z/OS
 
 """
-__all__=["conv","datamap","defs","dtconv","dump","ecscodec","ftptoolz",
-        "future","jconfig","recipes","recordio","stck","touch","xtea",
+__all__=["arecordio","conv","datamap","defs","dtconv","dtfast","dump","ecscodec","ftptoolz",
+        "future","instrument","jconfig","recipes","recordio","smfaggz","smfdedupz",
+        "smfexportz","smfgenz","smfindexz","smfrecordz","stck","touch","xtea",
         "zos"]
 
 __version__ = '1.3.0'
@@ -0,0 +1,251 @@
+"""
+arecordio - read and write records on asyncio streams
+=====================================================
+
+The module arecordio contains the asyncio counterparts of the
+recordio functions readrec() and writerec(). They operate on
+asyncio.StreamReader and asyncio.StreamWriter objects e.g. from
+sockets or pipes so that one event loop can multiplex many record
+streams:
+
+    - RDW   records preceded by a record descriptor word,
+            segmented (spanned) records are collected
+
+    - BDW   variable records blocked
+
+    - EXCL4 records preceded by a 4 bytes exclusive record length
+            in native byte-order
+
+Backpressure is handled by the stream buffers: a StreamReader pauses
+reading from its transport as soon as ``limit`` bytes are buffered and
+not yet consumed by aread_records(), a StreamWriter makes drain()
+wait while more than ``highwater`` bytes are queued for sending.
+
+Example usage::
+
+    >> reader, writer = await asyncio.open_connection(host, port, limit=2**20)
+    >> async for rec in aread_records(reader, recform='RDW'):
+    >>    process(rec)
+
+.. note:: requires Python 3.7 or higher
+
+"""
+import asyncio
+import struct
+
+from adapya.base.recordio import SEGALL, SEGFIRST, SEGLAST, SEGMIDDLE, \
+    segmenttype
+
+STREAMLIMIT = 2**16     # default StreamReader buffer limit in asyncio
+MAXSEG = 32756          # maximum data length in one RDW segment (LRECL 32760)
+
+_rdw = struct.Struct('!HBx')    # RDW: record length, segment control
+_excl4 = struct.Struct('=L')    # EXCL4: native byte order
+
+
+async def aread_records(reader, recform='RDW', numrec=0, skiprec=0, debug=0):
+    """ aread_records - asynchronous generator to read records
+    with special record format specified in recform from an
+    asyncio.StreamReader
+
+        :param reader: asyncio.StreamReader e.g. from open_connection()
+            or pipe_reader()
+        :param recform: record format to process
+
+            - 'RDW' variable record format (2 bytes length, Network byte order)
+                    return record without RDW header (exclusive)
+
+            - 'RDW+' same as RDW but return record including RDW header
+
+                    Note: for segmented records only the RDW header of
+                          the first segment is included
+
+            - 'BDW' variable record blocked: Block Descriptor Words
+                    are skipped
+
+            - 'BDW+' same as BDW but return record including RDW header
+
+            - 'EXCL4' exclusive 4 bytes length, native byte order
+
+        :param numrec: maximum number of records to return (0 = all)
+        :param skiprec: number of (logical) records to skip
+        :param debug: 1 - print RDW information
+
+    The generator ends when the stream reaches EOF on a record boundary.
+    A stream ending within a record raises asyncio.IncompleteReadError.
+
+    """
+    if recform not in ('RDW', 'RDW+', 'BDW', 'BDW+', 'EXCL4'):
+        raise BaseException('Invalid recform %r specified' % recform)
+
+    withrdw = recform.endswith('+')
+    blocked = recform.startswith('BDW')
+    block_rlen = 0
+    parts = None    # collected segments of a spanned record
+    i = 0           # logical records read (including skipped)
+
+    while 1:
+        try:
+            hdr = await reader.readexactly(4)
+        except asyncio.IncompleteReadError as e:
+            if e.partial:
+                raise
+            return      # end of stream on record boundary
+
+        if recform == 'EXCL4':
+            rlen, = _excl4.unpack(hdr)
+            record = await reader.readexactly(rlen) if rlen > 0 else b''
+        else:
+            rlen, seg = _rdw.unpack(hdr)
+
+            if rlen > 0x7fff:
+                dwtype = 'block' if blocked and block_rlen <= 4 else 'record'
+                raise BaseException('Invalid %s length %s exceeds 32k-1 in record %d' %
+                         (dwtype, rlen, i+1))
+
+            if blocked:
+                if block_rlen > 4:  # still records in block
+                    block_rlen -= rlen
+                else:               # consumed Block Descriptor Word
+                    block_rlen = rlen
+                    continue
+
+            if seg > SEGMIDDLE:
+                raise BaseException('invalid segment type %02X in record %d' %
+                         (seg, i+1))
+            if debug & 1:
+                print('Reading %s len(%04x) in logical record %d' % (
+                    segmenttype(seg), rlen, i+1))
+
+            data = await reader.readexactly(rlen-4) if rlen > 4 else b''
+
+            if seg == SEGALL:
+                record = hdr+data if withrdw else data
+            elif seg == SEGFIRST:
+                parts = [hdr, data] if withrdw else [data]
+                continue
+            elif parts is None:
+                raise BaseException('%s without first segment in record %d' % (
+                    segmenttype(seg), i+1))
+            else:
+                parts.append(data)
+                if seg == SEGMIDDLE:
+                    continue
+                record = b''.join(parts)    # SEGLAST
+                parts = None
+
+        i += 1
+        if i <= skiprec:
+            continue
+        yield record
+        if numrec and i >= skiprec + numrec:
+            return
+
+
+def putrec(writer, record, recform='RDW', maxseg=MAXSEG):
+    """ putrec - queue one record for writing on a stream writer
+    without waiting (use writer.drain() for flow control)
+
+        :param writer: asyncio.StreamWriter or any object with write()
+        :param record: bytes, bytearray or memoryview without length prefix
+        :param recform: 'RDW' or 'EXCL4'
+        :param maxseg: maximum data length per RDW segment; longer
+            records are written as spanned segments
+
+        :returns: number of bytes queued
+    """
+    rlen = len(record)
+    if recform == 'EXCL4':
+        writer.write(_excl4.pack(rlen))
+        writer.write(record)
+        return rlen + 4
+    elif recform != 'RDW':
+        raise BaseException('Invalid recform %r specified' % recform)
+
+    if rlen <= maxseg:
+        writer.write(_rdw.pack(rlen+4, SEGALL))
+        writer.write(record)
+        return rlen + 4
+
+    mv = memoryview(record)
+    seg = SEGFIRST
+    n = 0
+    for pos in range(0, rlen, maxseg):
+        data = mv[pos:pos+maxseg]
+        if pos + maxseg >= rlen:
+            seg = SEGLAST
+        writer.write(_rdw.pack(len(data)+4, seg))
+        writer.write(data)
+        n += len(data) + 4
+        seg = SEGMIDDLE
+    return n
+
+
+async def awriterec(writer, record, recform='RDW', maxseg=MAXSEG):
+    """ awriterec - write one record and wait until the stream
+    writer buffer is below its high-water mark
+
+        see putrec() for parameters
+    """
+    putrec(writer, record, recform=recform, maxseg=maxseg)
+    await writer.drain()
+
+
+async def awrite_records(writer, records, recform='RDW', highwater=None,
+                         maxseg=MAXSEG):
+    """ awrite_records - write records from an iterable or asynchronous
+    iterable to a stream writer
+
+        :param writer: asyncio.StreamWriter
+        :param records: iterable or async iterable of records
+        :param recform: 'RDW' or 'EXCL4'
+        :param highwater: if set: write buffer size in bytes above which
+            writing is suspended until the peer has received the data
+        :param maxseg: maximum data length per RDW segment
+
+        :returns: number of records written
+    """
+    if highwater:
+        writer.transport.set_write_buffer_limits(high=highwater)
+
+    n = 0
+    if hasattr(records, '__aiter__'):
+        async for record in records:
+            putrec(writer, record, recform=recform, maxseg=maxseg)
+            await writer.drain()
+            n += 1
+    else:
+        for record in records:
+            putrec(writer, record, recform=recform, maxseg=maxseg)
+            await writer.drain()
+            n += 1
+    return n
+
+
+async def pipe_reader(pipe, limit=STREAMLIMIT):
+    """ Return asyncio.StreamReader connected to the read end of a pipe
+
+        :param pipe: file like object e.g. from os.fdopen(fd, 'rb')
+        :param limit: buffer limit of the stream reader, reading from the
+            pipe is paused while more data is buffered
+    """
+    loop = asyncio.get_running_loop()
+    reader = asyncio.StreamReader(limit=limit)
+    await loop.connect_read_pipe(
+        lambda: asyncio.StreamReaderProtocol(reader), pipe)
+    return reader
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
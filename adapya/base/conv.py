@@ -6,18 +6,24 @@ conv - Text conversion routines
 The module conv.py contains se1.3.0 conversion routines for ASCII/EBCDIC
 conversion and byte swapping.
 
-Character set is Latin1 per default with cp37 as EBCDIC
+Character set is Latin1 per default with cp037 as EBCDIC
 and cp819 (ISO-8859-1) as extended ASCII code pages.
 
-The following conversions are defined::
+The following conversions are precompiled::
 
      37 <=> 819
    1047 <=> 819
    1141 <=> 1252
 
+Translation tables for other pairs of single byte ECS code pages are
+derived once from the Python codecs with gettt(). convert() translates
+bytes from one code page to another in one translate() call.
+
 """
 import sys
 
+from adapya.base.ecscodec import getcodec, singlebyte
+
 if sys.byteorder =='little':
     UTF16_NATIVE = 'UTF_16_LE'
 else:
@@ -139,29 +145,109 @@ tt819_1047 = \
     b"\x8C\x49\xCD\xCE\xCB\xCF\xCC\xE1\x70\xDD\xDE\xDB\xDC\x8D\x8E\xDF" \
 #      0   1   2   3   4   5   6   7   8   9   A   B   C   D   E   F
 
-# translation tables dictionary
+# translation tables dictionary: precompiled tables and tables derived
+# by gettt() from the Python codecs for other (source, target) pairs
 ttdic = {(37,819): tt37_819, (819,37): tt819_37,
          (1047,819): tt1047_819, (819,1047): tt819_1047,
          (1141,1252): tt1141_1252, (1252,1141): tt1252_1141,
         }
 
+_charsdic = {}  # ECS code page: string of its 256 characters
+
+
+def _pychars(ecs):
+    """ :returns: string of the 256 characters of single byte ECS code
+        page ecs from its Python codec or None if there is none.
+        Bytes undefined in the codec are taken as the Latin1 (C1 control)
+        characters.
+    """
+    codec = getcodec(ecs)
+    if not singlebyte(codec):
+        return None
+    text = bytes(bytearray(range(256))).decode(codec, 'replace')
+    return u''.join(c if c != u'\ufffd' else bytes(bytearray((i,))).decode('latin_1')
+                    for i, c in enumerate(text))
+
+
+def _chars(ecs):
+    """ :returns: string of the 256 characters of single byte ECS
+        code page ecs from its Python codec or if there is none from a
+        precompiled table in ttdic to a code page with a Python codec
+    """
+    chars = _charsdic.get(ecs)
+    if chars is None:
+        chars = _pychars(ecs)
+        if chars is None:
+            for (senco, tenco), tt in list(ttdic.items()):
+                if senco == ecs:
+                    tchars = _pychars(tenco)
+                    if tchars is not None:
+                        chars = u''.join(tchars[b] for b in bytearray(tt))
+                        break
+            else:
+                raise LookupError('No single byte codec or translation table for ECS code page %d' % ecs)
+        _charsdic[ecs] = chars
+    return chars
+
+
+def gettt(senco, tenco):
+    """ :returns: translation table from ECS code page senco to tenco
+
+        Tables not precompiled in ttdic are derived once from the Python
+        codecs (see ecscodec). Characters not in the target code page
+        are translated to its SUB control character.
+
+    >>> gettt(37, 819) == tt37_819
+    True
+    >>> gettt(273, 500)[0x7c:0x7d]  # section sign in cp273
+    b'\\xb5'
+    """
+    tt = ttdic.get((senco, tenco))
+    if tt is None:
+        schars = _chars(senco)
+        tchars = _chars(tenco)
+        inv = dict((c, i) for i, c in reversed(list(enumerate(tchars))))
+        sub = inv.get(u'\x1a', 0x3f)
+        tt = ttdic[(senco, tenco)] = bytes(bytearray(inv.get(c, sub) for c in schars))
+    return tt
+
+
+def convert(buf, senco, tenco):
+    """ Translate the bytes of buf from ECS code page senco to tenco
+        with one translate() call
+
+        :param buf: bytes, bytearray or object supporting the buffer
+            protocol, e.g. memoryview
+        :returns: bytes or bytearray if buf is a bytearray
+
+    >>> convert(b'\\x7c\\xc1', 273, 819)
+    b'\\xa7A'
+    >>> convert(memoryview(bytearray(b'\\xc1\\xc2')), 500, 1141)
+    b'\\xc1\\xc2'
+    """
+    tt = gettt(senco, tenco)
+    if isinstance(buf, (bytes, bytearray)):
+        return buf.translate(tt)
+    return memoryview(buf).tobytes().translate(tt)
+
 def asc2ebc(buf,start,stop,senco=819,tenco=37):
     """ convert ASCII bytes in buffer to EBCDIC
 
         :param buf: buffer
         :param start: start offset in buf
         :param stop: ending offset in buf
-        :param senco: source ASCII encoding. Supported are:
+        :param senco: source ASCII encoding, e.g.
 
             819 (Latin1 ISO-8859-1) or 1252 (Windows Latin1)
 
-        :param tenco: target EBCDIC encoding. Supported are:
+        :param tenco: target EBCDIC encoding, e.g.
 
             37 (US EBCDIC Latin1) or 1141 (US EBCDIC with Euro)
+
+        Other code pages see gettt()
     """
-    tt = ttdic[(senco,tenco)]
-    for i in range(start,stop):
-        buf[i] = tt[ord(buf[i])]
+    tt = gettt(senco,tenco)
+    buf[start:stop] = buf[start:stop].translate(tt)
 
 
 def ebc2asc(buf,start,stop,senco=37,tenco=819):
@@ -170,17 +256,18 @@ def ebc2asc(buf,start,stop,senco=37,tenco=819):
         :param buf: buffer
         :param start: start offset in buf
         :param stop: ending offset in buf
-        :param senco: source EBCDIC encoding. Supported code pages
+        :param senco: source EBCDIC encoding, e.g.
 
             37 (US EBCDIC Latin1) or 1141 (US EBCDIC with Euro)
 
-        :param tenco: target ASCII encoding. Supported code
+        :param tenco: target ASCII encoding, e.g.
 
             819 (Latin1 ISO-8859-1) or 1252 (Windows Latin1)
+
+        Other code pages see gettt()
     """
-    tt = ttdic[(senco,tenco)]
-    for i in range(start,stop):
-        buf[i] = tt[ord(buf[i])]
+    tt = gettt(senco,tenco)
+    buf[start:stop] = buf[start:stop].translate(tt)
 
 
 if sys.hexversion < 0x03010100:
@@ -195,7 +282,7 @@ if sys.hexversion < 0x03010100:
         True
 
         """
-        tt = ttdic[(senco,tenco)]
+        tt = gettt(senco,tenco)
         return string.translate(istr,tt)
 
 
@@ -206,11 +293,11 @@ if sys.hexversion < 0x03010100:
         True
 
         """
-        tt = ttdic[(senco,tenco)]
+        tt = gettt(senco,tenco)
         return string.translate(str,tt)
 
     def str2asc(str,senco=37,tenco=819):
-        tt = ttdic[(senco,tenco)]
+        tt = gettt(senco,tenco)
         return string.translate(str,tt)
 
     def uni2str(u):
@@ -248,10 +335,10 @@ else:
 
         """
         if type(istr) is bytes:
-            tt = ttdic[(senco,tenco)]
+            tt = gettt(senco,tenco)
             return bytes.translate(istr,tt)
         elif type(istr) is bytearray:
-            tt = ttdic[(senco,tenco)]
+            tt = gettt(senco,tenco)
             return bytearray.translate(istr,tt)
         else:
             return istr.encode('cp%03d' % tenco)
@@ -262,7 +349,7 @@ else:
 
         """
         if type(istr) in (bytes,bytearray):
-            tt = ttdic[(senco,tenco)]
+            tt = gettt(senco,tenco)
             return bytes.translate(istr,tt)
 
         return istr.encode('cp%03d' % tenco)
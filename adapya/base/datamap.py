@@ -18,10 +18,11 @@ from datetime import datetime,date
 from datetime import time as dtime
 from .defs import Abuf
 from .conv import ebc2asc,asc2ebc,str2asc,str2ebc,swap
-from .dtconv import str2dt,date2natdate, datetime2unixtime, utc2xts
+from .dtconv import date2natdate, datetime2unixtime, utc2xts
 from .dtconv import timestamp2nattime,xts2utc,unix2utc
-from .dtconv import natdate2date, nattime2timestamp
+from .dtfast import str2dt, natdate2date, nattime2timestamp
 from .dump import dump
+from .ecscodec import singlebyte
 from .stck import sstck,sstckd
 
 __date__='$Date: 2023-12-01 00:54:33 +0100 (Fri, 01 Dec 2023) $'
@@ -103,6 +104,8 @@ def prd2dm(prdformat,length=0):
 
 
 LEFT_ALIGNED = (T_STRING, T_UTF16, T_UTF8)
+NUMERIC_TYPES = (T_INT1, T_UINT1, T_INT2, T_UINT2, T_INT4, T_UINT4,
+                 T_INT8, T_UINT8, T_FLOAT, T_DOUBLE)
 
 # additional field options (opt)
 T_IN   = 1  # write access
@@ -1037,6 +1040,28 @@ def dunpack(dmap, key, indx=0, possiz=None):
             return ii
 
 
+def _byteview(buffer):
+    """ :returns: memoryview of buffer with format 'B' so that
+        slices compare as bytes (e.g. Abuf has format '<c')
+    """
+    mv = memoryview(buffer)
+    if mv.format != 'B':
+        mv = mv.cast('B')
+    return mv
+
+
+def unpackdec(b):
+    """ Convert packed decimal bytes to integer
+
+    >>> unpackdec(b'\\x01\\x23\\x4d')
+    -1234
+    """
+    hexbytes = hexlify(b)
+    if hexbytes[-1:].upper() in b'BD':
+        return -int(hexbytes[:-1])
+    return int(hexbytes[:-1])
+
+
 class Multiple(object):
     """ Initialize with Multiple(supermap, key, occurs [, submap])
     if 'occurs' is a function it will be called in prepare()
@@ -2023,6 +2048,267 @@ class Datamap(object):
                 return (fn, size, ffrm)
         return None
 
+    def structformat(self, lrecl=0):
+        """Get struct format string for a datamap of numeric fields only
+
+        This allows to unpack many records at once with struct.unpack_from()
+        or struct.iter_unpack(). Unused bytes between fields are
+        skipped with pad bytes.
+
+        :param lrecl: record length; if larger than dmlen the remaining
+            bytes are skipped
+        :returns: struct format string; the values are unpacked in
+            the order of the field positions
+
+        :raises DatamapError: if the datamap contains other than
+            numeric fields, overlapping or variable fields or fields
+            with conversion options (e.g. datetime)
+
+        >>> from adapya.base.datamap import Datamap,Int2,Uint4,Filler
+        >>> g = Datamap('mymap',Int2('foo'),Filler('x',2),Uint4('bar'),
+        ...     byteOrder=NETWORKBO)
+        >>> g.structformat(12)
+        '!h2xL4x'
+        """
+        if self.__dict__['varies']:
+            raise DatamapError('structformat() not possible for datamap with variable fields', self)
+
+        keydict = self.__dict__['keydict']
+        bo = self.__dict__['byteOrder'] or byteOrder
+        fmt = [bo]
+        pos = 0
+        for start, key in sorted((keydict[k][1], k) for k in self.__dict__['keylist']):
+            ftype, start, size, inout, fdic = keydict[key]
+            if ftype == T_BYTE and inout & T_NONE:
+                continue    # Filler
+            if ftype not in NUMERIC_TYPES or fdic.get('occurs',0) or \
+                    inout & (T_STCK|T_DT|T_EBCDIC) or \
+                    (inout & T_NWBO and bo != NETWORKBO):
+                raise DatamapError('structformat() not possible for field %s' % key, self)
+            if start < pos:
+                raise DatamapError('structformat() not possible for overlapping field %s' % key, self)
+            if start > pos:
+                fmt.append('%dx' % (start-pos))
+            fmt.append(ftype)
+            pos = start + size
+        dmlen = max(lrecl, self.__dict__['dmlen'])
+        if dmlen > pos:
+            fmt.append('%dx' % (dmlen-pos))
+        return ''.join(fmt)
+
+    def getter(self, *keys):
+        """Compile a function that returns the values of the given fields
+
+        The field positions and conversions are evaluated once so that
+        the returned function is much faster than attribute access
+        when the values of many records are needed.
+        Numeric fields are unpacked with one struct.unpack_from() call,
+        text fields of a single byte encoding with one decode() call.
+
+        :param keys: field names
+        :returns: function get(buffer, offset=0) returning a tuple of
+            values with the same results as the attribute access for
+            the datamap mapped on buffer at offset
+
+        >>> from adapya.base.datamap import Datamap,Int2,Uint4,String
+        >>> g = Datamap('mymap',Int2('foo'),String('name',4),Uint4('bar'),
+        ...     byteOrder=NETWORKBO, ebcdic=1)
+        >>> get = g.getter('bar','name','foo')
+        >>> get(b'..\\x00\\x02\\xc1\\xc2@@\\x00\\x00\\x01\\x00', 2)
+        (256, 'AB', 2)
+        """
+        keydict = self.__dict__['keydict']
+        bo = self.__dict__['byteOrder'] or byteOrder
+        ebc = self.__dict__['ebcdic'] or dataIsEbcdic
+        enc = self.__dict__['encoding']
+
+        numfmt = [bo]
+        numix = []      # index of numeric values in result
+        pos = 0         # next position in numeric struct
+        convs = []      # (index, conversion function)
+        texts = {}      # single byte encoding: [(index, start, end)]
+
+        for ix, key in sorted(enumerate(keys), key=lambda e: keydict[e[1]][1]):
+            ftype, start, size, inout, fdic = keydict[key]
+            if fdic.get('occurs',0) or self.__dict__['varies'] or \
+                    inout & (T_STCK|T_DT):
+                convs.append((ix, self._attrconv(key)))
+            elif ftype in NUMERIC_TYPES and start >= pos and \
+                    not (inout & T_NWBO and bo != NETWORKBO):
+                if start > pos:
+                    numfmt.append('%dx' % (start-pos))
+                numfmt.append(ftype)
+                numix.append(ix)
+                pos = start + size
+            elif ftype == T_STRING:
+                sen = 'cp037' if inout & T_EBCDIC else enc
+                if PY3 and singlebyte(sen):
+                    texts.setdefault(sen, []).append((ix, start, start+size))
+                elif PY3:
+                    convs.append((ix, lambda b, o, a=start, e=start+size, en=sen:
+                        bytes(b[o+a:o+e]).decode(en, 'replace').rstrip(' ')))
+                elif ebc or inout & T_EBCDIC:
+                    convs.append((ix, lambda b, o, a=start, e=start+size:
+                        str(b[o+a:o+e]).decode('cp037').encode('latin_1').rstrip(' ')))
+                else:
+                    convs.append((ix, lambda b, o, a=start, e=start+size:
+                        str(b[o+a:o+e]).rstrip(' ')))
+            elif ftype == T_BYTE:
+                convs.append((ix, lambda b, o, a=start, e=start+size: b[o+a:o+e]))
+            elif ftype == T_PACK:
+                convs.append((ix, lambda b, o, a=start, e=start+size:
+                    unpackdec(b[o+a:o+e])))
+            else:
+                convs.append((ix, self._attrconv(key)))
+
+        numstruct = struct.Struct(''.join(numfmt))
+        nvals = len(keys)
+        # decode the span of the text fields once and slice the fields
+        spans = []
+        for sen, fields in texts.items():
+            lo = min(a for ix, a, e in fields)
+            hi = max(e for ix, a, e in fields)
+            spans.append((sen, lo, hi, [(ix, a-lo, e-lo) for ix, a, e in fields]))
+
+        def get(buffer, offset=0):
+            values = [None] * nvals
+            if numix:
+                for ix, val in zip(numix, numstruct.unpack_from(buffer, offset)):
+                    values[ix] = val
+            for sen, lo, hi, fields in spans:
+                text = bytes(buffer[offset+lo:offset+hi]).decode(sen, 'replace')
+                for ix, a, e in fields:
+                    values[ix] = text[a:e].rstrip(' ')
+            for ix, conv in convs:
+                values[ix] = conv(buffer, offset)
+            return tuple(values)
+
+        return get
+
+    def _attrconv(self, key):
+        """ conversion function for getter() using attribute access """
+        def conv(buffer, offset):
+            self.__dict__['buffer'] = buffer
+            self.__dict__['offset'] = offset
+            return getattr(self, key)
+        return conv
+
+    def diff(self, buf_a, buf_b, offset=0):
+        r"""Compare the datamap mapped on two buffers field by field
+
+        The raw bytes of each field are compared in the buffers.
+        Only the fields that differ are unpacked. The field layout
+        of variable datamaps is determined with prepare() for each
+        buffer so that MU fields and PE groups with different numbers
+        of occurrences can be compared. Filler fields are not compared.
+
+        :param buf_a: buffer with old contents, e.g. before a call
+        :param buf_b: buffer with new contents
+        :param offset: offset of the datamap in both buffers
+
+        :returns: list of (name, old, new) of the changed fields where
+            name is 'key', 'key[i]' for an MU field occurrence or
+            'pe[i].key' for a field in a PE group occurrence;
+            old or new is None if the occurrence is not in the buffer
+
+        >>> from adapya.base.datamap import Datamap, String, Int2
+        >>> g = Datamap('mymap', String('foo', 2, occurs=3), Int2('bar'),
+        ...     byteOrder=NETWORKBO)
+        >>> g.diff(b'abKIyz\x00\x11', b'abKJyz\x00\x12')
+        [('foo[1]', 'KI', 'KJ'), ('bar', 17, 18)]
+        """
+        savebuf = self.__dict__['buffer']
+        saveoff = self.__dict__['offset']
+        varies = self.__dict__['varies']
+
+        leaves_a = self._diffleaves(buf_a, offset)
+        if varies:
+            leaves_b = self._diffleaves(buf_b, offset)
+        else:
+            leaves_b = leaves_a     # same layout
+        mva = _byteview(buf_a)
+        mvb = _byteview(buf_b)
+
+        changed = []        # names of changed fields
+        bnames = dict((leaf[0], leaf) for leaf in leaves_b)
+        for leaf in leaves_a:
+            other = bnames.get(leaf[0])
+            if other is None or mva[leaf[6]:leaf[7]] != mvb[other[6]:other[7]]:
+                changed.append(leaf[0])
+        if varies:
+            anames = set(leaf[0] for leaf in leaves_a)
+            changed.extend(leaf[0] for leaf in leaves_b if leaf[0] not in anames)
+
+        result = []
+        if changed:
+            if varies:
+                self._diffleaves(buf_a, offset)     # layout of buf_a again
+            olds = self._diffvalues(buf_a, leaves_a, changed)
+            if varies:
+                self._diffleaves(buf_b, offset)
+            news = self._diffvalues(buf_b, leaves_b, changed)
+            result = [(name, olds.get(name), news.get(name)) for name in changed]
+
+        self.__dict__['buffer'] = savebuf
+        self.__dict__['offset'] = saveoff
+        if varies and savebuf is not None:
+            self.prepare()
+        return result
+
+    def _diffleaves(self, buffer, offset):
+        """ map datamap on buffer at offset and prepare it
+            :returns: list of fields for diff()
+        """
+        self.__dict__['buffer'] = buffer
+        self.__dict__['offset'] = offset
+        self.prepare()
+        return self._leaves(offset, '')
+
+    def _leaves(self, offset, prefix):
+        """ :returns: list of fields and occurrences with tuples of
+            (name, datamap, key, datamap offset, index, possiz, start, stop)
+            with start and stop of the field in the buffer
+        """
+        keydict = self.__dict__['keydict']
+        leaves = []
+        for key in self.__dict__['keylist']:
+            ftype, start, size, opt, fdic = keydict[key]
+            if opt & T_NONE:    # filler fields
+                continue
+            mu = fdic.get('submap')
+            if mu is None:
+                a = offset + start
+                leaves.append((prefix+key, self, key, offset, 0, None, a, a+size))
+            elif ftype == T_DMAP:   # PE group
+                sm = mu.submap
+                for i in range(mu.occurs):
+                    leaves.extend(sm._leaves(offset+start+i*sm.dmlen,
+                                             '%s%s[%d].' % (prefix, key, i)))
+            else:                   # MU field
+                possiz = fdic.get('possiz')
+                for i in range(mu.occurs):
+                    name = '%s%s[%d]' % (prefix, key, i)
+                    if possiz:      # variable length occurrences
+                        pos, sz = possiz[i]
+                        a = offset + pos
+                        leaves.append((name, self, key, offset, 0,
+                                       [(pos-start, sz)], a, a+sz))
+                    else:
+                        a = offset + start + i*size
+                        leaves.append((name, self, key, offset, i, None, a, a+size))
+        return leaves
+
+    def _diffvalues(self, buffer, leaves, names):
+        """ :returns: dictionary of name: value of the fields in names """
+        names = set(names)
+        values = {}
+        for name, dm, key, offset, indx, possiz, a, e in leaves:
+            if name in names:
+                dm.__dict__['buffer'] = buffer
+                dm.__dict__['offset'] = offset
+                values[name] = dunpack(dm, key, indx=indx, possiz=possiz)
+        return values
+
     def reset(self):
         """
         Reset attributes/key values of a datamap to default values
@@ -736,19 +736,24 @@ def testgreg2jdn():
 time0 = 0
 clockbase0 = 0
 
+# time.clock() was removed in Python 3.8
+_clock = getattr(time, 'perf_counter', None) or time.clock
+
 def clock_time(resync=300):
     """:param resync: interval for resyncing with time()
     :returns: high resolution time
+
+    For measuring durations see the module instrument.
     """
     global time0, clockbase0
 
-    clock1 = time.clock()
+    clock1 = _clock()
 
     if not time0 or (resync and resync < (clock1+clockbase0 - time0)):
         time0 = time.time()
 
         while 1:                   # until t=time() changes
-            clock1 = time.clock()
+            clock1 = _clock()
             t = time.time()
             if t != time0:
                 time0, clockbase0 = t, t-clock1
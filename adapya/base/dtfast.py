@@ -0,0 +1,164 @@
+"""
+dtfast - fast date and time conversions for Adabas datetime fields
+==================================================================
+
+The module dtfast has faster versions of the dtconv functions used
+when unpacking DATETIME, TIMESTAMP, NATDATE and NATTIME fields with
+identical results for the years 0001 to 9999:
+
+    - ymd() looks up year, month, day of a day number in a table
+      built once for the years 1900 to 2099 and falls back to
+      jdn2greg() outside
+    - str2dt() converts the digits of a datetime string or bytes
+      with one int() and divisions instead of six slices
+    - natdate2date() and nattime2timestamp() use ymd()
+
+The batch functions natdates(), nattimes() and datetimes() convert
+whole columns of values to date or datetime objects.
+
+Example usage::
+
+    >> from adapya.base.dtfast import nattimes
+    >> nattimes([635715396000, 0])
+    [datetime.datetime(2014, 7, 3, 17, 0), None]
+
+"""
+from __future__ import print_function          # PY3
+
+from datetime import date, datetime, timedelta
+
+from adapya.base import dtconv
+from adapya.base.dtconv import DAYSECS, RATADIE, jdn2greg
+
+TABLEYEARS = (1900, 2100)   # years in day table
+_table = []                 # (year, month, day) per day of TABLEYEARS
+_day0 = date(TABLEYEARS[0], 1, 1).toordinal() - 1   # days since 0001-01-01
+_day1 = date(TABLEYEARS[1], 1, 1).toordinal() - 1
+_dt1 = datetime(1, 1, 1)
+
+
+def _buildtable():
+    mdays = (31, 28, 31, 30, 31, 30, 31, 31, 30, 31, 30, 31)
+    for y in range(*TABLEYEARS):
+        leap = y % 4 == 0 and (y % 100 != 0 or y % 400 == 0)
+        for m in range(1, 13):
+            n = mdays[m-1] + (1 if leap and m == 2 else 0)
+            _table.extend((y, m, d) for d in range(1, n+1))
+
+
+def ymd(days):
+    """ :returns: tuple year, month, day of days since 0001-01-01
+        as jdn2greg(days + RATADIE)
+
+    >>> ymd(0), ymd(738000), ymd(3652058)
+    ((1, 1, 1), (2021, 7, 30), (9999, 12, 31))
+    """
+    if _day0 <= days < _day1:
+        if not _table:
+            _buildtable()
+        return _table[days - _day0]
+    return jdn2greg(days + RATADIE)
+
+
+def natdate2date(nd):
+    """ convert NATDATE counting days since Jan. 2, 0000 to
+        tuple year, month, day
+
+    >>> natdate2date(733771)
+    (2008, 12, 31)
+    """
+    return ymd(nd - 365)
+
+
+def nattime2timestamp(nt):
+    """ convert NATTIME value in 10th of second precision to tuple
+        year, month, day, hour, minute, second, microsecond
+
+    >>> nattime2timestamp(635715396005)
+    (2014, 7, 3, 17, 0, 0, 500000)
+    """
+    days, secs = divmod(nt//10 - 365*DAYSECS, DAYSECS)
+    hour, secs = divmod(secs, 3600)
+    minute, second = divmod(secs, 60)
+    return ymd(days) + (hour, minute, second, nt%10 * 10**5)
+
+
+def str2dt(ds):
+    """ make a datetime tuple from a datetime string or number
+        (see dtconv.str2dt())
+
+    >>> str2dt(b'20160229115513')
+    (2016, 2, 29, 11, 55, 13)
+    >>> str2dt('20160301235513123456')
+    (2016, 3, 1, 23, 55, 13, 123456)
+    """
+    if isinstance(ds, (bytes, bytearray, str)) and ds.isdigit():
+        size = len(ds)
+        if size <= 14:
+            n = int(ds)
+            x = None
+        elif size == 20:
+            n, x = divmod(int(ds), 10**6)
+        else:
+            return None
+        n, second = divmod(n, 100)
+        n, minute = divmod(n, 100)
+        n, hour = divmod(n, 100)
+        n, day = divmod(n, 100)
+        year, month = divmod(n, 100)
+        if x is None:
+            return year, month, day, hour, minute, second
+        return year, month, day, hour, minute, second, x
+    return dtconv.str2dt(ds)
+
+
+#
+# batch conversions of columns
+#
+def natdates(values):
+    """ :returns: list of date objects of NATDATE values; None for 0
+
+    >>> natdates([733771, 0])
+    [datetime.date(2008, 12, 31), None]
+    """
+    return [date.fromordinal(nd - 364) if nd else None for nd in values]
+
+
+def nattimes(values):
+    """ :returns: list of datetime objects of NATTIME values; None for 0
+
+    >>> nattimes([635715396005, 0])
+    [datetime.datetime(2014, 7, 3, 17, 0, 0, 500000), None]
+    """
+    base = 365 * DAYSECS * 10
+    return [_dt1 + timedelta(seconds=(nt - base)//10, microseconds=nt%10 * 10**5)
+            if nt else None for nt in values]
+
+
+def datetimes(values):
+    """ :returns: list of datetime objects of DATETIME or TIMESTAMP
+        digit strings (see str2dt()); None for empty or zero values
+
+    >>> datetimes([b'20160229115513', b'00000000000000'])
+    [datetime.datetime(2016, 2, 29, 11, 55, 13), None]
+    """
+    res = []
+    for ds in values:
+        t = str2dt(ds) if ds else None
+        res.append(datetime(*t) if t and t[0] else None)
+    return res
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
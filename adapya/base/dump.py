@@ -8,16 +8,28 @@ This module contains buffer storage display functions
 - classes/methods for reversing readable SYSUDUMP data
   into virtual storage
 - diffdump for printing differences in buffers using difflib
+- getprible() for the tables of printable characters per codec
+  used by dump(); built once for the ECS code pages of ecscodec
 
 """
 from __future__ import print_function          # PY3
 
 import binascii
 from binascii import unhexlify
+import json
+import mmap
+import os
 import struct
 import string
 import sys
 
+if sys.hexversion > 0x03010100:
+    from io import StringIO
+else:
+    from cStringIO import StringIO
+
+from adapya.base.ecscodec import ecs2py, singlebyte
+
 
 benco = sys.getdefaultencoding()
 if benco not in ('ascii', 'cp1252', 'latin_1'):
@@ -66,54 +78,65 @@ ebcpribles=\
     b'.' b'.' b'S' b'T' b'U' b'V' b'W' b'X' b'Y' b'Z' b'.' b'.' b'.' b'.' b'.' b'.'\
     b'0' b'1' b'2' b'3' b'4' b'5' b'6' b'7' b'8' b'9' b'.' b'.' b'.' b'.' b'.' b'.'
 
+# characters shown in the text columns of a dump: the EBCDIC invariant
+# characters of ebcpribles; all other characters are shown as '.'
+DUMPCHARS = frozenset(ebcpribles.decode('ascii'))
+
 priblesdict={
-    # print tables for other ebcdict codepages may be added dynamically
+    # printable tables per codec, precomputed for the single byte
+    # ECS code pages of ecscodec with the first getprible() call
+    'cp037': ebcpribles,
     }
+_ecsdone = []   # not empty when the ECS code pages are in priblesdict
+
+
+def mkprible(codec, chars=DUMPCHARS):
+    """ Build the translate() table of a single byte codec that maps
+        each byte to its character if it is in chars else to '.'
+
+    >>> mkprible('cp273')[0x7c:0x7d], mkprible('cp037')[0x7c:0x7d]
+    (b'.', b'@')
+    """
+    text = bytes(bytearray(range(256))).decode(codec, 'replace')
+    return ''.join(c if c in chars else '.' for c in text).encode('ascii')
 
-# If the system supports a full single byte character set (rather than
-# 'ascii') make a translate table that contains special characters too.
-# This is usualy enabled in lib/site.py where the encoding is gotten
-# from locale.getdefaultlocale()
-# 'cp037' is used as the corresponding Latin1 EBCDIC code page
 
 def getprible(codec):
-    if codec in priblesdict:
-        return priblesdict[codec]
-    else:
-        if sys.getdefaultencoding() in ('cp1252', 'latin_1'):
-            tbuf=adapya.base.Abuf(256)
-            tbuf[0:32]=32*'.'
-            for i in range(32,127):
-                tbuf[i]=chr(i)
-            tbuf[127]='.'           # 'DEL'
-            if sys.getdefaultencoding() == 'cp1252':
-                for i in range(128,160):
-                    tbuf[i]=chr(i)
-                # windows has defined additional codepoints in the control
-                # character range 0x80-0x9f except the following:
-                tbuf[0x81]=tbuf[0x8d]=tbuf[0x8f]=tbuf[0x90]=tbuf[0x9d]='.'
-            else:
-                tbuf[128:160]=32*'.'
-
-            for i in range(160,256):
-                tbuf[i]=chr(i)
-            for i in range(32,128):
-                tbuf[i]=chr(i)
-            ascpribles=tbuf[:]   # repackage as string for string.translate()
-
-            for i in range(64,255):
-                tbuf[i]=chr(i)
-            t2=tbuf[:]
-            ustr = t2.decode(codec)
-
-            tbuf[0:256] = ustr.encode(sys.getdefaultencoding(),'replace')
-            tbuf[0:64]=64*'.'
-            tbuf[255] = '.'
-            ep = tbuf[:]
-            priblesdict[codec] = ep # add new table to dict
-            return ep
-        else:
-            return ebcpribles
+    """ :returns: translate() table with the printable characters of
+        codec (see mkprible()); the tables are built once
+    """
+    ep = priblesdict.get(codec)
+    if ep is None:
+        if not _ecsdone:
+            for ecodec in ecs2py.values():
+                if ecodec not in priblesdict and singlebyte(ecodec):
+                    priblesdict[ecodec] = mkprible(ecodec)
+            _ecsdone.append(1)
+        ep = priblesdict.get(codec)
+        if ep is None:
+            ep = priblesdict[codec] = mkprible(codec)
+    return ep
+
+
+def savepribles(path):
+    """ Write the printable tables built so far to JSON file path """
+    with open(path, 'w') as f:
+        json.dump(dict((codec, binascii.hexlify(ep).decode('ascii'))
+                       for codec, ep in priblesdict.items()), f, indent=1,
+                  sort_keys=True)
+
+
+def loadpribles(path):
+    """ Add the printable tables of JSON file path written by
+        savepribles(), e.g. tables edited for special code pages
+    """
+    with open(path) as f:
+        for codec, hexep in json.load(f).items():
+            ep = unhexlify(hexep)
+            if len(ep) != 256:
+                raise ValueError('Printable table of %s in %s must have 256 bytes' % (
+                    codec, path))
+            priblesdict[codec] = ep
 
 
 
@@ -186,33 +209,111 @@ def diffdump(buf1, buf2, header1='Buffer 1', header2='Buffer 2',
     else:
         fd.writelines(result)
 
-def diffbin( a, b, header1='Buffer1', header2='Buffer2',
-        startaddr=0, fd=None):
-    """Binary difference printer for buffer objects a and b
-    """
-    from difflib import SequenceMatcher
+DUMPBLOCK = 4096    # bytes formatted at once by dumpto()
 
-    s=SequenceMatcher(None, a, b)
+if sys.hexversion >= 0x03080000:
+    def _hex4(data):
+        """ :returns: upper case hex string with blank after 4 bytes """
+        return data.hex(' ', 4).upper()
+else:
+    def _hex4(data):
+        h = binascii.hexlify(data).upper().decode('ascii')
+        return ' '.join(h[i:i+8] for i in range(0, len(h), 8))
 
-    print("\nComparing\n    A = %s\n    B = %s " % (header1, header2),
-          file=fd)
+if sys.hexversion > 0x03010100:
+    _text = lambda b: b.decode(benco)
+else:
+    _text = lambda b: b
 
+def _dumplines(chunks, prefix, startaddr, ep):
+    """ Generator of lists of dump lines for the bytes of chunks
 
-    for tag, i1, i2, j1, j2 in s.get_opcodes():
-        print( "\n%s A+%04X(%04X) vs. B+%04X(%04X)" % (
-            tag[0:3].upper(), i1,i2-i1, j1, j2-j1), file=fd)
-        if tag == 'delete':
-            dump(a[i1:i2],prefix='A',header=None,startaddr=startaddr+i1,fd=fd)
-        elif tag == 'equal':
-            dump(a[i1:i2],prefix='A',header=None,startaddr=startaddr+i1,fd=fd)
-        elif tag == 'replace':
-            dump(a[i1:i2],prefix='A',header=None,startaddr=startaddr+i1,fd=fd)
-            dump(b[j1:j2],prefix='B',header=None,startaddr=startaddr+j1,fd=fd)
-        else: # tag == 'insert':
-            dump(b[j1:j2],prefix='B',header=None,startaddr=startaddr+j1,fd=fd)
+        :param chunks: iterable of bytes objects; all but the last
+            must have a length that is a multiple of 16
+    """
+    afmt = '%s %08X' if startaddr else '%s %04X'
+    fmt = afmt + ' %s %s %s'
+    rfmt = afmt + ' %s %s %s %s '
+    base = startaddr or 0
+    k = 0           # offset of current chunk
+    p = -1          # index of last unique line
+    i = -1          # index of last full line
+    pline = None    # last unique line
+    for chunk in chunks:
+        n = len(chunk) // 16
+        lines = []
+        if n:
+            full = chunk[:n*16] if len(chunk) % 16 else chunk
+            hexs = _hex4(full)
+            asc = _text(full.translate(ascpribles))
+            ebc = _text(full.translate(ep))
+            for l in range(n):
+                o = l*16
+                cline = full[o:o+16]
+                if cline == pline:
+                    continue
+                i = k//16 + l
+                if p+1 < i:  # some line(s) were suppressed
+                    lines.append('%s      %d identical line(s) suppressed' % (prefix, i-(p+1)))
+                p = i
+                pline = cline
+                lines.append(fmt % (prefix, base+k+o, hexs[l*36:l*36+35],
+                                    asc[o:o+16], ebc[o:o+16]))
+            i = k//16 + n - 1
+        rest = len(chunk) % 16
+        if rest:
+            if p < i:  # lines including last line suppressed?
+                lines.append('%s      %d identical line(s) suppressed' % (prefix, i-p))
+                p = i
+            r = chunk[n*16:]
+            rline = binascii.hexlify(r).upper().decode('ascii') + (32-rest*2)*' '
+            r1 = rfmt % (prefix, base+k+n*16,
+                rline[0:8], rline[8:16], rline[16:24], rline[24:32])
+            lines.append(r1 + _text(r.translate(ascpribles) + (16-rest+1)*b' '
+                                    + r.translate(ep)))
+        k += len(chunk)
+        yield lines
+    if p < i:  # lines including last line suppressed?
+        yield ['%s      %d identical line(s) suppressed' % (prefix, i-p)]
 
-    print('\nSimliarity between objects is %3.1f%%\n' % (s.ratio()*100,),file=fd)
+def dumpto(f, chunks, header='Buffer', prefix='', startaddr=None, ecodec='cp037'):
+    """ Write hex dump of byte chunks to text file f
 
+    :param f: file-like object with write()
+    :param chunks: iterable of bytes objects; all but the last must
+        have a length that is a multiple of 16
+    :param header, prefix, startaddr, ecodec: see dump()
+    :returns: number of bytes dumped
+
+    The lines of each chunk are formatted and written at once.
+    Identical lines are suppressed as with dump().
+    """
+    ep = getprible(ecodec) # get ebcdic printables table
+    counter = [0]
+    def counted():
+        for chunk in chunks:
+            counter[0] += len(chunk)
+            yield chunk
+    written = 0
+    if header:
+        f.write(header + '\n')
+        written += 1
+    for lines in _dumplines(counted(), prefix, startaddr, ep):
+        if lines:
+            f.write('\n'.join(lines) + '\n')
+            written += 1
+    if header:
+        f.write('\n\n')
+    elif not written:
+        f.write('\n')
+    return counter[0]
+
+def _chunks(buf, size=DUMPBLOCK):
+    """ :returns: iterable of slices of buf of size bytes """
+    mv = memoryview(buf)
+    if mv.itemsize != 1:
+        mv = mv.cast('B')
+    return (mv[k:k+size].tobytes() for k in range(0, mv.nbytes, size))
 
 def dump(buf, header='Buffer', prefix='', startaddr=None, fd=None, log=None, ecodec='cp037'):
     """ print or log buffer
@@ -222,87 +323,246 @@ def dump(buf, header='Buffer', prefix='', startaddr=None, fd=None, log=None, eco
     :param startaddr: dump lines will be prefixed with given start address plus offset
         as absolute address rather than relative offset from buffer start
 
+    The dump is written in blocks of lines (see dumpto()).
+
     Example to write warning to logger adalog::
 
         dump(a,log=adalog.warning)
 
+    >>> dump(b'ABCD'*8 + b'xyz', header='Test')
+    Test
+     0000 41424344 41424344 41424344 41424344 ABCDABCDABCDABCD ................
+          1 identical line(s) suppressed
+     0020 78797A                              xyz              ..:
+    <BLANKLINE>
+    <BLANKLINE>
     """
-    ep = getprible(ecodec) # get ebcdic printables table
-    lines=[]
-    if header:
-        lines.append(header)
-
     if isinstance(buf, str) and sys.hexversion > 0x03010100:
         buf = buf.encode('utf16') # does not exist anymore in PY3.8 'unicode_internal')    # convert to byte string
         # buf is now local variable
+    chunks = _chunks(buf) if buf else ()
 
-    i = 0
-    j = len(buf) if buf else 0
-    p = 0     # unique line offset
-    pline = '' # previous unique line
-    for i in range(j//16):
-        k = i*16
-        cline = buf[k:k+16]
-        if pline != cline:
-            if p+1 < i:  # some line(s) were suppressed
-                lines.append('%s      %d identical line(s) suppressed' % (prefix, i-(p+1)))
-            p = i
-            pline = cline
-
-            if sys.hexversion > 0x03010100:
-                # Python 3
-                transd1=buf[k:k+16].translate(ascpribles).decode(benco)
-                transd2=buf[k:k+16].translate(ep).decode(benco)
-            else:
-                transd1=buf[k:k+16].translate(ascpribles)
-                transd2=buf[k:k+16].translate(ep)
-
-            i1,i2,i3,i4=struct.unpack('!IIII', buf[k:k+16])
-            if startaddr:
-                lines.append('%s %08X %08X %08X %08X %08X %s %s'\
-                  % (prefix, startaddr+k,i1,i2,i3,i4, transd1, transd2)
-                  )
-            else:
-                lines.append('%s %04X %08X %08X %08X %08X %s %s'\
-                  % (prefix, k,i1,i2,i3,i4, transd1, transd2))
+    if log:
+        f = StringIO()
+        dumpto(f, chunks, header=header, prefix=prefix, startaddr=startaddr, ecodec=ecodec)
+        log(f.getvalue()[:-1])
+    else:
+        dumpto(fd or sys.stdout, chunks, header=header, prefix=prefix,
+               startaddr=startaddr, ecodec=ecodec)
+
+def dumpfile(path, offset=0, length=None, header=None, fd=None, ecodec='cp037',
+             blocksize=2**20):
+    """ Write hex dump of a file part to fd (default sys.stdout)
+        without reading the file into memory
+
+    :param offset: file offset of the first byte to dump; the dump
+        lines show the file offsets
+    :param length: number of bytes to dump (default: up to end of file)
+    :param header: header line (default: file path)
+    :param blocksize: bytes mapped and formatted at once
+    :returns: number of bytes dumped
+
+    The file is mapped with mmap and dumped in blocks of blocksize.
+    """
+    blocksize = max(16, blocksize // 16 * 16)
+    with open(path, 'rb') as fi:
+        size = os.fstat(fi.fileno()).st_size
+        end = size if length is None else min(size, offset + length)
+        if offset >= end:
+            chunks = ()
+            mm = None
+        else:
+            mm = mmap.mmap(fi.fileno(), 0, access=mmap.ACCESS_READ)
+            chunks = (mm[k:min(k+blocksize, end)] for k in range(offset, end, blocksize))
+        try:
+            return dumpto(fd or sys.stdout, chunks, header=header or path,
+                          startaddr=offset, ecodec=ecodec)
+        finally:
+            if mm is not None:
+                mm.close()
+
+
+DIFFBLOCK = 32         # anchor block size for resynchronizing
+DIFFWINDOW = 2**20     # maximum distance searched for resynchronizing
+
+def _mismatch(a, b, i, j, n):
+    """ :returns: offset of the first different byte of a[i:i+n]
+        and b[j:j+n] which are known to differ
+    """
+    lo, hi = 0, n
+    while hi - lo > 1:
+        mid = (lo + hi) // 2
+        if a[i+lo:i+mid] == b[j+lo:j+mid]:
+            lo = mid
+        else:
+            hi = mid
+    return lo
 
-    if p < i:  # lines including last line suppressed?
-        lines.append('%s      %d identical line(s) suppressed' % (prefix, i-p))
-
-    k=j//16*16
-    rest=j%16
-    # print('rest=',rest)
-    if (rest) > 0:
-        rline = '%02X'*rest % struct.unpack('B'*rest, buf[k:k+rest])\
-                + (32-rest*2)*' ' # fill up with blanks
-        if startaddr:
-            r1 = '%s %08X %s %s %s %s '\
-              % (prefix, startaddr+k, rline[0:8],rline[8:16],
-                 rline[16:24],rline[24:32])
+def _common(a, b, i, j):
+    """ :returns: number of equal bytes of a and b from i and j;
+        compared in slices growing up to 64 KB
+    """
+    limit = min(len(a) - i, len(b) - j)
+    n = 0
+    step = 64
+    while n < limit:
+        m = min(step, limit - n)
+        if a[i+n:i+n+m] != b[j+n:j+n+m]:
+            return n + _mismatch(a, b, i+n, j+n, m)
+        n += m
+        step = min(step * 2, 2**16)
+    return n
+
+def _anchor(x, i, y, j, window, block):
+    """ Search blocks of x from offset i in y from offset j
+        within window bytes
+
+        :returns: tuple (offset in x, offset in y) of the first
+            block found or None
+    """
+    xend = min(i + window, len(x) - block + 1)
+    yend = min(j + window + block, len(y))
+    for k in range(i, xend, max(block, window // 64)):
+        pos = y.find(x[k:k+block], j, yend)
+        if pos >= 0:
+            return k, pos
+    return None
+
+def _resync(a, b, i, j, block, maxwindow):
+    """ :returns: tuple of offsets in a and b where they are equal
+        again after differing at i and j or None if not found within
+        maxwindow bytes
+    """
+    window = block * 16
+    while 1:
+        best = None
+        ca = _anchor(a, i, b, j, window, block)     # insertion in b
+        cb = _anchor(b, j, a, i, window, block)     # deletion from a
+        for c in (ca, cb and (cb[1], cb[0])):
+            if c and (best is None or c[0]+c[1] < best[0]+best[1]):
+                best = c
+        if best:
+            i2, j2 = best
+            while i2 > i and j2 > j and a[i2-1] == b[j2-1]:   # extend backwards
+                i2 -= 1
+                j2 -= 1
+            return i2, j2
+        if window >= maxwindow or (i+window >= len(a) and j+window >= len(b)):
+            return None
+        window = min(window * 16, maxwindow)
+
+def _opcodes(a, b, block, maxwindow):
+    i = j = 0
+    na, nb = len(a), len(b)
+    while i < na and j < nb:
+        n = _common(a, b, i, j)
+        if n:
+            yield 'equal', i, i+n, j, j+n
+            i += n
+            j += n
+            if i >= na or j >= nb:
+                break
+        sync = _resync(a, b, i, j, block, maxwindow)
+        if sync is None:
+            i2, j2 = min(i + maxwindow, na), min(j + maxwindow, nb)
         else:
-            r1 = '%s %04X %s %s %s %s '\
-              % (prefix, k, rline[0:8],rline[8:16],
-                 rline[16:24],rline[24:32])
+            i2, j2 = sync
+        yield 'replace', i, i2, j, j2
+        i, j = i2, j2
+    if i < na or j < nb:
+        yield 'replace', i, na, j, nb
+
+def blockdiff(a, b, block=DIFFBLOCK, maxwindow=DIFFWINDOW):
+    """ Generator of the differences of buffers a and b as tuples
+        (tag, i1, i2, j1, j2) with tag 'equal', 'replace', 'insert'
+        or 'delete' like difflib.SequenceMatcher.get_opcodes()
+
+    :param a, b: bytes, bytearray or mmap objects (with find())
+    :param block: size of the blocks searched to resynchronize
+    :param maxwindow: maximum distance searched to resynchronize;
+        longer differences are reported as replace of maxwindow bytes
+
+    Equal bytes are compared in slices of up to 64 KB and the first
+    different byte is found by bisection. After a difference blocks
+    of one buffer are searched in the other buffer in windows growing
+    up to maxwindow. The nearest match ends the difference at the
+    byte where both buffers are equal again. Memory is bounded by
+    the slices compared, so that large files can be compared with
+    mmap.
+
+    >>> list(blockdiff(b'0123456789'*10, b'0123456789xyz'+b'0123456789'*9))
+    [('equal', 0, 10, 0, 10), ('insert', 10, 10, 10, 13), ('equal', 10, 100, 13, 103)]
+    """
+    pending = None
+    for tag, i1, i2, j1, j2 in _opcodes(a, b, block, maxwindow):
+        if tag == 'replace':
+            if i1 == i2:
+                tag = 'insert'
+            elif j1 == j2:
+                tag = 'delete'
+        if pending and pending[0] == tag:
+            pending = (tag, pending[1], i2, pending[3], j2)
+            continue
+        if pending:
+            yield pending
+        pending = (tag, i1, i2, j1, j2)
+    if pending:
+        yield pending
+
+def _dumprange(buf, i1, i2, prefix, startaddr, fd):
+    """ dump buf[i1:i2] like dump(buf[i1:i2], header=None) in blocks """
+    chunks = (buf[k:min(k+DUMPBLOCK, i2)] for k in range(i1, i2, DUMPBLOCK))
+    dumpto(fd or sys.stdout, chunks, header=None, prefix=prefix, startaddr=startaddr+i1)
+
+def diffbin( a, b, header1='Buffer1', header2='Buffer2',
+        startaddr=0, fd=None):
+    """Binary difference printer for buffer objects a and b
 
-        r2 = buf[k:k+rest].translate(ascpribles)+\
-              (16-rest+1)*b' '+\
-              buf[k:k+rest].translate(ep)
+    The differences are determined with blockdiff() so that large
+    buffers or mmap objects can be compared.
+    """
+    print("\nComparing\n    A = %s\n    B = %s " % (header1, header2),
+          file=fd)
 
-        # print(r1,r2, type(r1), type(r2))
+    if not hasattr(a, 'find'):
+        a = bytes(a)
+    if not hasattr(b, 'find'):
+        b = bytes(b)
 
-        if sys.hexversion > 0x03010100:
-            # Python 3
-            lines.append( r1 + r2.decode(benco) )
-        else:
-            lines.append( r1+r2 )
+    matched = 0
+    for tag, i1, i2, j1, j2 in blockdiff(a, b):
+        print( "\n%s A+%04X(%04X) vs. B+%04X(%04X)" % (
+            tag[0:3].upper(), i1,i2-i1, j1, j2-j1), file=fd)
+        if tag == 'delete':
+            _dumprange(a, i1, i2, 'A', startaddr, fd)
+        elif tag == 'equal':
+            _dumprange(a, i1, i2, 'A', startaddr, fd)
+            matched += i2 - i1
+        elif tag == 'replace':
+            _dumprange(a, i1, i2, 'A', startaddr, fd)
+            _dumprange(b, j1, j2, 'B', startaddr, fd)
+        else: # tag == 'insert':
+            _dumprange(b, j1, j2, 'B', startaddr, fd)
 
-    if header:
-        lines.append('\n')
+    total = len(a) + len(b)
+    ratio = 2.0 * matched / total if total else 1.0
+    print('\nSimliarity between objects is %3.1f%%\n' % (ratio*100,),file=fd)
 
-    if log:
-        log('\n'.join(lines))
-    else:
-        print('\n'.join(lines), file=fd)
+def diffbinfile(path1, path2, startaddr=0, fd=None):
+    """ Binary difference printer for files mapped with mmap
+        (see diffbin())
+    """
+    with open(path1, 'rb') as f1, open(path2, 'rb') as f2:
+        m1 = mmap.mmap(f1.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.fstat(f1.fileno()).st_size else b''
+        m2 = mmap.mmap(f2.fileno(), 0, access=mmap.ACCESS_READ) \
+            if os.fstat(f2.fileno()).st_size else b''
+        try:
+            diffbin(m1, m2, header1=path1, header2=path2, startaddr=startaddr, fd=fd)
+        finally:
+            for m in (m1, m2):
+                if m:
+                    m.close()
 
 
 hex2buf=lambda hexbuf: \
@@ -482,7 +742,7 @@ if __name__=='__main__':
                 filename,filename2,_ = (arg+',,').split(',',2)
             elif opt in ('-m', '--maxsize'):
                 maxsize = int(arg)
-            elif opt in ('-m', '--maxsize'):
+            elif opt in ('-s', '--skip'):
                 skip = int(arg)
     except getopt.GetoptError:
         usage()
@@ -494,37 +754,20 @@ if __name__=='__main__':
             filename=args[0]
             filename2=args[1]
 
-    if filename2:
+    if filename2 and verbose:
+        diffbinfile(abspath(filename), abspath(filename2))
+    elif filename2:
         fd = open(filename,'rb')
         fc = fd.read()
         fd.close()
         fd = open(filename2,'rb')
         fc2 = fd.read()
         fd.close()
-        if verbose:
-            diffbin(fc,fc2,
-                     header1=abspath(filename),
-                     header2=abspath(filename2))
-        else:
-            diffdump(fc,fc2,
-                     header1=abspath(filename),
-                     header2=abspath(filename2))
+        diffdump(fc,fc2,
+                 header1=abspath(filename),
+                 header2=abspath(filename2))
     else:
-        fd = open(filename,'rb')
-        saddr = skip
-        if skip:
-            fd.seek(skip, os.SEEK_CUR)
-
-        while 1:
-            fc = fd.read(maxsize)
-            ll = len(fc)
-            if ll:
-                dump(fc,startaddr=saddr,header=abspath(filename))
-                saddr+=ll
-            #if ll < maxsize:
-            #    break
-            break
-        fd.close()
+        dumpfile(filename, offset=skip, length=maxsize, header=abspath(filename))
 
 #  Copyright 2004-2023 Software AG
 #
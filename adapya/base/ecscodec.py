@@ -12,6 +12,7 @@ library used with Adabas.
           Python encodings per default 'cp%d' % i
 
 """
+import codecs
 import string
 
 py2ecs={\
@@ -28,7 +29,7 @@ py2ecs={\
 
 ecs2py={\
   #ECS encoding, codec
-  37:   'cp37',      #EBCDIC: USA, Canada, Brazil, Australia, New Zealand
+  37:   'cp037',     #EBCDIC: USA, Canada, Brazil, Australia, New Zealand
   273:  'cp273',     #EBCDIC: Austria, Germany, de_deu
   437:  'cp437',     #PC: English
   500:  'cp500',     #EBCDIC: Belgium, Canada, Switzerland
@@ -59,6 +60,25 @@ def getecs(codec):
         else:
             return py2ecs[codec]
 
+_singlebytes = {}   # codec: True if single byte codec
+
+def singlebyte(codec):
+    """return True if codec decodes each of the 256 bytes to one character
+    so that decoded text can be sliced like the bytes
+
+    >>> singlebyte('cp273'), singlebyte('utf8'), singlebyte('nocodec')
+    (True, False, False)
+    """
+    sb = _singlebytes.get(codec)
+    if sb is None:
+        try:
+            sb = len(bytes(bytearray(range(256))).decode(codec, 'replace')) == 256 \
+                and codecs.lookup(codec).name not in ('utf-8', 'utf-16', 'utf-32')
+        except LookupError:
+            sb = False
+        _singlebytes[codec] = sb
+    return sb
+
 #
 #  Copyright 2004-2023 Software AG
 #
@@ -0,0 +1,274 @@
+"""
+instrument - counters, timers and histograms for measuring code
+===============================================================
+
+The module instrument measures how often and how long parts of a
+program run with the high resolution clock time.perf_counter_ns():
+
+    - counters count events by name
+    - histograms collect integer values (e.g. durations in
+      nanoseconds) in buckets of powers of two with count, total,
+      minimum and maximum
+    - timers are histograms of durations used as context manager
+      (timer()) or function decorator (timed())
+
+The measurements are kept in an Instruments object. The module
+object instruments is used by the module functions count(),
+observe(), timer() and timed(). It is disabled by default so that
+measuring costs one attribute check on instruments.enabled; for
+the hottest loops the check can be done by the caller.
+
+snapshot() returns the measurements as dictionary and report()
+writes them to the adalog logger.
+
+Example usage::
+
+    >> from adapya.base import instrument
+    >> instrument.enable()
+    >> @instrument.timed('parse')
+    >> def parse(rec): ...
+    >> for rec in records:
+    >>     with instrument.timer('read'):
+    >>         ...
+    >>     if instrument.instruments.enabled:
+    >>         instrument.count('records')
+    >> instrument.report()
+
+"""
+from __future__ import print_function          # PY3
+
+import functools
+import time
+from collections import Counter
+
+from adapya.base.defs import DummyContext, adalog
+
+try:
+    perf_counter_ns = time.perf_counter_ns
+except AttributeError:  # before Python 3.7
+    perf_counter_ns = lambda: int(time.perf_counter() * 10**9)
+
+NBUCKETS = 65       # bucket i has values v with v.bit_length() == i
+
+
+class Histogram(object):
+    """ Histogram - integer values in buckets of powers of two
+
+    >>> h = Histogram()
+    >>> for v in (0, 1, 3, 700, 900): h.add(v)
+    >>> h.count, h.total, h.min, h.max, h.buckets[10]
+    (5, 1604, 0, 900, 2)
+    >>> h.percentile(50), h.percentile(100)
+    (4, 1024)
+    """
+    __slots__ = ('buckets', 'count', 'total', 'min', 'max')
+
+    def __init__(self):
+        self.buckets = [0] * NBUCKETS
+        self.count = 0
+        self.total = 0
+        self.min = None
+        self.max = None
+
+    def add(self, value):
+        """ add integer value >= 0 """
+        self.buckets[value.bit_length()] += 1
+        self.count += 1
+        self.total += value
+        if self.min is None or value < self.min:
+            self.min = value
+        if self.max is None or value > self.max:
+            self.max = value
+
+    def merge(self, other):
+        """ add the values of Histogram other """
+        for i, n in enumerate(other.buckets):
+            self.buckets[i] += n
+        self.count += other.count
+        self.total += other.total
+        for v in (other.min, other.max):
+            if v is not None:
+                if self.min is None or v < self.min:
+                    self.min = v
+                if self.max is None or v > self.max:
+                    self.max = v
+
+    def percentile(self, p):
+        """ :returns: upper bound (power of two) of the bucket with
+            the p-th percentile of the values or None if empty
+        """
+        if not self.count:
+            return None
+        rank = self.count * p / 100.
+        n = 0
+        for i, c in enumerate(self.buckets):
+            n += c
+            if c and n >= rank:
+                return 1 << i
+        return 1 << (NBUCKETS - 1)
+
+    def summary(self):
+        """ :returns: dictionary of count, total, min, max, mean and
+            percentiles p50, p90, p99
+        """
+        return dict(count=self.count, total=self.total, min=self.min,
+                    max=self.max,
+                    mean=self.total // self.count if self.count else None,
+                    p50=self.percentile(50), p90=self.percentile(90),
+                    p99=self.percentile(99))
+
+
+class _Timing(object):
+    """ context manager adding its duration in ns to a histogram """
+    __slots__ = ('hist', 'start')
+
+    def __init__(self, hist):
+        self.hist = hist
+
+    def __enter__(self):
+        self.start = perf_counter_ns()
+        return self
+
+    def __exit__(self, exc_type, exc_value, tb):
+        self.hist.add(perf_counter_ns() - self.start)
+
+
+_nocontext = DummyContext()
+
+
+class Instruments(object):
+    """ Instruments - named counters and histograms
+
+        :param enabled: False - nothing is measured
+
+    Timers are histograms of durations in nanoseconds.
+
+    >>> ins = Instruments(enabled=True)
+    >>> ins.count('records', 3)
+    >>> with ins.timer('read'): pass
+    >>> snap = ins.snapshot()
+    >>> snap['counters'], snap['histograms']['read']['count']
+    ({'records': 3}, 1)
+    """
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.counters = Counter()
+        self.histograms = {}    # name: Histogram
+
+    def count(self, name, n=1):
+        """ add n to counter name """
+        if self.enabled:
+            self.counters[name] += n
+
+    def histogram(self, name):
+        """ :returns: Histogram name; created if new """
+        hist = self.histograms.get(name)
+        if hist is None:
+            hist = self.histograms[name] = Histogram()
+        return hist
+
+    def observe(self, name, value):
+        """ add integer value to histogram name """
+        if self.enabled:
+            self.histogram(name).add(value)
+
+    def timer(self, name):
+        """ :returns: context manager timing its block in histogram name """
+        if not self.enabled:
+            return _nocontext
+        return _Timing(self.histogram(name))
+
+    def timed(self, name=None):
+        """ decorator timing the calls of a function in histogram name
+            (default: function name)
+        """
+        def decorate(func):
+            hname = name or func.__name__
+            @functools.wraps(func)
+            def wrapper(*args, **kw):
+                if not self.enabled:
+                    return func(*args, **kw)
+                start = perf_counter_ns()
+                try:
+                    return func(*args, **kw)
+                finally:
+                    self.histogram(hname).add(perf_counter_ns() - start)
+            return wrapper
+        return decorate
+
+    def snapshot(self):
+        """ :returns: dictionary with counters and histogram summaries """
+        return dict(counters=dict(self.counters),
+                    histograms=dict((name, h.summary())
+                                    for name, h in self.histograms.items()))
+
+    def reset(self):
+        """ clear all counters and histograms """
+        self.counters.clear()
+        self.histograms.clear()
+
+    def report(self, log=None):
+        """ write counters and histograms to log function
+            (default adalog.info); durations in microseconds
+        """
+        log = log or adalog.info
+        for name in sorted(self.counters):
+            log('%-24s %12d' % (name, self.counters[name]))
+        for name in sorted(self.histograms):
+            s = self.histograms[name].summary()
+            if not s['count']:
+                continue
+            log('%-24s %12d calls  total %.3f ms  mean %.3f us  '
+                'min %.3f us  p50 <%.3f us  p99 <%.3f us  max %.3f us' % (
+                name, s['count'], s['total'] / 1e6, s['mean'] / 1e3,
+                s['min'] / 1e3, s['p50'] / 1e3, s['p99'] / 1e3, s['max'] / 1e3))
+
+
+instruments = Instruments()     # default instruments of the module functions
+
+
+def enable(on=True):
+    """ switch the default instruments on or off """
+    instruments.enabled = on
+
+def count(name, n=1):
+    """ add n to counter name of the default instruments """
+    if instruments.enabled:
+        instruments.counters[name] += n
+
+def observe(name, value):
+    """ add value to histogram name of the default instruments """
+    instruments.observe(name, value)
+
+def timer(name):
+    """ :returns: context manager timing its block with the default
+        instruments
+    """
+    return instruments.timer(name)
+
+def timed(name=None):
+    """ decorator timing a function with the default instruments """
+    return instruments.timed(name)
+
+def snapshot():
+    """ :returns: measurements of the default instruments """
+    return instruments.snapshot()
+
+def report(log=None):
+    """ write the measurements of the default instruments to log """
+    instruments.report(log)
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
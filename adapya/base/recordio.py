@@ -12,11 +12,24 @@ structures (variable, variable blocked):
     - EXCL4 records preceded by a 4 bytes exclusive record length
             in native byte-order)
 
+    - F/FB  fixed length records; unpackfixed() unpacks records of
+            numeric fields in bulk with struct.iter_unpack()
+
+The asyncio variants aread_records(), awriterec() and awrite_records()
+for stream readers and writers are defined in module arecordio and
+can also be imported from here (Python 3.7 or higher).
+
+followrec() reads records from a file that is still growing and
+keeps its read position in a Checkpoint file to resume after restart.
+
 """
 from __future__ import print_function          # PY3
 from io import BytesIO
+import json
 import os
+import struct
 import sys
+import time
 from adapya.base.defs import Abuf
 from adapya.base.dump import dump
 from adapya.base.datamap import Datamap, Uint2, Uint1, Uint4, NETWORKBO
@@ -47,6 +60,8 @@ excl4 =  Datamap('EXCL4',
     Uint4('rlen'), # Record length
     )
 
+_rdwhdr = struct.Struct('!HBx')  # RDW record length, segment control
+
 # used for writing
 wrdw =  Datamap('RDW',
     # RDW Record descriptor word
@@ -64,7 +79,133 @@ isnp =  Datamap('ISN_prefix',
     )
 
 
-def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,into=0):
+def compileselect(select, selhdr=32):
+    r""" Compile a record selection for readrec()
+
+        :param select: either a function called with the record header
+            bytes that returns True for records to be selected
+            or a dictionary of conditions {offset: value} that must
+            all be fulfilled; the value is one of
+
+            - int: byte value at offset
+            - bytes: byte string starting at offset
+            - set, list or tuple of ints or bytes with the allowed
+              values at offset
+
+        :param selhdr: number of header bytes passed to a select function
+
+        :returns: tuple (predicate, hdrlen) with predicate function on
+            the first hdrlen bytes of a record
+
+    Offsets are relative to the record as returned by readrec()
+    i.e. including the RDW for the formats 'RDW+' and 'BDW+'.
+
+    >>> sel, hdrlen = compileselect({5: (30, 70), 14: b'SYSA'})
+    >>> hdrlen
+    18
+    >>> sel(b'\x00\x20\x00\x00\x1e\x17' + 8*b'\x00' + b'SYSA')
+    False
+    >>> sel(b'\x00\x20\x00\x00\x1e\x1e' + 8*b'\x00' + b'SYSA')
+    True
+    """
+    if callable(select):
+        return select, selhdr
+
+    conds = []
+    hdrlen = 0
+    for off, val in sorted(select.items()):
+        if isinstance(val, (set, frozenset, list, tuple)):
+            pats = frozenset(bytes(bytearray((v,))) if isinstance(v, int)
+                             else bytes(v) for v in val)
+            plens = set(len(p) for p in pats)
+            if len(plens) != 1:
+                raise BaseException('Select values at offset %d must have equal length' % off)
+            plen = plens.pop()
+        else:
+            pats = bytes(bytearray((val,))) if isinstance(val, int) else bytes(val)
+            plen = len(pats)
+        conds.append((off, off+plen, pats))
+        hdrlen = max(hdrlen, off+plen)
+
+    def predicate(hdr):
+        for start, end, pats in conds:
+            if isinstance(pats, frozenset):
+                if hdr[start:end] not in pats:
+                    return False
+            elif hdr[start:end] != pats:
+                return False
+        return True
+
+    return predicate, hdrlen
+
+
+def _peekhdr(f, n):
+    """ Return the next n bytes of f without advancing the file position;
+        bytes already in the read buffer are used if available
+    """
+    if n <= 0:
+        return b''
+    peek = getattr(f, 'peek', None)
+    if peek:
+        hdr = peek(n)[:n]
+        if len(hdr) == n:
+            return hdr
+    hdr = f.read(n)
+    f.seek(-len(hdr), os.SEEK_CUR)
+    return hdr
+
+
+class Recbuf(object):
+    """ Growable record buffer for readrec(into=...)
+
+    Records are collected in a bytearray and returned as memoryview.
+    If a record does not fit, a new bytearray of at least double size
+    replaces the buffer, so that memoryviews already returned
+    stay valid.
+
+        :param buf: bytearray to start with or size of buffer
+            to be allocated (minimum 32k)
+
+    >>> bu = Recbuf(bytearray(8))
+    >>> bu.write(b'abc'); bu.write(b'defghij')
+    >>> bytes(bu.record()), len(bu.buf)
+    (b'abcdefghij', 16)
+    """
+    def __init__(self, buf=0):
+        if not isinstance(buf, bytearray):
+            buf = bytearray(max(buf, 0x8000))
+        self.buf = buf
+        self.mv = memoryview(buf)
+        self.pos = 0    # end of data in buffer
+
+    def reserve(self, n):
+        """ make room for n more bytes """
+        need = self.pos + n
+        if need > len(self.buf):
+            buf = bytearray(max(need, 2*len(self.buf)))
+            buf[:self.pos] = self.mv[:self.pos]
+            self.buf, self.mv = buf, memoryview(buf)
+
+    def write(self, data):
+        n = len(data)
+        self.reserve(n)
+        self.mv[self.pos:self.pos+n] = data
+        self.pos += n
+
+    def readinto(self, f, n):
+        """ read n bytes from file f into buffer """
+        self.reserve(n)
+        k = f.readinto(self.mv[self.pos:self.pos+n])
+        self.pos += k
+        return k
+
+    def record(self):
+        """ :returns: memoryview of collected data """
+        return self.mv[:self.pos]
+
+
+def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,into=0,
+            select=None, selhdr=32, lrecl=0, maxread=0):
     """ readrec - Generator function to read records
     with special record format specified in recform
 
@@ -88,23 +229,47 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
 
             - 'EXCL4' exclusive 4 bytes length, native byte order
 
+            - 'F' or 'FB' fixed length records of length lrecl
+                    return memoryview of record in a larger read buffer
+                    (no copy); the buffer stays valid while the record
+                    is referenced
+
         :param dumphdr: header text of record; if not empty: prints record
         :param ecodec: Ebcdic codec for character interpretation when dumping records
         :param debug: 1 - print RDW information
-        :param into:  1 - read into and return modifyable bytearray rather that bytes
-                          (only for non segemented RDW files)
+        :param into:  1 or bytearray - read all records into one buffer that is
+                      reused for every record. With into=1 the buffer is
+                      allocated by readrec(), otherwise the given bytearray
+                      is used; it is replaced by a larger one if needed.
+                      Records are returned as memoryview that is only
+                      valid until the next record is read.
+                      (RDW, BDW and EXCL4 formats incl. segmented records)
+        :param select: function or dictionary of conditions on the record
+                       header to select records (see compileselect()).
+                       Records not selected are skipped in the file
+                       without being read. Only the records selected
+                       are counted for numrec. (not for text files)
+        :param selhdr: number of header bytes passed to a select function
+        :param lrecl: record length for recform 'F' and 'FB'
+        :param maxread: maximum number of records read after skiprec
+                        including the records not selected (0 = all);
+                        numrec and maxread may be combined
+                        (not for text files)
 
     Example usage::
 
     >> for rec in readrec(f,recform='RDW',dumphdr='my_records'):
     >>    process(rec)
 
+    >> for rec in readrec(f,recform='RDW+',select={5: {30, 70}}):
+    >>    process(rec)  # SMF type 30 and 70 records only
+
     """
     V = 1        # variable records
     VB = 2       # variable blocked includes variable
     WITH_RDW = 4 # return record with RDW header
 
-    bu = None    # BytesIO object
+    bu = None    # BytesIO object or Recbuf if into
     recfm=0
     block_rlen = 0
     if recform.startswith('RDW'):
@@ -114,14 +279,19 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
     if recform.endswith('+'):
         recfm |= WITH_RDW
 
+    if select:
+        selected, hdrlen = compileselect(select, selhdr)
+    skipseg = 0     # skipping segments of a record not selected
+    if into:
+        bu = Recbuf(into)
+
     if recfm & (V|VB):
         i = 0  # counting complete/logical records
         while  i < skiprec:     # skipping records loop
             rdws = f.read(4)
             if len(rdws)<4:
                 return
-            rdw.buffer=rdws     # use rdws as underlying buffer
-            rlen = rdw.rlen
+            rlen, seg = _rdwhdr.unpack(rdws)
 
             if rlen > 0x7fff:
                 dwtype='record'
@@ -139,24 +309,23 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
                         dump(rdws[0:4],header='Block Descriptor Word')
                     continue  # need to read RDW
 
-            if rdw.rlen > 4:    # it's a record
-                record = f.seek(rdw.rlen-4, os.SEEK_CUR) # skip record
-            if rdw.seg in (SEGFIRST, SEGMIDDLE):
+            if rlen > 4:    # it's a record
+                record = f.seek(rlen-4, os.SEEK_CUR) # skip record
+            if seg in (SEGFIRST, SEGMIDDLE):
                 if debug&1: print('Skipping %s len(%04x) in logical record %d'%(
-                    segmenttype(rdw.seg), rdw.rlen, i))
+                    segmenttype(seg), rlen, i))
                 continue # only count last or unsegmented records
 
             i += 1
             if debug & 1: print('Skipping %s len(%04x) in logical record %d'%(
-                segmenttype(rdw.seg), rdw.rlen, i))
+                segmenttype(seg), rlen, i))
 
-        maxrec = skiprec + numrec
+        n = 0   # records returned
         while 1:
             rdws = f.read(4)
             if len(rdws)<4:
                 return
-            rdw.buffer=rdws # use rdws as underlying buffer
-            rlen = rdw.rlen
+            rlen, seg = _rdwhdr.unpack(rdws)
 
             if rlen > 0x7fff:
                 dwtype='record'
@@ -175,24 +344,55 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
                         dump(rdws[0:4],header='Block Descriptor Word')
                     continue  # need to read RDW
 
-            if rlen < 5:    # empty record
-                yield b''
+            if skipseg:     # remaining segments of record not selected
+                f.seek(rlen-4, os.SEEK_CUR)
+                if seg != SEGLAST:
+                    continue
+                skipseg = 0
+                i += 1
+                if maxread and i - skiprec >= maxread:
+                    return
+                continue
+
+            if select and seg in (SEGALL, SEGFIRST):
+                if recfm & WITH_RDW:
+                    hdr = rdws + _peekhdr(f, min(hdrlen-4, rlen-4))
+                else:
+                    hdr = _peekhdr(f, min(hdrlen, rlen-4))
+                if not selected(hdr):
+                    f.seek(rlen-4, os.SEEK_CUR)  # skip record or first segment
+                    if seg == SEGFIRST:
+                        skipseg = 1
+                        continue
+                    i += 1
+                    if maxread and i - skiprec >= maxread:
+                        return
+                    continue
 
             if debug&1: print('Reading %s len(%04x) in logical record %d'%(
-                segmenttype(rdw.seg), rdw.rlen, i+1))
-
-            if rdw.seg : # copy any segmented record to buffer
-                if rdw.seg == SEGFIRST: # first segment
-                    bu=BytesIO()
+                segmenttype(seg), rlen, i+1))
+
+            if seg : # copy any segmented record to buffer
+                if seg == SEGFIRST: # first segment
+                    if into:
+                        bu.pos = 0
+                    else:
+                        bu=BytesIO()
                     if recform.endswith('+'): # record to include RDW
                         bu.write(rdws)
 
-                bu.write(f.read(rlen-4))
+                if into:
+                    bu.readinto(f, rlen-4)
+                else:
+                    bu.write(f.read(rlen-4))
 
-                if rdw.seg == SEGLAST: # last segment
-                    record = bu.getvalue() # return collected segments
+                if seg == SEGLAST: # last segment
+                    if into:
+                        record = bu.record()
+                    else:
+                        record = bu.getvalue() # return collected segments
                     if dumphdr:
-                        dump( record, header='\n%s: %d, total length %04X'%(
+                        dump( bytes(record), header='\n%s: %d, total length %04X'%(
                             dumphdr,i+1,len(record)),ecodec=ecodec )
                     yield record
                 else:
@@ -205,17 +405,19 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
                     rlen -= 4
 
                 if into:
-                    record = bytearray(rlen)
-                    f.readinto(record)
+                    bu.pos = 0
+                    bu.readinto(f, rlen)
+                    record = bu.record()
                 else:
                     record = f.read(rlen)
 
                 if dumphdr:
-                    rdwx = ' (%04X,%04X)' %(rdw.rlen, rdw.seg)
-                    dump( record, header='\n%s: %d%s'%(dumphdr,i+1,rdwx),ecodec=ecodec )
+                    rdwx = ' (%04X,%04X)' % _rdwhdr.unpack(rdws)
+                    dump( bytes(record), header='\n%s: %d%s'%(dumphdr,i+1,rdwx),ecodec=ecodec )
                 yield record
             i += 1
-            if numrec and i > maxrec:
+            n += 1
+            if numrec and n >= numrec or maxread and i - skiprec >= maxread:
                 return
             # while loop
 
@@ -225,30 +427,60 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
             if len(e4s)<4:
                 return
             excl4.buffer=e4s # use rdws as underlying buffer
-            if excl4.rlen > 4:    # record
+            if excl4.rlen > 0:    # record
                 record = f.seek(excl4.rlen, os.SEEK_CUR) # skip record
         i = skiprec   # i is total record count starting from 1
-        maxrec = skiprec+numrec
+        n = 0         # records returned
         while 1:
-            i += 1
-            if numrec and i > maxrec:
+            if numrec and n >= numrec or maxread and i - skiprec >= maxread:
                 return
+            i += 1
             e4s = f.read(4)
             if len(e4s)<4:
                 return
             excl4.buffer=e4s # use rdws as underlying buffer
             rlen = excl4.rlen
+            if select and not selected(_peekhdr(f, min(hdrlen, rlen))):
+                f.seek(rlen, os.SEEK_CUR)   # skip record not selected
+                continue
+            n += 1
             if rlen < 1:    # empty record
                 yield b''
             else:
-                record = f.read(rlen)
+                if into:
+                    bu.pos = 0
+                    bu.readinto(f, rlen)
+                    record = bu.record()
+                else:
+                    record = f.read(rlen)
                 if dumphdr:
-                    dump( record, header='\n%s: %d'%(dumphdr,i),ecodec=ecodec )
+                    dump( bytes(record), header='\n%s: %d'%(dumphdr,i),ecodec=ecodec )
                 yield record
             # while loop
 
 
 
+    elif recform in ('F', 'FB'):
+        if lrecl < 1:
+            raise BaseException('recform %s requires lrecl' % recform)
+        if skiprec:
+            f.seek(skiprec*lrecl, os.SEEK_CUR)
+        i = skiprec   # i is total record count starting from 1
+        n = 0         # records returned
+        for chunk in _readfixed(f, lrecl):
+            for pos in range(0, len(chunk), lrecl):
+                i += 1
+                record = chunk[pos:pos+lrecl]
+                if not select or selected(bytes(record[:hdrlen])):
+                    if dumphdr:
+                        dump( bytes(record), header='\n%s: %d'%(dumphdr,i),ecodec=ecodec )
+                    yield record
+                    n += 1
+                    if numrec and n >= numrec:
+                        return
+                if maxread and i - skiprec >= maxread:
+                    return
+
     elif recform=='':   # textfile, read data is str
         for i in range(skiprec):
             record = f.readline()
@@ -272,6 +504,271 @@ def readrec(f,recform='',dumphdr='',numrec=0,skiprec=0, ecodec='cp037',debug=0,i
     else:
         raise BaseException('Invalid recform %r specified' % recform)
 
+class Checkpoint(object):
+    """ Checkpoint - persistent read position for followrec()
+
+    The position is kept as byte offset of the next logical record,
+    the number of logical records processed so far and for BDW files
+    the remaining length of the current block.
+    It is saved as JSON to the checkpoint file: a temporary file is
+    written and synced to disk and then renamed so that an existing
+    checkpoint is never left half written.
+
+        :param path: name of checkpoint file; it is loaded if it exists
+
+    >>> import tempfile
+    >>> path = os.path.join(tempfile.mkdtemp(), 'test.ckp')
+    >>> Checkpoint(path).save(offset=4711, recno=12)
+    >>> c = Checkpoint(path)
+    >>> c.offset, c.recno, c.blkrest
+    (4711, 12, 0)
+    """
+    def __init__(self, path):
+        self.path = path
+        self.offset = 0     # byte offset of next record
+        self.recno = 0      # logical records processed
+        self.blkrest = 0    # remaining length of current block (BDW)
+        self.load()
+
+    def load(self):
+        if os.path.exists(self.path):
+            with open(self.path) as cf:
+                ckd = json.load(cf)
+            self.offset = ckd['offset']
+            self.recno = ckd['recno']
+            self.blkrest = ckd.get('blkrest', 0)
+
+    def save(self, offset, recno, blkrest=0):
+        self.offset, self.recno, self.blkrest = offset, recno, blkrest
+        tmp = self.path + '.tmp'
+        with open(tmp, 'w') as cf:
+            json.dump({'offset': offset, 'recno': recno, 'blkrest': blkrest}, cf)
+            cf.flush()
+            os.fsync(cf.fileno())
+        if sys.hexversion >= 0x03030000:
+            os.replace(tmp, self.path)
+        else:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            os.rename(tmp, self.path)
+
+
+def _nextrec(f, recform, blkrest):
+    """ Read next complete logical record for followrec()
+
+    :returns: tuple (record, blkrest) where record is None if the
+        file does not (yet) contain the whole record
+    """
+    if recform == 'EXCL4':
+        e4s = f.read(4)
+        if len(e4s) < 4:
+            return None, blkrest
+        excl4.buffer = e4s
+        rlen = excl4.rlen
+        record = f.read(rlen) if rlen > 0 else b''
+        if len(record) < rlen:
+            return None, blkrest
+        return record, blkrest
+
+    bu = None
+    while 1:
+        rdws = f.read(4)
+        if len(rdws) < 4:
+            return None, blkrest
+        rlen, seg = _rdwhdr.unpack(rdws)
+
+        if rlen > 0x7fff:
+            dwtype = 'record'
+            if recform.startswith('BDW') and blkrest <= 4:
+                dwtype = 'block'
+            raise BaseException('Invalid %s length %s exceeds 32k-1 at offset %d' %
+                     (dwtype, rlen, f.tell()-4))
+
+        if recform.startswith('BDW'):
+            if blkrest > 4:     # still records in block
+                blkrest -= rlen
+            else:               # consume Block Descriptor Word
+                blkrest = rlen
+                continue
+
+        data = f.read(rlen-4) if rlen > 4 else b''
+        if len(data) < rlen-4:
+            return None, blkrest
+
+        if seg == SEGALL:
+            if recform.endswith('+'):   # record to include RDW
+                data = rdws + data
+            return data, blkrest
+        elif seg == SEGFIRST:
+            bu = BytesIO()
+            if recform.endswith('+'):
+                bu.write(rdws)
+            bu.write(data)
+        elif bu is None:
+            raise BaseException('%s without first segment at offset %d' % (
+                segmenttype(seg), f.tell()-rlen))
+        else:
+            bu.write(data)
+            if seg == SEGLAST:
+                return bu.getvalue(), blkrest
+
+
+def followrec(f, recform='RDW', checkpoint=None, numrec=0, poll=0.5,
+              maxpoll=10., idle=None, ckpevery=1000, debug=0):
+    """ followrec - Generator function to read records from a file
+    that is still being written to (like tail -f)
+
+    Only complete logical records are returned. At the end of the file
+    the reader goes back to the start of an incomplete record and polls
+    the file for more data with increasing wait times.
+
+        :param f: filehandle of file opened in binary mode
+        :param recform: record format 'RDW', 'RDW+', 'BDW', 'BDW+'
+            or 'EXCL4' (see readrec())
+        :param checkpoint: Checkpoint instance or name of checkpoint file.
+            Reading resumes at the checkpoint position. The position is
+            saved every ckpevery records, when waiting for more data and
+            when the generator ends or is closed
+        :param numrec: maximum number of records to return (0 = no limit)
+        :param poll: wait time in seconds after reaching the end of file;
+            it is doubled on each unsuccessful poll up to maxpoll
+        :param maxpoll: maximum wait time between polls
+        :param idle: stop after idle seconds without a new record
+            (default None: follow forever)
+        :param ckpevery: save checkpoint every ckpevery records
+        :param debug: 1 - print checkpoint and poll information
+
+    A record counts as processed when the next record is requested.
+    After a restart the record that was in process when the job
+    stopped is therefore returned again.
+
+    Example usage::
+
+    >> with open('smf.dump', 'rb') as f:
+    >>    for rec in followrec(f, recform='RDW+', checkpoint='smf.ckp', idle=600):
+    >>        process(rec)
+
+    """
+    if recform not in ('RDW', 'RDW+', 'BDW', 'BDW+', 'EXCL4'):
+        raise BaseException('Invalid recform %r specified for followrec' % recform)
+
+    if checkpoint is not None and not isinstance(checkpoint, Checkpoint):
+        checkpoint = Checkpoint(checkpoint)
+
+    if checkpoint:
+        pos, i, blkrest = checkpoint.offset, checkpoint.recno, checkpoint.blkrest
+    else:
+        pos, i, blkrest = f.tell(), 0, 0
+    saved = i       # record number at last checkpoint
+    n = 0           # records returned
+    wait = poll
+    waited = 0.
+
+    f.seek(pos)
+    try:
+        while 1:
+            record, nextblk = _nextrec(f, recform, blkrest)
+            if record is None:
+                f.seek(pos)     # back to start of incomplete record
+                if checkpoint and saved != i:
+                    checkpoint.save(pos, i, blkrest)
+                    saved = i
+                if idle is not None and waited >= idle:
+                    return
+                if debug & 1:
+                    print('Waiting %.1f seconds for record %d at offset %d' % (
+                        wait, i+1, pos))
+                time.sleep(wait)
+                waited += wait
+                wait = min(wait*2, maxpoll)
+                continue
+
+            wait = poll
+            waited = 0.
+            n += 1
+            yield record
+
+            pos, blkrest = f.tell(), nextblk    # record is processed
+            i += 1
+            if checkpoint and i - saved >= ckpevery:
+                checkpoint.save(pos, i, blkrest)
+                saved = i
+            if numrec and n >= numrec:
+                return
+    finally:
+        if checkpoint and saved != i:
+            checkpoint.save(pos, i, blkrest)
+            if debug & 1:
+                print('Checkpoint saved at offset %d after record %d' % (pos, i))
+
+
+FIXEDCHUNK = 2**20  # size of read buffer for fixed length records
+
+
+def _readfixed(f, lrecl, chunksize=FIXEDCHUNK):
+    """ Generator returning memoryviews of whole fixed length records
+        read in chunks of about chunksize
+    """
+    n = max(1, chunksize // lrecl) * lrecl
+    rest = b''
+    while 1:
+        data = f.read(n)
+        if not data:
+            if rest:
+                raise BaseException('Incomplete last record of %d bytes, LRECL %d' % (
+                    len(rest), lrecl))
+            return
+        if rest:
+            data = rest + data
+        k = len(data) - len(data) % lrecl
+        rest = data[k:]
+        if k:
+            yield memoryview(data)[:k]
+
+
+def unpackfixed(f, dmap, lrecl=0, numrec=0, skiprec=0):
+    """ unpackfixed - Generator function to read fixed length records
+    and return the field values of a numeric Datamap as tuples
+
+    All records are unpacked with one struct.iter_unpack() call per
+    read buffer. This is much faster than using the datamap attributes
+    for every record.
+
+        :param f: filehandle of open file
+        :param dmap: Datamap with numeric fields only (see Datamap.structformat())
+        :param lrecl: record length, default is the datamap length
+        :param numrec: maximum number of records to return (0 = all)
+        :param skiprec: number of records to skip
+
+    :returns: tuple of values in order of the field positions
+        (Filler fields not included)
+
+    Example usage::
+
+    >> for foo, bar in unpackfixed(f, Datamap('rec', Int4('foo'), Double('bar'))):
+    >>    total += foo * bar
+
+    """
+    fmt = dmap.structformat(lrecl)
+    lrecl = struct.calcsize(fmt)
+    if skiprec:
+        f.seek(skiprec*lrecl, os.SEEK_CUR)
+    if numrec:
+        n = 0
+        for chunk in _readfixed(f, lrecl):
+            if n + len(chunk)//lrecl >= numrec:
+                for values in struct.iter_unpack(fmt, chunk[:(numrec-n)*lrecl]):
+                    yield values
+                return
+            n += len(chunk)//lrecl
+            for values in struct.iter_unpack(fmt, chunk):
+                yield values
+    else:
+        for chunk in _readfixed(f, lrecl):
+            for values in struct.iter_unpack(fmt, chunk):
+                yield values
+
+
 def writerec(f, record, isn=None, recform=''):
     """ writerec - function to write records with special record format
 
@@ -304,6 +801,17 @@ def writerec(f, record, isn=None, recform=''):
         raise BaseException('Invalid recform %r specified' % recform)
 
 
+_asyncnames = ('aread_records', 'awriterec', 'awrite_records', 'pipe_reader',
+               'putrec')
+
+def __getattr__(name):
+    # PY3.7: load asyncio functions from arecordio on first access
+    if name in _asyncnames:
+        from adapya.base import arecordio
+        return getattr(arecordio, name)
+    raise AttributeError("module %r has no attribute %r" % (__name__, name))
+
+
 if __name__ == "__main__":
     import sys
     # import doctest
@@ -0,0 +1,96 @@
+""" Generate a file with synthetic SMF records for tests and benchmarks
+
+    Usage: smfgenz [options]
+
+    options:
+        -f  --file     <file> SMF file to write
+        -b  --bfile    <file> SMF file to write VB blocked with BDW
+        -n, --numrec   <int>  number of records (default 100000)
+        -s, --seed     <int>  seed of the random generator (default 0)
+        -r, --rate     <int>  records per second of record time (default 1000)
+        -v, --verbose  level of printed information (default 1)
+        -?, --help
+
+    The same seed generates the same file. The default mix is
+    SMF30 subtype 4 and 5, SMF70 and SMF72 records (see smfgenz).
+
+    Example:
+
+        smfgenz -f smf.dump -n 10000000 -s 1
+        smfreaderz -f smf.dump -v 1
+
+"""
+from __future__ import print_function          # PY3
+import sys
+import getopt
+import time
+from adapya.base.smfgenz import SmfGenerator
+
+def usage():
+    print(__doc__)
+
+
+def main():
+    fname = ''
+    recform = 'RDW+'
+    numrec = 100000
+    seed = 0
+    rate = 1000
+    verbose = 1
+
+    try:
+      opts, args = getopt.getopt(sys.argv[1:],
+        '?b:f:n:r:s:v:',
+        ['help','bfile=','file=','numrec=','rate=','seed=','verbose='])
+    except getopt.GetoptError:
+      print( sys.argv[1:])
+      usage()
+      sys.exit(2)
+    for opt, arg in opts:
+      if opt in ('-?', '--help'):
+        usage()
+        sys.exit()
+      elif opt in ('-f', '--file'):
+        fname = arg
+      elif opt in ('-b', '--bfile'):
+        fname = arg
+        recform = 'BDW+'
+      elif opt in ('-n', '--numrec'):
+        numrec = int(arg)
+      elif opt in ('-r', '--rate'):
+        rate = int(arg)
+      elif opt in ('-s', '--seed'):
+        seed = int(arg)
+      elif opt in ('-v', '--verbose'):
+        verbose = int(arg)
+
+    if not fname:
+        usage()
+        sys.exit(2)
+
+    t = time.time()
+    with open(fname, 'wb') as f:
+        size = SmfGenerator(seed=seed, rate=rate).write(f, numrec, recform=recform)
+    t = time.time() - t
+    if verbose:
+        print('%d SMF records with %s written to %s: %.1f MB in %.2f s' % (
+            numrec, recform, fname, size/2.**20, t))
+
+
+if __name__ == '__main__':
+    main()
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
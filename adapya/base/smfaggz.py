@@ -0,0 +1,268 @@
+"""
+smfaggz - streaming group-by aggregation of SMF records
+=======================================================
+
+The module smfaggz aggregates SMF30 accounting data per group while
+the records are read, e.g. for chargeback of CPU time per job,
+user, RACF group and day. Only one accumulator per group and measure
+is kept, so memory depends on the number of groups and not on the
+number of records.
+
+Keys and measure values are given by name:
+
+    - header fields: rty, sty, sid, ssi, date (yyyy-mm-dd from dte)
+    - SMF30 id section: jbn, pgm, stm, uif, jnm, cls, usr, grp, rud
+    - I/O activity: tep (EXCP count)
+    - CPU accounting: cpt (TCB), cps (SRB), toz (zIIP time), zoc (zIIP
+      time on CP), icu, isb, enc, det
+    - performance: snf (zIIP normalization factor)
+    - derived: cpu (cpt+cps), ziip (toz normalized with snf)
+
+Partial aggregates of several files, chunks or processes can be
+combined with merge(), e.g. by SmfFiles. They are picklable as long
+as keys and measures are given by name.
+
+Example usage::
+
+    >> agg = Aggregate(keys=('date', 'grp', 'jbn'),
+    >>     measures=(('records', 'count', None), ('cpu', 'sum', 'cpu'),
+    >>               ('ziip', 'sum', 'ziip'), ('excp', 'sum', 'tep'),
+    >>               ('maxcpu', 'max', 'cpt')))
+    >> SmfReader('smf.dump', rtys=(30,), subtypes=(4,), sinks=[agg]).run()
+    >> agg.printrows()
+
+"""
+from __future__ import print_function          # PY3
+
+from adapya.base.smfrecordz import SmfSink, Smf30id, Smf30ura, Smf30cas, \
+    Smf30prf, i2dt
+
+# field name: section Datamap class (None for header fields)
+FIELDS = {
+    'rty': None, 'sty': None, 'sid': None, 'ssi': None, 'date': None,
+    'tep': Smf30ura, 'snf': Smf30prf,
+    }
+for _k in ('jbn', 'pgm', 'stm', 'uif', 'jnm', 'cls', 'usr', 'grp', 'rud'):
+    FIELDS[_k] = Smf30id
+for _k in ('cpt', 'cps', 'toz', 'zoc', 'icu', 'isb', 'enc', 'det'):
+    FIELDS[_k] = Smf30cas
+
+def _ziip(toz, snf):
+    " zIIP time normalized to the speed of a general CP "
+    if toz is None:
+        return None
+    return toz * (snf or 256) // 256
+
+def _cpu(cpt, cps):
+    " CPU time under TCB and SRB "
+    if cpt is None:
+        return None
+    return cpt + cps
+
+# derived value name: (field names, function of the field values)
+DERIVED = {
+    'cpu': (('cpt', 'cps'), _cpu),
+    'ziip': (('toz', 'snf'), _ziip),
+    }
+
+def _date(rec):
+    return i2dt(rec.dte, 0).strftime('%Y-%m-%d')
+
+_header = {
+    'rty': lambda rec: rec.rty,
+    'sty': lambda rec: rec.sty,
+    'sid': lambda rec: rec.sid,
+    'ssi': lambda rec: rec.ssi,
+    'date': _date,
+    }
+
+# measure operation: (initial value, function to add a value, combine two partials)
+OPS = {
+    'count': (0, None, lambda a, b: a + b),
+    'sum': (0, lambda a, v: a + v, lambda a, b: a + b),
+    'min': (None, lambda a, v: v if a is None or v < a else a,
+            lambda a, b: b if a is None or (b is not None and b < a) else a),
+    'max': (None, lambda a, v: v if a is None or v > a else a,
+            lambda a, b: b if a is None or (b is not None and b > a) else a),
+    }
+
+
+class Aggregate(SmfSink):
+    """ Aggregate - streaming group-by aggregation of SMF records
+
+        :param keys: list of key field names (see FIELDS) or functions
+            of SmfRecord returning a key value
+        :param measures: list of (name, operation, value) with operation
+            'count', 'sum', 'min' or 'max' and value a field name,
+            derived value name (see DERIVED) or a function of SmfRecord;
+            value is ignored for 'count'
+
+    Records with missing sections or values are counted but do not
+    contribute to sum, min or max of that value.
+
+    An Aggregate can be used as sink of SmfReader.
+
+    >>> a = Aggregate(keys=('jbn',), measures=(('n', 'count', None),
+    ...                                        ('cpu', 'max', 'cpt')))
+    >>> a.groups = {('JOB1',): [2, 10]}
+    >>> b = Aggregate(keys=('jbn',), measures=(('n', 'count', None),
+    ...                                        ('cpu', 'max', 'cpt')))
+    >>> b.groups = {('JOB1',): [1, 30], ('JOB2',): [1, 5]}
+    >>> a.merge(b).rows()
+    [(('JOB1',), [3, 30]), (('JOB2',), [1, 5])]
+    """
+    def __init__(self, keys, measures):
+        self.keys = tuple(keys)
+        self.measures = tuple(tuple(m) for m in measures)
+        for name, op, value in self.measures:
+            if op not in OPS:
+                raise BaseException('Invalid operation %r for measure %s' % (op, name))
+        self.groups = {}        # key tuple: list of accumulated values
+        self.count = 0          # records added
+        self._extract = None    # compiled extraction function
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        state.pop('_adders', None)  # functions are not picklable
+        state.pop('_inits', None)
+        state['_extract'] = None    # compiled again on first put()
+        return state
+
+    def _compile(self):
+        """ build function that extracts key and measure values
+            from an SmfRecord with one compiled getter per section
+        """
+        names = []      # field names needed
+        for k in self.keys:
+            if not callable(k):
+                names.append(k)
+        for name, op, value in self.measures:
+            if op == 'count' or callable(value):
+                continue
+            names.extend(DERIVED[value][0] if value in DERIVED else (value,))
+
+        sections = {}   # section class: list of field names
+        header = []
+        for n in names:
+            if n not in FIELDS:
+                raise BaseException('Unknown field %r for aggregation' % n)
+            sclass = FIELDS[n]
+            if sclass is None:
+                if n not in header:
+                    header.append(n)
+            elif n not in sections.setdefault(sclass, []):
+                sections[sclass].append(n)
+        sections = [(sclass, tuple(keys)) for sclass, keys in sections.items()]
+
+        def fieldvalue(name):
+            if callable(name):
+                return name
+            if name in DERIVED:
+                fnames, fun = DERIVED[name]
+                return lambda vals: fun(*[vals[n] for n in fnames])
+            return lambda vals: vals[name]
+
+        keyfuns = [(callable(k), fieldvalue(k)) for k in self.keys]
+        measfuns = []
+        for name, op, value in self.measures:
+            init, add, combine = OPS[op]
+            measfuns.append((add, None if op == 'count' else
+                             (callable(value), fieldvalue(value))))
+        inits = [OPS[op][0] for name, op, value in self.measures]
+
+        def extract(rec):
+            vals = {}
+            for n in header:
+                vals[n] = _header[n](rec)
+            for sclass, fkeys in sections:
+                svals = rec.values(sclass, *fkeys)
+                if svals is None:
+                    svals = (None,) * len(fkeys)
+                for n, v in zip(fkeys, svals):
+                    vals[n] = v
+            key = tuple(fun(rec) if isrec else fun(vals)
+                        for isrec, fun in keyfuns)
+            mvals = [None if vfun is None else
+                     (vfun[1](rec) if vfun[0] else vfun[1](vals))
+                     for add, vfun in measfuns]
+            return key, mvals
+
+        self._adders = [add for add, vfun in measfuns]
+        self._inits = inits
+        self._extract = extract
+
+    def put(self, rec):
+        """ add SmfRecord rec to its group """
+        if self._extract is None:
+            self._compile()
+        key, mvals = self._extract(rec)
+        acc = self.groups.get(key)
+        if acc is None:
+            acc = self.groups[key] = list(self._inits)
+        for i, (add, v) in enumerate(zip(self._adders, mvals)):
+            if add is None:
+                acc[i] += 1     # count
+            elif v is not None:
+                acc[i] = add(acc[i], v)
+        self.count += 1
+
+    def merge(self, other):
+        """ combine partial aggregate other into this aggregate
+
+            :returns: self
+        """
+        if other.keys != self.keys or other.measures != self.measures:
+            raise BaseException('Cannot merge aggregates with different keys or measures')
+        combines = [OPS[op][2] for name, op, value in self.measures]
+        for key, oacc in other.groups.items():
+            acc = self.groups.get(key)
+            if acc is None:
+                self.groups[key] = list(oacc)
+            else:
+                for i, combine in enumerate(combines):
+                    acc[i] = combine(acc[i], oacc[i])
+        self.count += other.count
+        return self
+
+    def partial(self):
+        """ :returns: self as picklable partial aggregate for merge() """
+        return self
+
+    def rows(self):
+        """ :returns: sorted list of (key tuple, list of measure values);
+            keys with missing values (None) are sorted last
+        """
+        return sorted(((k, list(v)) for k, v in self.groups.items()),
+                      key=lambda kv: tuple((v is None, v) for v in kv[0]))
+
+    def printrows(self):
+        """ print aggregated values as table """
+        cols = [k if not callable(k) else getattr(k, '__name__', 'key')
+                for k in self.keys] + [m[0] for m in self.measures]
+        rows = [[str(c) for c in k] + [str(v) for v in vals]
+                for k, vals in self.rows()]
+        widths = [max([len(c)] + [len(r[i]) for r in rows])
+                  for i, c in enumerate(cols)]
+        nk = len(self.keys)
+        def line(r):
+            return ' '.join(c.ljust(w) if i < nk else c.rjust(w)
+                            for i, (c, w) in enumerate(zip(r, widths)))
+        print(line(cols))
+        print(' '.join('-'*w for w in widths))
+        for r in rows:
+            print(line(r))
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
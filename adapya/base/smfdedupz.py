@@ -0,0 +1,187 @@
+"""
+smfdedupz - drop duplicate SMF records of overlapping dumps
+===========================================================
+
+The module smfdedupz detects SMF records that are read more than once,
+e.g. when an SMF dataset was dumped twice or logstream dump windows
+overlap, so that totals are not counted twice.
+
+Each record is fingerprinted by a hash of the record bytes without RDW,
+which include the header fields sid, dte, tme, rty and sty. The record
+buffer is hashed through a memoryview without copying.
+
+The fingerprints are kept per time partition of the record creation
+time (e.g. one hour). Only the most recent partitions are kept so that
+memory is bounded while the records are roughly ordered by time.
+Records older than the partitions kept cannot be checked; they are
+passed and counted as expired.
+
+A partition is either a set of 64 bit fingerprints or, with a given
+capacity, a Bloom filter of fixed size with a small rate of false
+positives, i.e. unique records that are taken as duplicates.
+
+Example usage::
+
+    >> dedup = Dedup(partition=3600, keep=24)
+    >> SmfFiles(['/smf/sysa.*.dump'], rtys=(30,), where=dedup, sinks=[agg]).run()
+    >> dedup.report()
+
+"""
+from __future__ import print_function          # PY3
+
+import hashlib
+import math
+import struct
+
+from adapya.base.smfrecordz import timekey
+
+_blake2b = getattr(hashlib, 'blake2b', None)
+_hash2 = struct.Struct('!QQ')
+
+
+def fingerprint(buffer):
+    """ :returns: tuple of two 64 bit integers hashed from the
+        record bytes without RDW
+
+    >>> fingerprint(b'RDW_record') == fingerprint(b'\\x00\\x0e\\x00\\x00record')
+    True
+    """
+    mv = memoryview(buffer)[4:]
+    if _blake2b:
+        return _hash2.unpack(_blake2b(mv, digest_size=16).digest())
+    return _hash2.unpack(hashlib.md5(mv).digest())
+
+
+class BloomFilter(object):
+    """ BloomFilter - fixed size set of fingerprints with false positives
+
+        :param capacity: number of fingerprints to be added
+        :param fprate: rate of false positives at capacity
+
+    The bit positions are derived from the two 64 bit halves of
+    a fingerprint by double hashing.
+
+    >>> bf = BloomFilter(1000, 0.01)
+    >>> bf.nbits, bf.nhash
+    (9586, 7)
+    >>> bf.add((1, 2)), bf.add((1, 2)), bf.add((3, 4))
+    (False, True, False)
+    """
+    def __init__(self, capacity, fprate=0.001):
+        self.nbits = int(math.ceil(-capacity * math.log(fprate) / math.log(2)**2))
+        self.nhash = max(1, int(round(self.nbits / float(capacity) * math.log(2))))
+        self.bits = bytearray((self.nbits + 7) // 8)
+        self.count = 0
+
+    def add(self, fp):
+        """ add fingerprint fp
+
+            :returns: True if fp was (probably) added before
+        """
+        h1, h2 = fp
+        bits = self.bits
+        nbits = self.nbits
+        present = True
+        for i in range(self.nhash):
+            pos = (h1 + i * h2) % nbits
+            mask = 1 << (pos & 7)
+            if not bits[pos >> 3] & mask:
+                present = False
+                bits[pos >> 3] |= mask
+        if not present:
+            self.count += 1
+        return present
+
+    def __len__(self):
+        return self.count
+
+
+class _FpSet(set):
+    """ set of the first 64 bits of the fingerprints """
+    def add(self, fp):
+        n = len(self)
+        set.add(self, fp[0])
+        return len(self) == n
+
+
+class Dedup(object):
+    """ Dedup - select function for SmfReader that drops duplicate records
+
+        :param partition: seconds of record creation time per partition
+        :param keep: number of most recent partitions kept
+        :param capacity: records per partition for a Bloom filter;
+            0 keeps the fingerprints of a partition in a set
+        :param fprate: rate of false positives of the Bloom filter
+
+    Dedup is called with an SmfRecord and returns False for a
+    duplicate. Counts are in records, duplicates, expired and evicted
+    (partitions). With SmfFiles the files must be read in one process
+    (workers=0) to find duplicates across files.
+
+    Memory is bounded by keep partitions of about 60 bytes per record
+    with sets or of capacity * 1.44 * log2(1/fprate) bits with Bloom
+    filters (e.g. 1.8 MB for 1 million records and fprate 0.001).
+    """
+    def __init__(self, partition=3600, keep=24, capacity=0, fprate=0.001):
+        self.partition = partition * 100    # timekey unit is 1/100 s
+        self.keep = keep
+        self.capacity = capacity
+        self.fprate = fprate
+
+        self.parts = {}         # partition number: _FpSet or BloomFilter
+        self.horizon = None     # newest partition evicted
+        self.records = 0        # records checked
+        self.duplicates = 0     # records dropped
+        self.expired = 0        # records older than partitions kept
+        self.evicted = 0        # partitions evicted
+
+    def __call__(self, rec):
+        self.records += 1
+        key = timekey(rec._dte, rec.tme)
+        part = -1 if key is None else key // self.partition
+        store = self.parts.get(part)
+        if store is None:
+            if self.horizon is not None and part <= self.horizon:
+                self.expired += 1
+                return True
+            store = self.parts[part] = BloomFilter(self.capacity, self.fprate) \
+                if self.capacity else _FpSet()
+            if len(self.parts) > self.keep:
+                self._evict()
+        if store.add(fingerprint(rec.buffer)):
+            self.duplicates += 1
+            return False
+        return True
+
+    def _evict(self):
+        for part in sorted(self.parts)[:len(self.parts) - self.keep]:
+            del self.parts[part]
+            self.evicted += 1
+            if self.horizon is None or part > self.horizon:
+                self.horizon = part
+
+    def report(self):
+        """ print counts of records checked and dropped """
+        print('\nDuplicate SMF records: %d of %d records dropped' % (
+            self.duplicates, self.records))
+        if self.expired:
+            print('    %d records older than the %d partitions kept not checked' % (
+                self.expired, self.keep))
+        if self.capacity:
+            print('    Bloom filters with false positive rate %g at %d records per partition' % (
+                self.fprate, self.capacity))
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
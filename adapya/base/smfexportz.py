@@ -0,0 +1,255 @@
+"""
+smfexportz - export SMF sections to CSV or JSON Lines files
+===========================================================
+
+The module smfexportz writes one flat file per section type, e.g.
+for loading SMF data into a data warehouse. Each occurrence of a
+section in a record is written as one row with the record key columns
+
+    - file: name of the SMF file (empty for an open file object)
+    - recno: record number in the SMF file
+    - sid: system identifier
+    - dte: record creation date 0cyyddd
+    - tme: record creation time in 1/100 seconds since midnight
+    - jnm: JES job id (SMF30 id section, empty for other records)
+
+followed by the section fields.
+
+The section fields are decoded with one compiled getter per section
+(see Datamap.getter()). Rows are collected in batches and written
+with one call per batch so that memory is bounded by the batch size.
+The output files can be gzip compressed and are rotated when they
+reach a maximum size.
+
+SectionExport can be a sink of SmfFiles: each SMF file is exported
+to its own output files which are listed in files after the run.
+
+Example usage::
+
+    >> exp = SectionExport('/data/smf', sections=(Smf30id, Smf30cas),
+    >>     fmt='csv', compress=1, maxsize=2**30)
+    >> SmfReader('smf.dump', rtys=(30,), sinks=[exp]).run()
+    >> print(exp.files)
+    ['/data/smf/smf30id.000.csv.gz', '/data/smf/smf30cas.000.csv.gz']
+
+"""
+from __future__ import print_function          # PY3
+
+import csv
+import gzip
+import json
+import os
+from binascii import hexlify
+from datetime import datetime
+from io import StringIO
+
+from adapya.base.datamap import T_BYTE, T_DMAP, T_DT, T_NONE, T_STCK
+from adapya.base.smfrecordz import SmfSink, Smf30id
+
+KEYCOLS = ('file', 'recno', 'sid', 'dte', 'tme', 'jnm')
+
+
+def sectionfields(sclass):
+    """ :returns: list of the field names of section Datamap class
+        sclass without filler fields (opt=T_NONE)
+    """
+    dm = sclass()
+    keydict = dm.__dict__['keydict']
+    return [k for k in dm.__dict__['keylist']
+            if not keydict[k][3] & T_NONE and keydict[k][0] != T_DMAP]
+
+
+def _convix(sclass, fields):
+    """ :returns: indexes of the fields with values that must be
+        converted for CSV or JSON: bytes and datetime values
+    """
+    keydict = sclass().__dict__['keydict']
+    return tuple(i for i, k in enumerate(fields)
+                 if keydict[k][0] == T_BYTE or keydict[k][3] & (T_STCK|T_DT))
+
+
+def _column(value):
+    """ convert field value to a CSV or JSON value """
+    if isinstance(value, (bytes, bytearray, memoryview)):
+        return hexlify(bytes(value)).decode('ascii')
+    if isinstance(value, datetime):
+        return str(value)
+    return value
+
+
+class _Output(object):
+    """ output files of one section type with rotation by size """
+    def __init__(self, export, name, columns):
+        self.export = export
+        self.name = name
+        self.columns = columns
+        self.rows = []      # rows of current batch
+        self.f = None
+        self.seq = 0        # sequence number of output file
+        self.written = 0    # bytes written to current file
+
+    def _open(self):
+        exp = self.export
+        fileno = '' if exp.fileno is None else 'f%03d.' % exp.fileno
+        path = os.path.join(exp.outdir, '%s%s.%s%03d.%s%s' % (
+            exp.prefix, self.name, fileno, self.seq, exp.fmt,
+            '.gz' if exp.compress else ''))
+        self.seq += 1
+        if exp.compress:
+            self.f = gzip.open(path, 'wb', compresslevel=exp.compress)
+        else:
+            self.f = open(path, 'wb', exp.bufsize)
+        self.written = 0
+        exp.files.append(path)
+        if exp.fmt == 'csv':
+            self._write([self.columns])
+
+    def _write(self, rows):
+        if self.export.fmt == 'csv':
+            out = StringIO()
+            csv.writer(out, lineterminator='\n').writerows(rows)
+            data = out.getvalue()
+        else:
+            cols = self.columns
+            data = ''.join(json.dumps(dict(zip(cols, row))) + '\n' for row in rows)
+        data = data.encode('utf-8')
+        self.f.write(data)
+        self.written += len(data)
+
+    def flush(self):
+        if not self.rows:
+            return
+        if self.f is None:
+            self._open()
+        self._write(self.rows)
+        self.rows = []
+        if self.export.maxsize and self.written >= self.export.maxsize:
+            self.close()
+
+    def close(self):
+        if self.f is not None:
+            self.f.close()
+            self.f = None
+
+
+class SectionExport(SmfSink):
+    """ SectionExport - SmfReader sink writing one file per section type
+
+        :param outdir: output directory
+        :param sections: list of section Datamap classes or of
+            (section Datamap class, list of field names) to export;
+            default all fields without fillers
+        :param fmt: 'csv' or 'jsonl' (JSON Lines)
+        :param compress: gzip compression level 1-9, 0 for no compression
+        :param maxsize: maximum number of bytes (uncompressed) per file;
+            a new file is started after the batch that exceeds maxsize
+            (0 = no rotation)
+        :param batch: number of rows written with one write call
+        :param prefix: prefix of the output file names
+        :param bufsize: buffer size of uncompressed output files
+
+    Output files are named <prefix><section>.[f<iii>.]<nnn>.<fmt>[.gz]
+    with section the lower case class name, iii the index of the SMF
+    file when read by SmfFiles and nnn the rotation sequence.
+    The names of all files written are in files.
+    Field values of type bytes are written as hex string.
+    Sections shorter than their Datamap are not exported.
+    """
+    def __init__(self, outdir, sections, fmt='csv', compress=0, maxsize=0,
+                 batch=1000, prefix='', bufsize=2**20):
+        if fmt not in ('csv', 'jsonl'):
+            raise BaseException('Invalid export format %r' % fmt)
+        self.outdir = outdir
+        self.fmt = fmt
+        self.compress = compress
+        self.maxsize = maxsize
+        self.batch = batch
+        self.prefix = prefix
+        self.bufsize = bufsize
+        self.files = []     # names of files written
+        self.rows = 0       # rows exported
+        self.fileno = None  # index of the SMF file read by SmfFiles
+        self._reader = None # SmfReader of the current file
+        self._fname = ''    # value of key column file
+
+        self._plans = {}    # SmfRecord class: (triplet indexes, entries)
+        self.sections = []  # (section class, field names, convert indexes, output)
+        for s in sections:
+            sclass, fields = s if isinstance(s, (tuple, list)) else (s, None)
+            fields = tuple(f for f in fields or sectionfields(sclass)
+                           if f not in KEYCOLS)   # e.g. jnm of Smf30id
+            out = _Output(self, sclass.__name__.lower(), KEYCOLS + fields)
+            self.sections.append((sclass, fields, _convix(sclass, fields), out))
+
+    def _plan(self, rec):
+        """ :returns: triplet indexes of the exported sections of the
+            record class and the export entry per triplet index
+        """
+        plan = self._plans.get(type(rec))
+        if plan is None:
+            entries = {}
+            for sclass, fields, convix, out in self.sections:
+                get = rec.reader.getter(sclass, fields)
+                dmlen = rec.reader.datamap(sclass).dmlen
+                for ix, (tclass, toff) in enumerate(rec.secttab):
+                    if tclass is sclass:
+                        entries[ix] = (get, dmlen, convix, out)
+            plan = self._plans[type(rec)] = (sorted(entries), entries)
+        return plan
+
+    def put(self, rec):
+        if rec.reader is not self._reader:
+            reader = self._reader = rec.reader
+            self.fileno = reader.fileno
+            fname = getattr(reader.fname, 'name', reader.fname)
+            self._fname = fname if isinstance(fname, str) else ''
+        ixs, entries = self._plan(rec)
+        if not ixs:
+            return
+        jnm = rec.values(Smf30id, 'jnm')
+        key = (self._fname, rec.recno, rec.sid, rec.dte, rec.tme,
+               jnm[0] if jnm else '')
+        for ix, buf, off, ln in rec.triplets().walk(rec.buffer, ixs):
+            get, dmlen, convix, out = entries[ix]
+            if ln < dmlen:  # section shorter than defined
+                continue
+            vals = get(buf, off)
+            if convix:
+                vals = list(vals)
+                for i in convix:
+                    vals[i] = _column(vals[i])
+                vals = tuple(vals)
+            out.rows.append(key + vals)
+            self.rows += 1
+            if len(out.rows) >= self.batch:
+                out.flush()
+
+    def close(self, reader=None):
+        """ write remaining rows and close the output files """
+        for sclass, fields, convix, out in self.sections:
+            out.flush()
+            out.close()
+
+    def partial(self):
+        """ :returns: names of files written and number of rows """
+        return self.files, self.rows
+
+    def merge(self, partial):
+        files, rows = partial
+        self.files.extend(files)
+        self.rows += rows
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
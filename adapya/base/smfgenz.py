@@ -0,0 +1,256 @@
+"""
+smfgenz - generate synthetic SMF records
+========================================
+
+The module smfgenz builds valid SMF records for tests and benchmarks
+without real mainframe data:
+
+    - records of registered SmfRecord classes (e.g. SMF30) are built
+      from the record and section Datamap definitions with the
+      triplets pointing to one section of each type
+    - records of other types have an SMF header and a payload of
+      random length
+    - the records are written with RDW or BDW framing; records longer
+      than the maximum segment length are spanned in segments
+
+Field values are set from distributions per field name. Output is
+deterministic for a given seed.
+
+For speed a number of variants per record type is built once with
+the Datamaps. Each generated record is a copy of a randomly chosen
+variant with record creation date and time set in the header.
+
+Example usage::
+
+    >> gen = SmfGenerator(seed=1, mix={(30, 4): 3, (30, 5): 1, (70, 1): 2},
+    >>     values={'jbn': ['PAYROLL', 'BILLING'], 'cpt': (0, 10000)})
+    >> with open('smf.dump', 'wb') as f:
+    >>     gen.write(f, numrec=1000000, recform='BDW+')
+
+"""
+from __future__ import print_function          # PY3
+
+import random
+import struct
+from datetime import datetime, timedelta
+
+from adapya.base.recordio import SEGFIRST, SEGLAST, SEGMIDDLE
+from adapya.base.smfrecordz import Smf30pss, recordclass, DAY100, dtkey
+
+_smfhdr = struct.Struct('!HBxBBL4s4s4sH')   # rlen,seg,flg,rty,tme,dte,sid,ssi,sty
+_tmedte = struct.Struct('!L4s')
+_rdw = struct.Struct('!HBx')
+_triplet = struct.Struct('!LHH')
+
+MAXSEG = 32756      # maximum segment length incl. RDW
+BLKSIZE = 27998     # block size incl. BDW
+
+# default value distributions per field name: list of values to choose
+# from, tuple (low, high) for an integer range or function of Random
+DEFAULTS = {
+    'jbn': ['JOB%03d' % i for i in range(50)],
+    'pgm': ['IEFBR14', 'IEBGENER', 'IKJEFT01', 'DFSRRC00', 'ADARUN', 'SORT'],
+    'stm': ['STEP01', 'STEP02', 'STEP03'],
+    'rud': ['USER%02d' % i for i in range(20)],
+    'grp': ['SYS1', 'PROD', 'TEST', 'DEV'],
+    'jnm': lambda rng: 'JOB%05d' % rng.randrange(100000),
+    'cls': ['A', 'B', 'C'],
+    'cpt': (0, 100000),
+    'cps': (0, 10000),
+    'toz': (0, 50000),
+    'tep': (0, 100000),
+    'snf': [256, 512],
+    }
+
+
+def packdate(dt):
+    """ :returns: 4 bytes packed date 0cyydddF of datetime dt """
+    return bytes(bytearray.fromhex('%07dF' % (dtkey(dt) // DAY100)))
+
+
+class SmfGenerator(object):
+    """ SmfGenerator - deterministic generator of SMF records
+
+        :param seed: seed of the random generator
+        :param mix: dictionary of (rty, sty) or rty: relative weight
+        :param values: dictionary of field name: distribution, added
+            to or replacing DEFAULTS
+        :param sizes: (low, high) record length incl. RDW of records
+            of types that are not registered
+        :param start: datetime of the first record
+        :param rate: records per second; the record time increases
+            accordingly
+        :param jitter: maximum random deviation of the record time
+            in 1/100 seconds (records are only roughly ordered)
+        :param variants: number of different records per record type
+        :param sid: list of system identifiers to choose from
+    """
+    def __init__(self, seed=0, mix=None, values=None, sizes=(100, 400),
+                 start=datetime(2024, 2, 14), rate=1000, jitter=0,
+                 variants=64, sid=('SYSA',)):
+        self.rng = random.Random(seed)
+        self.mix = mix or {(30, 4): 2, (30, 5): 1, (70, 1): 1, (72, 3): 2}
+        self.values = dict(DEFAULTS)
+        self.values.update(values or {})
+        self.sizes = sizes
+        self.start = start
+        self.rate = rate
+        self.jitter = jitter
+        self.sid = sid
+
+        self.kinds = [k if isinstance(k, tuple) else (k, 0) for k in self.mix]
+        self.weights = [self.mix[k] for k in self.mix]
+        self.templates = dict((kind, [self.record(*kind) for i in range(variants)])
+                              for kind in self.kinds)
+        self.numrec = 0     # records generated
+
+    def value(self, name):
+        """ :returns: random value of field name """
+        dist = self.values[name]
+        if callable(dist):
+            return dist(self.rng)
+        if isinstance(dist, tuple):
+            return self.rng.randint(*dist)
+        return self.rng.choice(dist)
+
+    def record(self, rty, sty=0):
+        """ Build one record of type rty and subtype sty with random values
+
+            :returns: bytearray with record including RDW
+        """
+        recclass = recordclass(rty, sty)
+        sid = self.rng.choice(self.sid).encode('cp037')
+        if recclass is None or not recclass.secttab:
+            rlen = self.rng.randint(*self.sizes)
+            rec = bytearray(rlen)
+            _smfhdr.pack_into(rec, 0, rlen, 0, 0xde, rty, 0, b'\x00\x00\x00\x0f',
+                              sid, b'\xd1\xc5\xe2\xf2', sty)
+            return rec
+
+        sections = [(sclass(), toff) for sclass, toff in recclass.secttab]
+        rlen = recclass.minlen + sum(s.dmlen for s, toff in sections)
+        rec = bytearray(rlen)
+        _smfhdr.pack_into(rec, 0, rlen, 0, 0xde, rty, 0, b'\x00\x00\x00\x0f',
+                          sid, b'\xd1\xc5\xe2\xf2', sty)
+        sof = recclass.minlen
+        for section, toff in sections:
+            _triplet.pack_into(rec, recclass.tripstart + toff, sof, section.dmlen, 1)
+            section.buffer = rec
+            section.offset = sof
+            keydict = section.__dict__['keydict']
+            for name in self.values:
+                if name in keydict:
+                    setattr(section, name, self.value(name))
+            if isinstance(section, Smf30pss):
+                section.typ = sty
+                section.syn = self.sid[0]
+            sof += section.dmlen
+        return rec
+
+    def records(self, numrec):
+        """ Generator of numrec records including RDW with record
+            creation time increasing by rate
+        """
+        rng = self.rng
+        kinds, templates = self.kinds, self.templates
+        step = 100. / self.rate
+        t0 = dtkey(self.start)
+        day0 = t0 // DAY100 * DAY100
+        dates = {}      # day: packed date
+        batch = 4096
+        for base in range(0, numrec, batch):
+            k = min(batch, numrec - base)
+            chosen = rng.choices(kinds, self.weights, k=k)
+            for kind in chosen:
+                t = t0 + int(self.numrec * step)
+                if self.jitter:
+                    t = max(t0, t + rng.randint(-self.jitter, self.jitter))
+                day = (t - day0) // DAY100
+                dte = dates.get(day)
+                if dte is None:
+                    dte = dates[day] = packdate(self.start + timedelta(days=day))
+                rec = bytearray(rng.choice(templates[kind]))
+                _tmedte.pack_into(rec, 6, (t - day0) % DAY100, dte)
+                self.numrec += 1
+                yield rec
+
+    def write(self, f, numrec, recform='RDW+', blksize=BLKSIZE, maxseg=MAXSEG,
+              chunk=2**20):
+        """ Write numrec records to binary file f
+
+            :param recform: 'RDW+' records with RDW or 'BDW+' blocked
+                records with BDW
+            :param blksize: maximum block length incl. BDW for 'BDW+'
+            :param maxseg: maximum segment length incl. RDW; longer
+                records are spanned in segments
+            :param chunk: number of bytes collected for one write
+
+            :returns: number of bytes written
+        """
+        blocked = recform.startswith('BDW')
+        if blocked and maxseg > blksize - 4:
+            maxseg = blksize - 4
+        out = []
+        outlen = written = 0
+        block = []
+        blklen = 4
+        for rec in self.records(numrec):
+            for seg in _segments(rec, maxseg):
+                if blocked:
+                    if blklen + len(seg) > blksize:
+                        out.append(_rdw.pack(blklen, 0))
+                        out.extend(block)
+                        outlen += blklen
+                        block = []
+                        blklen = 4
+                    block.append(seg)
+                    blklen += len(seg)
+                else:
+                    out.append(seg)
+                    outlen += len(seg)
+            if outlen >= chunk:
+                f.write(b''.join(out))
+                written += outlen
+                out = []
+                outlen = 0
+        if block:
+            out.append(_rdw.pack(blklen, 0))
+            out.extend(block)
+            outlen += blklen
+        f.write(b''.join(out))
+        return written + outlen
+
+
+def _segments(rec, maxseg):
+    """ :returns: list of segments incl. RDW of record rec incl. RDW """
+    rlen = len(rec)
+    if rlen <= maxseg:
+        return [rec]
+    segs = []
+    pos = 4
+    while pos < rlen:
+        n = min(maxseg - 4, rlen - pos)
+        if pos == 4:
+            flag = SEGFIRST
+        elif pos + n >= rlen:
+            flag = SEGLAST
+        else:
+            flag = SEGMIDDLE
+        segs.append(_rdw.pack(n + 4, flag) + bytes(rec[pos:pos+n]))
+        pos += n
+    return segs
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -0,0 +1,234 @@
+"""
+smfindexz - sparse time index for SMF dumps
+===========================================
+
+The module smfindexz builds a sparse index of the record creation
+time of an SMF dump file. For every block of about N records the
+byte offset, record number and the oldest and latest record time
+of the block are kept. The SMF records of a file are only roughly
+ordered by time, therefore a time window is looked up by the
+min/max time per block and not by the time of the first record.
+
+The index is saved as JSON sidecar file next to the dump
+(dump file name + '.smfx') and used by SmfReader to seek to the
+blocks with records in a time window.
+
+Example usage::
+
+    >> from datetime import datetime
+    >> SmfIndex.forfile('smf.dump')         # build and save once
+    >> reader = SmfReader('smf.dump', rtys=(30,), index=1,
+    >>     window=(datetime(2024, 2, 14, 14, 0), datetime(2024, 2, 14, 14, 15)))
+    >> for rec in reader:
+    >>     print(rec.dt, rec.section(Smf30id).jbn)
+
+"""
+from __future__ import print_function          # PY3
+
+import json
+import os
+import sys
+from datetime import datetime
+
+from adapya.base.recordio import _rdwhdr, _peekhdr, SEGALL, SEGFIRST
+from adapya.base.smfrecordz import SMFHDRLEN, SMFWOS, smfheader, timekey, dtkey
+
+INDEXSUFFIX = '.smfx'
+INDEXVERSION = 2    # 2: min/max time as integer timekey()
+
+
+def scanhdr(f, recform='RDW+', hdrlen=SMFHDRLEN):
+    """ Generator function to scan the record headers of a file
+        without reading the records
+
+        :param f: open binary file positioned at a record or block start
+        :param recform: 'RDW+' or 'BDW+' (or 'RDW', 'BDW')
+        :param hdrlen: number of header bytes returned incl. RDW
+
+        :returns: tuple (offset, hdr) per logical record with offset
+            of the position at which reading can start with this record
+            or None. For blocked files this is the offset of the block
+            if the record is the first in the block.
+    """
+    blocked = recform.startswith('BDW')
+    blkrest = 0     # remaining length of current block
+    blkoff = 0      # offset of current block
+    while 1:
+        offset = f.tell()
+        rdws = f.read(4)
+        if len(rdws) < 4:
+            return
+        rlen, seg = _rdwhdr.unpack(rdws)
+
+        if rlen > 0x7fff:
+            dwtype = 'record'
+            if blocked and blkrest <= 4:
+                dwtype = 'block'
+            raise BaseException('Invalid %s length %s exceeds 32k-1 at offset %d' %
+                     (dwtype, rlen, offset))
+
+        if blocked:
+            if blkrest > 4:     # still records in block
+                offset = blkoff if blkrest == blklen else None
+                blkrest -= rlen
+            else:               # consume Block Descriptor Word
+                blkrest = blklen = rlen
+                blkoff = offset
+                continue
+
+        if seg in (SEGALL, SEGFIRST):
+            yield offset, rdws + _peekhdr(f, min(hdrlen-4, rlen-4))
+        f.seek(rlen-4, os.SEEK_CUR)
+
+
+class SmfIndex(object):
+    """ SmfIndex - sparse time index of an SMF dump file
+
+        :param recform: record format of the file 'RDW+' or 'BDW+'
+        :param every: number of records per index block
+
+    blocks is the list of [offset, recno, nrec, mintime, maxtime]
+    with recno the number of records before the block and mintime,
+    maxtime the oldest and latest record time in the block as
+    integer from timekey(). Records with invalid date are not
+    considered for mintime, maxtime.
+
+    >>> t = lambda mm: datetime(2024, 2, 14, 14, mm)
+    >>> ix = SmfIndex(every=2)
+    >>> ix.blocks = [[0, 0, 2, dtkey(t(0)), dtkey(t(10))],
+    ...     [400, 2, 2, dtkey(t(8)), dtkey(t(20))],
+    ...     [800, 4, 2, dtkey(t(30)), dtkey(t(40))]]
+    >>> ix.size, ix.nrec = 1200, 6
+    >>> ix.ranges(t(9), t(15))
+    [(0, 0, 4)]
+    >>> ix.ranges(t(35), None, size=1500)
+    [(800, 4, 2), (1200, 6, 0)]
+    """
+    def __init__(self, recform='RDW+', every=1000):
+        self.recform = recform
+        self.every = every
+        self.size = 0       # file size indexed
+        self.nrec = 0       # number of records indexed
+        self.blocks = []
+
+    @classmethod
+    def build(cls, fname, recform='RDW+', every=1000):
+        """ Build index by scanning the record headers of file fname """
+        ix = cls(recform=recform, every=every)
+        block = None
+        with open(fname, 'rb') as f:
+            for offset, hdr in scanhdr(f, recform):
+                if offset is not None and (block is None or block[2] >= every):
+                    block = [offset, ix.nrec, 0, None, None]
+                    ix.blocks.append(block)
+                ix.nrec += 1
+                if block is None:   # BDW file starting within a block
+                    continue
+                block[2] += 1
+                if len(hdr) < SMFWOS:
+                    continue
+                hdrvals = smfheader(hdr)
+                key = timekey(hdrvals[4], hdrvals[3])
+                if key is None:
+                    continue
+                if block[3] is None or key < block[3]:
+                    block[3] = key
+                if block[4] is None or key > block[4]:
+                    block[4] = key
+            ix.size = f.tell()
+        return ix
+
+    def save(self, path):
+        """ Save index to JSON file path (replaced atomically) """
+        tmp = path + '.tmp'
+        with open(tmp, 'w') as xf:
+            json.dump({'version': INDEXVERSION, 'recform': self.recform,
+                       'every': self.every, 'size': self.size, 'nrec': self.nrec,
+                       'blocks': self.blocks}, xf)
+        if sys.hexversion >= 0x03030000:
+            os.replace(tmp, path)
+        else:
+            if os.path.exists(path):
+                os.remove(path)
+            os.rename(tmp, path)
+
+    @classmethod
+    def load(cls, path):
+        """ Load index from JSON file path """
+        with open(path) as xf:
+            xd = json.load(xf)
+        if xd.get('version') != INDEXVERSION:
+            raise BaseException('Unsupported SMF index version %r in %s' % (
+                xd.get('version'), path))
+        return cls._fromdict(xd)
+
+    @classmethod
+    def _fromdict(cls, xd):
+        ix = cls(recform=xd['recform'], every=xd['every'])
+        ix.size, ix.nrec = xd['size'], xd['nrec']
+        ix.blocks = [list(block) for block in xd['blocks']]
+        return ix
+
+    @classmethod
+    def forfile(cls, fname, recform='RDW+', every=1000, save=1):
+        """ Return index of file fname from its sidecar file;
+            the index is built (and saved if save) if the sidecar file
+            does not exist, is older than the file or does not match
+            the file size or recform or was written by another
+            version
+        """
+        path = fname + INDEXSUFFIX
+        if os.path.exists(path) and os.path.getmtime(path) >= os.path.getmtime(fname):
+            with open(path) as xf:
+                xd = json.load(xf)
+            if xd.get('version') == INDEXVERSION and xd['recform'] == recform \
+                    and xd['size'] == os.path.getsize(fname):
+                return cls._fromdict(xd)
+        ix = cls.build(fname, recform=recform, every=every)
+        if save:
+            ix.save(path)
+        return ix
+
+    def ranges(self, start=None, end=None, size=0):
+        """ Return list of file ranges (offset, recno, nrec) with records
+            in the time window start <= time < end
+
+            :param start: datetime of window start or None
+            :param end: datetime of window end or None
+            :param size: current file size; if larger than the size
+                indexed the records appended are returned as range
+                with nrec 0 (read to end of file)
+
+            Adjacent blocks are combined in one range. Blocks without
+            valid record time are always included.
+        """
+        lo = dtkey(start) if start else None
+        hi = dtkey(end) if end else None
+        ranges = []
+        for offset, recno, nrec, mintime, maxtime in self.blocks:
+            if mintime is not None and (
+                    (lo is not None and maxtime < lo) or
+                    (hi is not None and mintime >= hi)):
+                continue
+            if ranges and ranges[-1][1] + ranges[-1][2] == recno:
+                ranges[-1][2] += nrec
+            else:
+                ranges.append([offset, recno, nrec])
+        if size > self.size:
+            ranges.append([self.size, self.nrec, 0])
+        return [tuple(r) for r in ranges]
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -2,10 +2,30 @@
 # IBM System management Facilities (SMF) record structures
 # (only some SMF30 record types)
 #
+# SmfReader iterates over the SMF records of a file and passes them
+# to sinks for printing, aggregation or export.
+# SmfFiles reads several files in worker processes and merges the results.
+#
+from __future__ import print_function          # PY3
+
+import copy
+import glob
+import multiprocessing
+import os
+import re
+import struct
+import time
+from binascii import hexlify
+from collections import Counter
+from datetime import datetime, timedelta
+from operator import attrgetter
 
 from adapya.base.datamap import Datamap,Bytes,str_str,Int2,Int4,\
     NETWORKBO,String,Packed,str_str,\
-    T_NONE,T_HEX,T_STCK,Uint1,Uint2,Uint4,Uint8
+    T_NONE,T_HEX,T_STCK,T_STRING,Uint1,Uint2,Uint4,Uint8
+from adapya.base.dump import dump
+from adapya.base.recordio import readrec
+from adapya.base.stck import Memo
 
 
 percent = lambda i: "%d %%" % i
@@ -14,42 +34,85 @@ dezi = lambda i: dot1 * i  # dezi(123) returns decimal('12.3')
 
 div256 = lambda i: '%.2f' % (i/256.,)
 
+def _idate(i):
+    if i > 100000:
+        return '20%02d.%03d' % ( (i-100000)//1000, i%1000 )
+    else:
+        return '19%02d.%03d' % (i//1000, i%1000)
+
+def _i2dt(key):
+    idat, isec = key
+    if idat > 100000:
+        yy = 2000 + (idat-100000) // 1000
+    else:
+        yy = 1900 + idat // 1000
+    tdays = timedelta(idat%1000 - 1) # day in year starting with 0
+    return datetime(yy,1,1,isec//3600,isec//60%60,isec%60)+tdays
+
+# dates and datetimes of a second cached for consecutive records
+idates = Memo(_idate, maxsize=1024)
+i2dts = Memo(_i2dt)
+
 def dtime100(i):
     "return readable time since midnight 1/100 sec precision"
-    hh = i/(100*3600)
-    mm = i/(100*60) - hh*60
-    ss = i/100 - hh*60*60 - mm*60
+    hh = i//(100*3600)
+    mm = i//(100*60) - hh*60
+    ss = i//100 - hh*60*60 - mm*60
     hs = i%100
     return '%02d:%02d:%02d.%02d' % (hh,mm,ss,hs)
 
 def idate(i):
     " Return string from IBM date 0cyyddd "
-    if i > 100000:
-        return '20%02d.%03d' % ( (i-100000)/1000, i%1000 )
-    else:
-        return '19%02d.%03d' % (i/1000, i%1000)
+    return idates(i)
 
 def i2dt(idat,itim):
     """Convert industry date time to datetime object
 
         :param idat: integer IBM industry date 0cyyddd
         :param itim: integer IBM time in 100ths of a second in day
+
+    >>> i2dt(124045, 4523456)
+    datetime.datetime(2024, 2, 14, 12, 33, 54, 560000)
+    >>> i2dt(99045, 100)
+    datetime.datetime(1999, 2, 14, 0, 0, 1)
     """
-    from datetime import datetime, timedelta
-    hh=mm=ss=hs=0
+    dt = i2dts((idat, itim//100))
+    if itim%100:
+        return dt.replace(microsecond=itim%100*10000)
+    return dt
 
-    if idat > 100000:
-        yy = 2000 + (idat-100000) // 1000
-    else:
-        yy = 2000 + idat // 1000
-    tdays = timedelta(idat%1000 - 1) # day in year starting with 0
+DAY100 = 8640000    # 1/100 seconds per day
 
-    if itim:
-        hh = itim/(100*3600)
-        mm = itim/(100*60) - hh*60
-        ss = itim/100 - hh*60*60 - mm*60
-        hs = itim%100
-    return datetime(yy,1,1,hh,mm,ss,hs*10000)+tdays
+def timekey(dte, tme):
+    """ Return sortable integer of SMF record date and time
+        (dte * DAY100 + tme) or None if the date is invalid
+
+        :param dte: packed date 0cyydddF as in SMF header (4 bytes)
+        :param tme: integer time in 100ths of a second in day
+
+    >>> timekey(b'\\x01\\x24\\x04\\x5f', 360000) == dtkey(i2dt(124045, 360000))
+    True
+    """
+    try:
+        return int(hexlify(dte)[:-1]) * DAY100 + tme
+    except ValueError:
+        return None
+
+def dtkey(dt):
+    """ Return sortable integer of datetime dt as with timekey() """
+    return (((dt.year-1900)*1000 + dt.timetuple().tm_yday) * DAY100
+        + ((dt.hour*60 + dt.minute)*60 + dt.second)*100 + dt.microsecond//10000)
+
+def keydt(key):
+    """ Return datetime of integer from timekey() or dtkey()
+
+    >>> keydt(timekey(b'\\x00\\x99\\x04\\x5f', 100))
+    datetime.datetime(1999, 2, 14, 0, 0, 1)
+    """
+    days, tme = divmod(key, DAY100)
+    years, yday = divmod(days, 1000)
+    return datetime(1900 + years, 1, 1) + timedelta(yday - 1, tme // 100,
+                                                    tme % 100 * 10000)
 
 #
 # Standard SMF record header
@@ -86,6 +149,20 @@ class Smf(Datamap):
 SMFWOS = 0x12   # without subtypes
 # dmlen = 0x18  # with subtypes
 
+def rtyselect(*rtys, **kw):
+    """ Return readrec() select condition for SMF record types
+
+        :param rtys: SMF record types to select
+        :param rdw: 1 - records are read including RDW e.g. with
+            recform='RDW+' (default), 0 - records without RDW
+
+    >>> rtyselect(30, 70)
+    {5: (30, 70)}
+    >>> rtyselect(30, rdw=0)
+    {1: (30,)}
+    """
+    return {5 if kw.get('rdw', 1) else 1: rtys}
+
 #
 # SMF record type 30: Accounting information "Common address space work"
 #
@@ -282,6 +359,20 @@ class Smf30id(Datamap):
     byteOrder=NETWORKBO,ebcdic=1,**kw)
 
 
+#
+#   Smf30ura - I/O Activity Section
+#              (currently only the first fields)
+#
+
+class Smf30ura(Datamap):
+  def __init__(self, **kw):
+    Datamap.__init__(self, 'I/O activity section',
+    Uint4('inp',caption='Card-image records in DD DATA'), # JMRCRDR
+    Uint4('tep',caption='Total EXCP count'),      # blocks transferred all devices
+    Uint4('tpt',caption='TPUTs for TSO session'),
+    Uint4('tgt',caption='TGETs for TSO session'),
+    byteOrder=NETWORKBO,ebcdic=1,**kw)
+
 #
 #   Smf30prf - Performance Section
 #              (currently only few selected fields :-)
@@ -397,6 +488,864 @@ class Smf30cas(Datamap):
 SMF30CASLEN = 0xbc  # 188
 
 
+#
+#   SMF record reader
+#
+
+SMFHDRLEN = 0x18    # SMF header with subtypes incl. RDW
+SMFSTV = 0x40       # flg: subtypes are valid
+
+_smfhdr = struct.Struct('!HxxBBL4s4s4sH')   # rlen,flg,rty,tme,dte,sid,ssi,sty
+_smfwos = struct.Struct('!HxxBBL4s4s')      # header without subtypes
+
+class SmfError(Exception):
+    """ Invalid SMF record """
+    pass
+
+
+class Triplets(object):
+    r""" Triplets - self-defining section of an SMF record
+
+    Each section of a record is located by a triplet
+    (offset, length, number of sections) with 4 bytes offset
+    from the start of the record including RDW, 2 bytes length and
+    2 bytes number. All triplets are decoded with one struct call.
+
+        :param start: offset of the self-defining section in the record
+        :param positions: ascending positions of the triplets relative
+            to start; the positions of the triplets may have gaps
+            for other fields
+
+    >>> t = Triplets(4, (0, 12))
+    >>> rec = b'RDW_' + b'\x00\x00\x00\x18\x00\x02\x00\x02' + 4*b'-' \
+    ...     + b'\x00\x00\x00\x1c\x00\x04\x00\x01' + b'aabbcccc'
+    >>> [(ix, off, ln) for ix, buf, off, ln in t.walk(rec)]
+    [(0, 24, 2), (0, 26, 2), (1, 28, 4)]
+    """
+    def __init__(self, start, positions):
+        fmt = ['!']
+        pos = 0
+        for p in positions:
+            if p < pos:
+                raise SmfError('Triplet positions %r not ascending' % (positions,))
+            if p > pos:
+                fmt.append('%dx' % (p-pos))
+            fmt.append('LHH')
+            pos = p + 8
+        self.start = start
+        self.count = len(positions)
+        self.struct = struct.Struct(''.join(fmt))
+
+    def unpack(self, buffer):
+        """ :returns: list of (offset, length, number) tuples """
+        vals = self.struct.unpack_from(buffer, self.start)
+        return [vals[i:i+3] for i in range(0, len(vals), 3)]
+
+    def walk(self, buffer, select=None, rlen=0):
+        """ generator of all sections of a record
+
+            :param buffer: record including RDW
+            :param select: list of triplet indexes (default all)
+            :param rlen: record length (default length of buffer)
+
+            :returns: (triplet index, buffer, offset, length)
+                for each section
+
+            :raises SmfError: if a section is not within the record
+        """
+        rlen = rlen or len(buffer)
+        if rlen < self.start + self.struct.size:
+            raise SmfError('Record length %d too short for %d triplets' % (
+                rlen, self.count))
+        vals = self.struct.unpack_from(buffer, self.start)
+        for ix in (range(self.count) if select is None else select):
+            off, ln, num = vals[3*ix:3*ix+3]
+            if not (ln and num):
+                continue
+            if off < self.start + self.struct.size or off + ln*num > rlen:
+                raise SmfError('Section %d at offset %d with %d x %d bytes exceeds record length %d' % (
+                    ix, off, num, ln, rlen))
+            for j in range(num):
+                yield ix, buffer, off + j*ln, ln
+
+
+class SmfRecord(object):
+    """ SMF record returned by SmfReader
+
+    The header fields are decoded once from the raw record header.
+    Record and section Datamaps are only mapped when accessed
+    with dmap or sections().
+
+    Attributes: recno, rlen, flg, rty, sty (0 if no subtypes),
+    tme, dte, sid, ssi and buffer (record including RDW)
+    """
+    recmap = Smf      # Datamap class of the record
+    minlen = SMFWOS   # minimum record length
+
+    secttab = []      # (section Datamap class, triplet position)
+    tripstart = SMFHDRLEN   # offset of the triplets in the record
+
+    def __init__(self, reader, recno, hdrvals):
+        self.reader = reader
+        self.recno = recno
+        self.buffer = None
+        self.rlen, self.flg, self.rty, self.tme, self._dte, self._sid, \
+            self._ssi, self.sty = hdrvals
+
+    @property
+    def dte(self):
+        """ record creation date 0cyyddd """
+        return int(hexlify(self._dte)[:-1])
+
+    @property
+    def sid(self):
+        """ system identifier """
+        return self._sid.decode('cp037').rstrip(' ')
+
+    @property
+    def ssi(self):
+        """ subsystem identifier """
+        return self._ssi.decode('cp037').rstrip(' ')
+
+    @property
+    def dt(self):
+        """ record creation time as datetime """
+        return i2dt(self.dte, self.tme)
+
+    @property
+    def dmap(self):
+        """ record Datamap mapped on buffer (reused for every record) """
+        dm = self.reader.datamap(self.recmap)
+        dm.buffer = self.buffer
+        dm.offset = 0
+        return dm
+
+    def sections(self, select=()):
+        """ generator of all sections as Datamaps mapped on buffer
+            (the section Datamaps are reused for every record)
+
+        :param select: list of section Datamap classes to return,
+            default all sections defined in secttab
+        """
+        short = set()
+        for ix, buf, off, ln in self._walk(select):
+            sclass = self.secttab[ix][0]
+            section = self.reader.datamap(sclass)
+            if ln < section.dmlen:
+                if ix not in short:
+                    short.add(ix)
+                    print( 'WARNING: Record %d section length %d is shorter than defined %d for %s; skipping' % (
+                        self.recno, ln, section.dmlen, section.dmname))
+                continue
+            section.buffer = buf
+            section.offset = off
+            yield section
+
+    def section(self, sclass):
+        """ :returns: first section of Datamap class sclass or None """
+        for section in self.sections(select=(sclass,)):
+            return section
+
+    def values(self, sclass, *keys):
+        """ Get field values of the first section of Datamap class sclass
+            with a getter compiled once per reader
+
+        :returns: tuple of values or None if there is no such section;
+            sections shorter than the Datamap are skipped as in sections()
+
+        >> jbn, pgm = rec.values(Smf30id, 'jbn', 'pgm')
+        """
+        dmlen = self.reader.datamap(sclass).dmlen
+        for ix, buf, off, ln in self._walk((sclass,)):
+            if ln < dmlen:
+                continue
+            return self.reader.getter(sclass, keys)(buf, off)
+
+    @classmethod
+    def triplets(cls):
+        """ :returns: Triplets of the record class built from secttab """
+        trip = cls.__dict__.get('_triplets')
+        if trip is None:
+            trip = Triplets(cls.tripstart, [toff for sclass, toff in cls.secttab])
+            cls._triplets = trip
+        return trip
+
+    def _walk(self, select=()):
+        if not self.secttab:
+            return iter(())
+        ixs = None
+        if select:
+            ixs = [ix for ix, (sclass, toff) in enumerate(self.secttab)
+                   if sclass in select]
+        return self.triplets().walk(self.buffer, ixs)
+
+    def __repr__(self):
+        return 'SmfRecord(recno=%d, rty=%d, sty=%d, sid=%r, dt=%s)' % (
+            self.recno, self.rty, self.sty, self.sid, self.dt)
+
+
+class Smf30Record(SmfRecord):
+    """ SMF30 record with triplets (offset, length, number)
+        to the sections
+    """
+    recmap = Smf30
+    minlen = 0xbc     # Smf30 dmlen
+
+    # section Datamap class, triplet position from subsystem section triplet
+    secttab = [
+        (Smf30pss,  0x00), # Subsystem section
+        (Smf30id,   0x08), # ID section
+        (Smf30ura,  0x10), # I/O activity
+    #o  (Smf30cmp,  0x18), #- Completion
+        (Smf30cas,  0x20), # Processor / CPU accounting
+    #o  (Smf30acs,  0x28), # Accounting
+    #o  (Smf30sap,  0x30), # Storage
+        (Smf30prf,  0x38), # Performance
+        ]
+
+
+#
+#   Registry of SMF record types
+#
+
+smftypes = {}   # (rty, subtype) or (rty, None) for all subtypes: SmfRecord class
+smfrtys = set() # registered SMF record types
+
+def register(recclass, rty, subtypes=()):
+    """ Register SmfRecord subclass for an SMF record type
+
+        :param recclass: SmfRecord subclass defining recmap and secttab
+            with the record and section Datamap classes
+        :param rty: SMF record type
+        :param subtypes: list of subtypes for recclass; default all
+            subtypes not registered explicitly
+
+    The Datamaps are instantiated when a record of the type is first
+    accessed.
+
+    Example::
+
+    >> class Smf70Record(SmfRecord):
+    >>     recmap = Smf70
+    >>     secttab = [(Smf70cpu, 0x00), (Smf70prd, 0x08)]
+    >> register(Smf70Record, 70, subtypes=(1,))
+
+    """
+    for sty in subtypes or (None,):
+        smftypes[(rty, sty)] = recclass
+    smfrtys.add(rty)
+
+def recordclass(rty, sty):
+    """ :returns: registered SmfRecord class for SMF record type and
+        subtype or None
+    """
+    return smftypes.get((rty, sty)) or smftypes.get((rty, None))
+
+def smfheader(hdr):
+    """ Decode SMF record header with RDW
+
+        :returns: tuple (rlen, flg, rty, tme, dte, sid, ssi, sty) with
+            dte, sid and ssi undecoded, ssi empty and sty 0 for records
+            without subtypes
+    """
+    if len(hdr) >= SMFHDRLEN and bytearray(hdr[4:5])[0] & SMFSTV:
+        return _smfhdr.unpack_from(hdr)
+    return _smfwos.unpack_from(hdr) + (b'', 0)
+
+register(Smf30Record, 30)
+
+
+#
+#   Selection on text fields in the EBCDIC domain
+#
+
+def _bytesregex(pattern, codec):
+    """ translate fnmatch-style pattern into regular expression
+        on the bytes of the pattern encoded with codec
+    """
+    res = []
+    i, n = 0, len(pattern)
+    while i < n:
+        c = pattern[i]
+        i += 1
+        if c == '*':
+            res.append(b'.*')
+        elif c == '?':
+            res.append(b'.')
+        elif c == '[':
+            j = i
+            if j < n and pattern[j] == '!':
+                j += 1
+            if j < n and pattern[j] == ']':
+                j += 1
+            while j < n and pattern[j] != ']':
+                j += 1
+            if j >= n:
+                res.append(re.escape('['.encode(codec)))
+                continue
+            chars = pattern[i:j]
+            i = j + 1
+            neg = chars.startswith('!')
+            if neg:
+                chars = chars[1:]
+            cset = []   # ranges are expanded as EBCDIC letters are not contiguous
+            k = 0
+            while k < len(chars):
+                if k+2 < len(chars) and chars[k+1] == '-':
+                    cset.extend(chr(o) for o in range(ord(chars[k]), ord(chars[k+2])+1))
+                    k += 3
+                else:
+                    cset.append(chars[k])
+                    k += 1
+            res.append(b'[' + (b'^' if neg else b'') +
+                       b''.join(re.escape(ch.encode(codec)) for ch in cset) + b']')
+        else:
+            res.append(re.escape(c.encode(codec)))
+    return re.compile(b''.join(res) + br'\Z', re.DOTALL)
+
+def patternmatch(patterns, size=0, codec='cp037'):
+    r""" Compile fnmatch-style patterns into a function that tests
+        the raw bytes of a text field without decoding it
+
+        :param patterns: pattern or list of patterns of which one
+            must match; '*' matches any characters, '?' one character
+            and [seq] or [!seq] a character (not) in seq
+        :param size: length of the field padded with blanks
+        :param codec: encoding of the field
+
+        :returns: function match(field) with field the bytes of the field
+
+        Patterns without wildcards are compared as padded field value,
+        patterns of the form 'ABC*', '*ABC' and '*ABC*' with a prefix,
+        suffix or contains check, other patterns with a regular
+        expression on the encoded bytes.
+
+    >>> match = patternmatch(['JOB*', 'TEST'], 8)
+    >>> match(b'\xd1\xd6\xc2\xf1@@@@'), match(b'\xe3\xc5\xe2\xe3@@@@')
+    (True, True)
+    >>> match(b'\xe3\xc5\xe2\xe3\xf1@@@')
+    False
+    >>> patternmatch('T?S[A-Z]*', 8)(b'\xe3\xc5\xe2\xe3\xf1@@@')
+    True
+    """
+    if not isinstance(patterns, (list, tuple, set)):
+        patterns = [patterns]
+    blank = ' '.encode(codec)
+    exact = set()   # padded field values
+    tests = []
+    for p in patterns:
+        core = p.strip('*')
+        if not core:        # '' or '*' matches all
+            return lambda field: True
+        if any(c in core for c in '*?['):
+            rx = _bytesregex(p, codec)
+            tests.append(lambda field, m=rx.match: m(field.rstrip(blank)) is not None)
+            continue
+        enc = core.encode(codec)
+        if p.startswith('*') and p.endswith('*'):
+            tests.append(lambda field, e=enc: e in field)
+        elif p.endswith('*'):
+            tests.append(lambda field, e=enc: field.startswith(e))
+        elif p.startswith('*'):
+            tests.append(lambda field, e=enc: field.rstrip(blank).endswith(e))
+        elif size:
+            exact.add(enc.ljust(size, blank))
+        else:
+            tests.append(lambda field, e=enc: field.rstrip(blank) == e)
+    if not tests:
+        return exact.__contains__
+
+    def match(field):
+        if field in exact:
+            return True
+        for test in tests:
+            if test(field):
+                return True
+        return False
+    return match
+
+def fieldselect(sclass, criteria, missing=True):
+    """ Compile selection criteria on text fields of a section into
+        a where function for SmfReader
+
+        The fields are compared on the raw EBCDIC bytes of the record
+        (see patternmatch()) so that records are rejected without
+        decoding any field.
+
+        :param sclass: section Datamap class
+        :param criteria: dictionary of field name: pattern or list
+            of patterns; all fields must match one of their patterns
+        :param missing: result for records without the section
+
+        :returns: function where(rec)
+
+    >> where = fieldselect(Smf30id, {'jbn': ['PAY*', 'ACC*'], 'grp': 'RND'})
+    >> SmfReader('smf.dump', rtys=(30,), where=where)
+    """
+    dm = sclass()
+    keydict = dm.__dict__['keydict']
+    codec = 'cp037' if dm.__dict__['ebcdic'] else dm.__dict__['encoding']
+    tests = []
+    for key, patterns in sorted(criteria.items()):
+        if key not in keydict:
+            raise BaseException('Unknown field %r in %s' % (key, dm.dmname))
+        ftype, start, size, inout, fdic = keydict[key]
+        if ftype != T_STRING:
+            raise BaseException('Field %r in %s is not a text field' % (key, dm.dmname))
+        tests.append((start, start+size, patternmatch(patterns, size, codec)))
+
+    def where(rec):
+        for ix, buf, off, ln in rec._walk((sclass,)):
+            for start, end, match in tests:
+                if not match(buf[off+start:off+end]):
+                    return False
+            return True
+        return missing
+    return where
+
+
+class SmfReader(object):
+    """ SmfReader - iterate over SMF records of a file
+
+        :param fname: file name or open binary file
+        :param recform: 'RDW+' or 'BDW+' (records with RDW)
+        :param rtys: SMF record types to return (default all)
+        :param subtypes: SMF subtypes to return (default all)
+        :param where: function called with SmfRecord, returns True
+            for the records to return
+        :param numrec: maximum number of records to read (0 = all)
+        :param skiprec: number of records to skip
+        :param sinks: list of sinks that process the records in run()
+        :param registered: 1 - return only record types registered
+            with register()
+        :param window: tuple (start, end) of datetime or None to return
+            the records created at start <= time < end
+        :param index: SmfIndex of the file (see smfindexz) or 1 to use
+            the index sidecar file (built if needed) so that only the
+            blocks of records in window are read; not with numrec
+            or skiprec
+        :param progress: seconds between progress reports of records
+            read and records per second (0 = no report)
+        :param debug: 1 - print RDW information
+
+    The records not selected by type are not read from the file and
+    only the record type is taken from their header.
+    Counts per record type are maintained for all records read,
+    the time of the oldest and the latest record for all records
+    of the types selected.
+
+    The returned SmfRecord is only valid until the next record is read.
+
+    Example usage::
+
+    >> reader = SmfReader('smf.dump', rtys=(30,), subtypes=(4, 5))
+    >> for rec in reader:
+    >>    cas = rec.section(Smf30cas)
+    >>    print(rec.dt, cas.cpt)
+
+    >> SmfReader('smf.dump', sinks=[PrintSink(verbose=2)]).run()
+
+    """
+    def __init__(self, fname, recform='RDW+', rtys=(), subtypes=(), where=None,
+                 numrec=0, skiprec=0, sinks=(), registered=0, window=None,
+                 index=None, progress=0, debug=0):
+        if not recform.endswith('+'):
+            raise BaseException('SmfReader requires recform with RDW, %r given' % recform)
+        if index and (numrec or skiprec):
+            raise BaseException('SmfReader with index does not support numrec or skiprec')
+        self.fname = fname
+        self.recform = recform
+        self.rtys = frozenset(rtys)
+        self.subtypes = frozenset(subtypes)
+        self.where = where
+        self.numrec = numrec
+        self.skiprec = skiprec
+        self.sinks = list(sinks)
+        self.registered = registered
+        self.window = window
+        self.index = index
+        self.progress = progress
+        self.debug = debug
+
+        self.fileno = None      # index of the file when read by SmfFiles
+        self.recno = 0          # records read
+        self.selected = 0       # records returned
+        self.counter = Counter()    # records per SMF type
+        self._oldest = None     # header of first record
+        self._latest = None     # header of last record
+        self._maps = {}         # Datamap instances per class
+        self._getters = {}      # compiled getters per (class, keys)
+        self._rec = None        # record with header decoded
+        self._start = self._report = time.time()  # for progress
+        self._lo = self._hi = None  # window as timekey()
+        if window:
+            self._lo = dtkey(window[0]) if window[0] else None
+            self._hi = dtkey(window[1]) if window[1] else None
+
+    @property
+    def oldest(self):
+        """ (dte, tme) of the first record read """
+        if self._oldest:
+            return self._oldest.dte, self._oldest.tme
+
+    @property
+    def latest(self):
+        """ (dte, tme) of the last record read """
+        if self._latest:
+            return self._latest.dte, self._latest.tme
+
+    def datamap(self, dmclass):
+        """ :returns: Datamap instance of dmclass owned by reader """
+        dm = self._maps.get(dmclass)
+        if dm is None:
+            dm = self._maps[dmclass] = dmclass()
+        return dm
+
+    def getter(self, dmclass, keys):
+        """ :returns: getter function of Datamap class dmclass for the
+            field names in keys compiled once (see Datamap.getter())
+        """
+        get = self._getters.get((dmclass, keys))
+        if get is None:
+            get = self._getters[(dmclass, keys)] = \
+                dmclass().getter(*keys)
+        return get
+
+    def _header(self, hdr):
+        """ select function for readrec() called with the record header """
+        self.recno += 1
+        if self.progress and not self.recno & 0xfff:
+            self._progress()
+        if len(hdr) < SMFWOS:   # smallest SMF record is without subtypes
+            print( 'SMF Record %d has invalid record length %d (shorter than SMF record header %d)' % (
+                self.recno, len(hdr), SMFWOS))
+            return False
+        rty = bytearray(hdr[5:6])[0]
+        self.counter[rty] += 1
+        if self.rtys and rty not in self.rtys:
+            return False
+        if self.registered and rty not in smfrtys:
+            return False
+        hdrvals = smfheader(hdr)
+        sty = hdrvals[7]
+        if self.subtypes and sty not in self.subtypes:
+            return False
+        if self.window:
+            key = timekey(hdrvals[4], hdrvals[3])
+            if key is None or (self._lo is not None and key < self._lo) or \
+                    (self._hi is not None and key >= self._hi):
+                return False
+        recclass = recordclass(rty, sty)
+        if recclass is None:
+            if self.registered:
+                return False
+            recclass = SmfRecord
+        rec = recclass(self, self.recno, hdrvals)
+        if self._oldest is None:
+            self._oldest = rec
+        self._latest = rec
+        self._rec = rec
+        return True
+
+    def __iter__(self):
+        if hasattr(self.fname, 'read'):
+            f = self.fname
+        else:
+            f = open(self.fname, 'rb')
+        try:
+            if self.index:
+                f.seek(0, os.SEEK_END)
+                ranges = self._index(f).ranges(*(self.window or (None, None)),
+                                               size=f.tell())
+            else:
+                ranges = [(None, 0, self.numrec)]
+            for offset, recno, nrec in ranges:
+                if offset is not None:  # seek to range in index
+                    f.seek(offset)
+                    self.recno = recno
+                for record in readrec(f, recform=self.recform, maxread=nrec,
+                                      skiprec=self.skiprec, debug=self.debug,
+                                      select=self._header, selhdr=SMFHDRLEN):
+                    rec = self._rec
+                    rec.buffer = record
+                    if len(record) < rec.minlen:
+                        print( 'SMF Record %d has invalid record length %d (shorter than %d)' % (
+                            rec.recno, len(record), rec.minlen))
+                        continue
+                    if self.where and not self.where(rec):
+                        continue
+                    self.selected += 1
+                    yield rec
+        finally:
+            if f is not self.fname:
+                f.close()
+
+    def _progress(self):
+        now = time.time()
+        if now - self._report >= self.progress:
+            self._report = now
+            print('[%d] %s: %d records %.0f rec/s' % (os.getpid(),
+                getattr(self.fname, 'name', self.fname), self.recno,
+                self.recno / max(now - self._start, 1e-6)))
+
+    def _index(self, f):
+        """ :returns: SmfIndex of file f """
+        if hasattr(self.index, 'ranges'):
+            return self.index
+        from adapya.base.smfindexz import SmfIndex
+        return SmfIndex.forfile(f.name, recform=self.recform)
+
+    def run(self):
+        """ pass all selected records to the sinks
+
+            :returns: reader
+        """
+        for rec in self:
+            for sink in self.sinks:
+                sink.put(rec)
+        for sink in self.sinks:
+            sink.close(self)
+        return self
+
+    def stats(self, verbose=1):
+        """ print statistics of records read """
+        skips = ' - skipped %d' % self.skiprec if self.skiprec > 0 else ''
+        print('\nSMF file %s processed %d records%s' % (
+            getattr(self.fname, 'name', self.fname), self.recno, skips))
+        if self.oldest:
+            print('\n    oldest record %s' % i2dt(*self.oldest))
+        if self.latest:
+            print('\n    latest record %s' % i2dt(*self.latest))
+        if verbose & 1:
+            print('\nRecord counts per SMF type:')
+            for smftyp, smfcnt in sorted( self.counter.items() ):
+                print('SMF%-3d %6d' % (smftyp, smfcnt))
+
+
+class SmfSink(object):
+    """ Base class of SMF record sinks used with SmfReader.run() """
+    def put(self, rec):
+        """ process SmfRecord rec """
+        pass
+
+    def close(self, reader):
+        """ called after the last record """
+        pass
+
+    def partial(self):
+        """ :returns: picklable result of the sink for merge() """
+        return None
+
+    def merge(self, partial):
+        """ combine result partial() of another sink of the same
+            kind into this sink (see SmfFiles)
+        """
+        pass
+
+
+class PrintSink(SmfSink):
+    """ Print SMF records and their sections
+
+        :param verbose: composable: 2 - print sections, 4 - dump record,
+            8 - print record header
+    """
+    def __init__(self, verbose=2):
+        self.verbose = verbose
+
+    def put(self, rec):
+        if self.verbose & (4|8):
+            dump(rec.buffer, header='SMF%d record %d' % (rec.rty, rec.recno))
+        if self.verbose & 8:
+            print( '--- Record %d: SMF%d ---' % (rec.recno, rec.rty))
+            rec.dmap.dprint(skipnull=1)
+        if self.verbose & 2:
+            print( '--- Record %d: SMF%d ---' % (rec.recno, rec.rty))
+            for section in rec.sections():
+                print()
+                section.dprint(skipnull=1)
+
+
+class AggregateSink(SmfSink):
+    """ Count records and sum up values per key
+
+        :param key: function returning the key of an SmfRecord,
+            default (rty, sty)
+        :param value: function returning a number to sum up per key
+
+    Results are in the Counters count and total.
+
+    >> cpu = AggregateSink(key=lambda r: r.section(Smf30id).jbn,
+    >>      value=lambda r: r.section(Smf30cas).cpt)
+    """
+    def __init__(self, key=None, value=None):
+        self.key = key or (lambda rec: (rec.rty, rec.sty))
+        self.value = value
+        self.count = Counter()
+        self.total = Counter()
+
+    def put(self, rec):
+        k = self.key(rec)
+        self.count[k] += 1
+        if self.value:
+            self.total[k] += self.value(rec)
+
+    def partial(self):
+        return self.count, self.total
+
+    def merge(self, partial):
+        count, total = partial
+        self.count.update(count)
+        self.total.update(total)
+
+
+class ExportSink(SmfSink):
+    """ Write one CSV line per SMF record
+
+        :param f: text file opened for writing
+        :param fields: list of (column name, function of SmfRecord);
+            default are the header fields
+    """
+    def __init__(self, f, fields=None):
+        import csv
+        self.fields = fields or [(n, attrgetter(n)) for n in
+            ('recno', 'rty', 'sty', 'sid', 'ssi', 'dt')]
+        self.writer = csv.writer(f)
+        self.writer.writerow([name for name, fun in self.fields])
+
+    def put(self, rec):
+        self.writer.writerow([fun(rec) for name, fun in self.fields])
+
+
+_worker = None  # (reader arguments, sinks, progress) in worker process
+
+def _initworker(kw, sinks, progress):
+    global _worker
+    _worker = (kw, sinks, progress)
+
+def _runfile(job):
+    """ read one file in a worker process of SmfFiles
+
+        :param job: tuple (index of the file, file name)
+        :returns: tuple (fname, pid, seconds, recno, selected, counter,
+            oldest, latest, sink partials)
+    """
+    fileno, fname = job
+    kw, sinks, progress = _worker
+    t = time.time()
+    sinks = [copy.deepcopy(sink) for sink in sinks]
+    reader = SmfReader(fname, sinks=sinks, progress=progress, **kw)
+    reader.fileno = fileno
+    reader.run()
+    return (fname, os.getpid(), time.time() - t, reader.recno, reader.selected,
+            dict(reader.counter), reader.oldest, reader.latest,
+            [sink.partial() for sink in sinks])
+
+
+class SmfFiles(object):
+    """ SmfFiles - process several SMF files concurrently
+
+        :param files: list of file names or glob patterns
+        :param workers: number of worker processes; 0 reads the files
+            one after the other in this process
+        :param sinks: list of sinks that support partial() and merge();
+            each file is read with a copy of the sinks and the results
+            are merged into sinks; the reader of a file has its index
+            in files as attribute fileno
+        :param progress: seconds between progress reports per worker;
+            also prints a line per file read
+        :param kw: further SmfReader parameters e.g. rtys, where
+
+    The results of the files are merged in the order of the file
+    names so that counters and aggregations are the same for any
+    number of workers. Attributes recno, selected, counter, oldest
+    and latest are as with SmfReader.
+
+    With more than one worker the reader parameters and sinks are
+    passed to the worker processes which requires the fork start
+    method for functions defined inline; the sink results returned
+    by partial() must be picklable.
+
+    Example usage::
+
+    >> agg = Aggregate(keys=('sid', 'jbn'), measures=(('cpu', 'sum', 'cpu'),))
+    >> files = SmfFiles(['/smf/2024045.*.smf'], workers=8, rtys=(30,),
+    >>                  sinks=[agg], progress=10).run()
+    >> files.stats()
+
+    """
+    def __init__(self, files, workers=0, sinks=(), progress=0, **kw):
+        names = []
+        for pattern in files:
+            matched = sorted(glob.glob(pattern)) or [pattern]
+            names.extend(n for n in matched if n not in names)
+        self.files = names
+        self.workers = workers
+        self.sinks = list(sinks)
+        self.progress = progress
+        self.kw = kw
+
+        self.recno = 0
+        self.selected = 0
+        self.counter = Counter()
+        self.oldest = None
+        self.latest = None
+        self.results = []   # (fname, pid, seconds, recno, selected) per file
+
+    def run(self):
+        """ read all files and merge the results
+
+            :returns: self
+        """
+        protos = [copy.deepcopy(sink) for sink in self.sinks]  # before merging
+        initargs = (self.kw, protos, self.progress)
+        if self.workers > 0:
+            pool = multiprocessing.Pool(self.workers, _initworker, initargs)
+            try:
+                self._merge(pool.imap(_runfile, enumerate(self.files)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            _initworker(*initargs)
+            self._merge(_runfile(job) for job in enumerate(self.files))
+        for sink in self.sinks:
+            sink.close(self)
+        return self
+
+    def _merge(self, results):
+        for fname, pid, secs, recno, selected, counter, oldest, latest, \
+                partials in results:
+            if self.progress:
+                print('[%d] %s: %d records %.2f s %.0f rec/s' % (
+                    pid, fname, recno, secs, recno / max(secs, 1e-6)))
+            self.results.append((fname, pid, secs, recno, selected))
+            self.recno += recno
+            self.selected += selected
+            self.counter.update(counter)
+            if oldest and (self.oldest is None or oldest < self.oldest):
+                self.oldest = oldest
+            if latest and (self.latest is None or latest > self.latest):
+                self.latest = latest
+            for sink, partial in zip(self.sinks, partials):
+                sink.merge(partial)
+
+    def stats(self, verbose=1):
+        """ print statistics of records read """
+        print('\nSMF files processed %d records in %d files' % (
+            self.recno, len(self.files)))
+        for fname, pid, secs, recno, selected in self.results:
+            print('    %-40s %10d records %10d selected' % (fname, recno, selected))
+        if self.oldest:
+            print('\n    oldest record %s' % i2dt(*self.oldest))
+        if self.latest:
+            print('\n    latest record %s' % i2dt(*self.latest))
+        if verbose & 1:
+            print('\nRecord counts per SMF type:')
+            for smftyp, smfcnt in sorted( self.counter.items() ):
+                print('SMF%-3d %6d' % (smftyp, smfcnt))
+
+
+
 if __name__ == "__main__":
     import sys
     # import doctest
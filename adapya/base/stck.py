@@ -5,14 +5,27 @@ stck - STCK timestamp format conversion routines
 The module stck.py contains functions for converting timestamp
 values in STCK format (used on IBM mainframe computers).
 
+stck2micros(), stck2datetimes() and stck2iso() convert many STCK or
+STCKE values at once with integer arithmetic.
+
+sstck() and sstckd() format the date and time of a second once:
+the strings are kept in bounded caches (see Memo) as consecutive
+timestamps in sorted data mostly share the same second.
+
+Leap seconds are looked up by bisect in tables of the leap second
+boundaries (see StckContext).
+
 
 """
 __date__='$Date: 2023-12-01 00:54:33 +0100 (Fri, 01 Dec 2023) $'
 __revision__='$Rev: 1072 $'
 
 from datetime import datetime, timedelta, tzinfo
+import calendar
+import struct
 import time
-from adapya.base.dtconv import utc2sec,sec2utc,UTC1900
+from bisect import bisect_right
+from adapya.base.dtconv import utc2micro,utc2sec,sec2utc,UTC1900
 
 sec1970=2208988800  # 2208988800L (w/o leap secs)
 secyear=int(365*24*3600)
@@ -63,13 +76,20 @@ def leap4dt(dt):
     27
 
     """
-    leapsec=0
-    for leapdate, leaps in leapseconds:
-        if dt >= leapdate:
-            leapsec = leaps
-        else:
-            break
-    return leapsec
+    return LEAPCOUNTS[bisect_right(LEAPDATES, dt)]
+
+MICROS1900 = utc2micro(*UTC1900)
+
+# Leap second tables for bisect: LEAPCOUNTS[i] are the leap seconds
+# at and after the i-th boundary (LEAPCOUNTS[0] before the first).
+# The boundaries are datetimes (LEAPDATES), microseconds since 1900
+# in UTC (LEAPUTC) and in the STCK domain with the leap seconds
+# included (LEAPSTCK)
+LEAPDATES = [leapdate for leapdate, leaps in leapseconds]
+LEAPCOUNTS = [0] + [leaps for leapdate, leaps in leapseconds]
+LEAPUTC = [utc2micro(d.year, d.month, d.day, 0, 0, 0, 0) - MICROS1900
+           for d in LEAPDATES]
+LEAPSTCK = [m + leaps * 10**6 for m, leaps in zip(LEAPUTC, LEAPCOUNTS[1:])]
 
 
 def csec(stcksec):
@@ -93,6 +113,48 @@ def cstckd(stckd):
     d=b-sec1970+0.0 # seconds since the epoch 1970
     return (d, c)
 
+class Memo(dict):
+    """ Memo - bounded cache of the results of a function with one
+        argument, counting hits and misses
+
+        :param func: function to compute the value of a key
+        :param maxsize: maximum number of entries; the cache is
+            cleared when full (cheap and sufficient for keys that
+            mostly repeat in sequence like the seconds of sorted
+            timestamps)
+
+    >>> m = Memo(lambda s: s * 2, maxsize=2)
+    >>> m(1), m(1), m(2), m(3), len(m)
+    (2, 2, 4, 6, 1)
+    >>> m.hits, m.misses
+    (1, 3)
+    """
+    def __init__(self, func, maxsize=4096):
+        self.func = func
+        self.maxsize = maxsize
+        self.hits = 0
+        self.misses = 0
+
+    def __call__(self, key):
+        try:
+            value = self[key]
+        except KeyError:
+            self.misses += 1
+            if len(self) >= self.maxsize:
+                self.clear()
+            value = self[key] = self.func(key)
+            return value
+        self.hits += 1
+        return value
+
+    def stats(self):
+        """ :returns: tuple of hits, misses and entries """
+        return self.hits, self.misses, len(self)
+
+# 'YYYY-MM-DD HH:MM:SS' of seconds since 1970 in local time and GMT
+isosec = Memo(lambda s: time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s)))
+isosecgmt = Memo(lambda s: time.strftime('%Y-%m-%d %H:%M:%S', time.gmtime(s)))
+
 def sstck(stck,gmt=0):
     ''' returns ISO date time string from local stck
         if gmt !=0: GMT STCK is assumed
@@ -102,11 +164,9 @@ def sstck(stck,gmt=0):
     e = stck * 1048576 // 10**6
     if e >= sec1970:
         if gmt==0:
-            return time.strftime('%Y-%m-%d %H:%M:%S',
-                         time.localtime(e-sec1970))
+            return isosec(e-sec1970)
         else:
-            return time.strftime('%Y-%m-%d %H:%M:%S',
-                         time.gmtime(e-sec1970))
+            return isosecgmt(e-sec1970)
     elif e <= secyear:
         return str(timedelta(seconds=int(e)))
     else: # earlier than 1970: can't use negative values for time functions
@@ -122,6 +182,9 @@ def sstckd(stckd,gmt=0):
     """converts long STCK time into string
     of local time and microseconds
     if gmt !=0: GMT STCK is assumed
+
+    >>> sstckd(0xD69B65300000D000, gmt=1)
+    '2019-08-21 20:01:34.711821.000'
     """
     if stckd == 0:
         return ''
@@ -129,12 +192,12 @@ def sstckd(stckd,gmt=0):
     b=a//1000000 # seconds
     c=int(a%1000000) # micro sec
     ns=int((stckd&0xfff)*1000//4096) # nsec
-    d=b-sec1970+0.0 # seconds since the epoch 1970
+    d=b-sec1970 # seconds since the epoch 1970
     if d >= 0:
         if gmt==0:
-            return time.strftime('%Y-%m-%d %H:%M:%S',time.localtime(d))+'.%6.6d.%3.3d'%(c,ns)
+            return isosec(d)+'.%6.6d.%3.3d'%(c,ns)
         else:
-            return time.strftime('%Y-%m-%d %H:%M:%S',time.gmtime(d))+'.%6.6d.%3.3d'%(c,ns)
+            return isosecgmt(d)+'.%6.6d.%3.3d'%(c,ns)
     elif b <= secyear:
         if b < 1000:
             return '%d.%6.6d.%3.3d' % (b,c,ns)
@@ -143,6 +206,163 @@ def sstckd(stckd,gmt=0):
         return 'stckd=%s' % hex(stckd)
 
 
+#
+# Batch conversion of STCK/STCKE values
+#
+MICROS1970 = sec1970 * 10**6    # microseconds 1900-01-01 to 1970-01-01
+HOURMICROS = 3600 * 10**6
+_epoch = datetime(1970, 1, 1)
+
+def _stckvalues(stcks, stcke=0):
+    """ :returns: iterable of STCK values from sequence of integers
+        or from buffer of concatenated 8 (or 16 for STCKE) byte values
+        with the STCKE epoch index added as bits 64..71
+    """
+    if isinstance(stcks, (bytes, bytearray, memoryview)):
+        if stcke:
+            return ((epx << 64) | tod for epx, tod in
+                    struct.iter_unpack('!BQ7x', stcks))
+        return (v for v, in struct.iter_unpack('!Q', stcks))
+    return stcks
+
+class StckContext(object):
+    """ StckContext - conversion context of STCK values that can be
+        reused for many batches
+
+        :param gmt: 1 - UTC, 0 - local time; the time zone offset is
+            determined once per hour and kept in offsets
+        :param leapsec: True - STCK values include leap seconds
+
+    The leap seconds are found by bisect of integers in the leap
+    second tables LEAPSTCK (STCK to UTC) or LEAPUTC (UTC to STCK)
+    without creating datetime objects.
+
+    >>> ctx = StckContext(gmt=1, leapsec=True)
+    >>> ctx.micros(ctx.tostck(datetime(2017, 1, 1))) == 1483228800 * 10**6
+    True
+    >>> '%X' % ctx.tostck(datetime(2019, 8, 21, 20, 1, 7, 711808))
+    'D69B653000000000'
+    """
+    def __init__(self, gmt=0, leapsec=False):
+        self.gmt = gmt
+        self.leapsec = leapsec
+        self.offsets = {}   # hour since 1970: time zone offset
+
+    def _tzoffset(self, hour):
+        """ :returns: offset in microseconds of local time to UTC
+            for hour (hours since 1970)
+        """
+        secs = hour * 3600
+        if secs < 0:
+            return 0
+        return (calendar.timegm(time.localtime(secs)) - secs) * 10**6
+
+    def micros(self, stck):
+        """ :returns: microseconds since 1970 of STCK value stck
+            or None for 0
+        """
+        return self.convert((stck,))[0]
+
+    def tostck(self, dt):
+        """ :returns: STCK value of UTC datetime dt """
+        m = utc2micro(dt.year, dt.month, dt.day, dt.hour, dt.minute,
+                      dt.second, dt.microsecond) - MICROS1900
+        if self.leapsec:
+            m += LEAPCOUNTS[bisect_right(LEAPUTC, m)] * 10**6
+        return m << 12
+
+    def convert(self, stcks, stcke=0):
+        """ Convert STCK values to microseconds since 1970-01-01
+
+            :param stcks: sequence of STCK integers or bytes-like buffer
+                (see stck2micros())
+            :param stcke: 1 - buffer has STCKE values
+
+            :returns: list of integers; None for STCK value 0
+        """
+        leapsec = self.leapsec
+        gmt = self.gmt
+        offsets = self.offsets
+        res = []
+        for v in _stckvalues(stcks, stcke):
+            if not v:
+                res.append(None)
+                continue
+            m = v >> 12
+            if leapsec:
+                m -= LEAPCOUNTS[bisect_right(LEAPSTCK, m)] * 10**6
+            m -= MICROS1970
+            if not gmt:
+                hour = m // HOURMICROS
+                off = offsets.get(hour)
+                if off is None:
+                    off = offsets[hour] = self._tzoffset(hour)
+                m += off
+            res.append(m)
+        return res
+
+def stck2micros(stcks, gmt=0, leapsec=False, stcke=0, context=None):
+    """ Convert STCK values to microseconds since 1970-01-01 (epoch)
+
+        :param stcks: sequence of STCK integers (e.g. list or array('Q'))
+            or bytes-like buffer of concatenated 8 byte STCK values
+            or 16 byte STCKE values
+        :param gmt: 1 - result is UTC, 0 - local time; the time zone
+            offset is determined once per hour
+        :param leapsec: True - STCK values include leap seconds
+            which are subtracted
+        :param stcke: 1 - buffer has STCKE values
+        :param context: StckContext to reuse for several calls
+            instead of gmt and leapsec
+
+        :returns: list of integers; None for STCK value 0
+
+    >>> stck2micros([0xD69B653000000000, 0], gmt=1)
+    [1566417694711808, None]
+    """
+    if context is None:
+        context = StckContext(gmt=gmt, leapsec=leapsec)
+    return context.convert(stcks, stcke)
+
+def stck2datetimes(stcks, gmt=0, leapsec=False, stcke=0, context=None):
+    r""" Convert STCK values to datetime objects (see stck2micros())
+
+        :returns: list of naive datetimes; None for STCK value 0
+
+    >>> stck2datetimes(b'\xd6\x9b\x65\x30\x00\x00\x00\x00', gmt=1)
+    [datetime.datetime(2019, 8, 21, 20, 1, 34, 711808)]
+    """
+    return [None if m is None else _epoch + timedelta(microseconds=m)
+            for m in stck2micros(stcks, gmt=gmt, leapsec=leapsec, stcke=stcke,
+                                 context=context)]
+
+def stck2iso(stcks, gmt=0, leapsec=False, stcke=0, sep=' ', context=None):
+    """ Convert STCK values to ISO strings 'YYYY-MM-DD HH:MM:SS.ffffff'
+        (see stck2micros()); the date and hour part is formatted
+        once per hour
+
+        :returns: list of strings; '' for STCK value 0
+
+    >>> stck2iso([0xD69B653000000000, 0xD69B65300000D000], gmt=1, sep='T')
+    ['2019-08-21T20:01:34.711808', '2019-08-21T20:01:34.711821']
+    """
+    prefixes = {}   # hour: 'YYYY-MM-DD HH:'
+    res = []
+    for m in stck2micros(stcks, gmt=gmt, leapsec=leapsec, stcke=stcke,
+                         context=context):
+        if m is None:
+            res.append('')
+            continue
+        hour, r = divmod(m, HOURMICROS)
+        prefix = prefixes.get(hour)
+        if prefix is None:
+            prefix = prefixes[hour] = (_epoch + timedelta(hours=hour)).strftime(
+                '%Y-%m-%d' + sep + '%H:')
+        mm, r = divmod(r, 60*10**6)
+        ss, us = divmod(r, 10**6)
+        res.append('%s%02d:%02d.%06d' % (prefix, mm, ss, us))
+    return res
+
 
 # some helpers for stimet() function
 class Utc(tzinfo):   # helper class for simple UTC timezone display
@@ -173,22 +393,19 @@ def stimet(timet):
 def stckdnow(leapsec=False):
     return utc2stckd(leapsec=leapsec)
 
-def utc2stckd(dt=datetime.utcnow(),leapsec=False):
+def utc2stckd(dt=None,leapsec=False):
     """ convert a datetime to STCK format
 
-        :param dt: datetime value to convert to STCK (detault now)
+        :param dt: datetime value to convert to STCK (default now)
         :param leapsec: if True add in leap seconds relevant for
             the datetime dt
     """
-    from adapya.base.dtconv import utc2micro,UTC1900
-
-    leap =  10**6 * leap4dt(dt) if leapsec else 0
-
-    microsecs = utc2micro(dt.year,dt.month,dt.day,dt.hour,dt.minute,
-             dt.second,dt.microsecond) - utc2micro(*UTC1900) \
-             + leap
-    return microsecs*2**12
+    if dt is None:
+        dt = datetime.utcnow()
+    return (_leapctx if leapsec else _utcctx).tostck(dt)
 
+_utcctx = StckContext(gmt=1)
+_leapctx = StckContext(gmt=1, leapsec=True)
 
 
 if __name__=='__main__':
@@ -67,3 +67,27 @@ dump.dump(abuf,header='abuf')
 print( "str2ebc('ABC'):         ",hexlify(conv.str2ebc('ABC')) )
 print( "str2asc(b'\\xC1\\xC2\\xC3'):",hexlify(conv.str2asc(b'\xC1\xC2\xC3')) )
 
+
+
+def test_asc2ebc_roundtrip():
+    assert abuf.raw == tbuf.raw
+    assert ebuf.raw == conv.tt819_37
+    ba = bytearray(b'ABC')
+    conv.asc2ebc(ba, 0, 3)
+    assert ba == bytearray(b'\xc1\xc2\xc3')
+
+
+def test_convert():
+    allbytes = bytes(bytearray(range(256)))
+    for ecs in (37, 500):
+        codec = 'cp%03d' % ecs
+        assert conv.convert(allbytes, ecs, 819) == allbytes.decode(codec).encode('latin_1')
+        assert conv.convert(allbytes.decode(codec).encode('latin_1'), 819, ecs) == allbytes
+    # 1141 and 1047 have no Python codec: derived from precompiled tables
+    assert conv.convert(b'\x9f', 1141, 1252) == b'\x80'   # euro sign
+    assert conv.convert(b'\x80', 1252, 1141) == b'\x9f'
+    assert conv.convert(conv.convert(allbytes, 1047, 500), 500, 1047) == allbytes
+    assert conv.convert(bytearray(b'\x7c'), 273, 37) == bytearray(b'\xb5')
+    assert conv.convert(memoryview(b'\xc1\xc2'), 37, 819) == b'AB'
+    assert conv.convert(u'€'.encode('cp1252'), 1252, 819) == b'\x1a'   # SUB
+    assert conv.gettt(273, 500) is conv.gettt(273, 500)
@@ -0,0 +1,61 @@
+"""Test Datamap.diff() comparing two buffers field by field
+"""
+from adapya.base.defs import Abuf
+from adapya.base.datamap import Datamap, Int2, Uint1, String, Packed, \
+    Periodic, Filler, NETWORKBO
+
+
+def test_diff_fixed():
+    g = Datamap('fixed', String('foo', 2, occurs=3), Filler('res', 2),
+                Packed('pac', 2), Int2('bar'), byteOrder=NETWORKBO)
+    # invalid packed data: unchanged fields must not be unpacked
+    a = b'abKIyz\x00\x00zz\x00\x11'
+    b = Abuf(len(a))
+    b.value = b'abKJyz\xff\xffzz\x00\x12'
+    assert g.diff(a, b) == [('foo[1]', 'KI', 'KJ'), ('bar', 17, 18)]
+    assert g.diff(a, a) == []
+    assert g.diff(b'..' + a, b'..' + a[:-1] + b'\x13', offset=2) == [('bar', 17, 19)]
+
+
+def test_diff_variable_occurrences():
+    g = Datamap('pemap',
+                Int2('i1'),
+                Uint1('pe_count'),
+                Periodic(Datamap('pe', String('ps', 2), Int2('pi'), byteOrder=NETWORKBO),
+                         occurs=lambda: g.pe_count),
+                Periodic(Datamap('qe', String('qs', 3), Uint1('qi')), occurs=2),
+                Uint1('mu_count'),
+                String('mu', 2, occurs=lambda: g.mu_count),
+                Int2('i2'), byteOrder=NETWORKBO)
+    a = b'\x00\x11\x03ab\x00\x01KI\x00\x02yz\x00\x03pa1\x01pa2\x02\x01Ma\x00\x22'
+    b = b'\x00\x11\x02ab\x00\x01KJ\x00\x02pa1\x01pa3\x02\x02MaMe\x00\x22'
+    assert g.diff(a, b) == [
+        ('pe_count', 3, 2),
+        ('pe[1].ps', 'KI', 'KJ'),
+        ('pe[2].ps', 'yz', None),
+        ('pe[2].pi', 3, None),
+        ('qe[1].qs', 'pa2', 'pa3'),
+        ('mu_count', 1, 2),
+        ('mu[1]', None, 'Me')]
+
+    # datamap keeps its own buffer and layout
+    g.buffer = Abuf(len(a))
+    g.buffer.value = a
+    g.prepare()
+    g.diff(a, b)
+    assert g.pe_count == 3 and g.pe[2].ps == 'yz' and g.i2 == 0x22
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -0,0 +1,69 @@
+"""Test that the dtfast conversions are identical to the dtconv
+functions for the years 0001 to 9999
+"""
+import random
+from datetime import date, datetime
+
+from adapya.base import dtconv, dtfast
+
+NATDATE1 = 365          # 0001-01-01
+NATDATE9999 = 3652423   # 9999-12-31
+
+
+def test_natdate_full_range():
+    # all days of the lookup table and its borders, other days sampled
+    # as they are converted by dtconv.jdn2greg() anyway
+    first = date(dtfast.TABLEYEARS[0], 1, 1).toordinal() + 364
+    last = date(dtfast.TABLEYEARS[1], 1, 1).toordinal() + 364
+    nds = list(range(first - 2, last + 2)) + list(range(NATDATE1, NATDATE9999+1, 7))
+    nds.append(NATDATE9999)
+    assert list(map(dtfast.natdate2date, nds)) == list(map(dtconv.natdate2date, nds))
+
+
+def test_nattime():
+    rng = random.Random(1)
+    day = 864000    # NATTIME units per day
+    nts = [rng.randrange(NATDATE1*day, (NATDATE9999+1)*day) for i in range(50000)]
+    nts += [NATDATE1*day, (NATDATE9999+1)*day - 1, 730484*day - 1, 730484*day]
+    for nt in nts:
+        assert dtfast.nattime2timestamp(nt) == dtconv.nattime2timestamp(nt), nt
+    assert dtfast.nattimes(nts) == [datetime(*dtconv.nattime2timestamp(nt)) for nt in nts]
+
+
+def test_natdates():
+    nds = list(range(NATDATE1, NATDATE9999+1, 997)) + [NATDATE9999, 0]
+    assert dtfast.natdates(nds) == [
+        date(*dtconv.natdate2date(nd)) if nd else None for nd in nds]
+
+
+def test_str2dt():
+    rng = random.Random(2)
+    samples = ['20160229115513', '00010101000000', '99991231235959',
+               '20160229115513123456', '123', '', '2016022911551', '201602291155131']
+    for i in range(10000):
+        dt = datetime(rng.randrange(1, 10000), rng.randrange(1, 13), rng.randrange(1, 29),
+                      rng.randrange(24), rng.randrange(60), rng.randrange(60),
+                      rng.randrange(10**6))
+        samples.append(dt.strftime('%Y%m%d%H%M%S').rjust(14, '0'))
+        samples.append(dt.strftime('%Y%m%d%H%M%S').rjust(14, '0') + '%06d' % dt.microsecond)
+    for s in samples:
+        for ds in (s, s.encode('ascii'), bytearray(s.encode('ascii'))):
+            assert dtfast.str2dt(ds) == dtconv.str2dt(ds), ds
+    assert dtfast.str2dt(20160229115513) == dtconv.str2dt(20160229115513)
+    assert dtfast.datetimes([b'20160229115513', b'', b'00000000000000']) == [
+        datetime(2016, 2, 29, 11, 55, 13), None, None]
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
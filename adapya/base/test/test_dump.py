@@ -5,7 +5,131 @@ $Rev: 740 $
 """
 from __future__ import print_function          # PY3
 
-
+import io
+import os
+import random
+import shutil
+import tempfile
+
+from adapya.base import dump as dumpmod
+from adapya.base.dump import blockdiff, diffbin, diffbinfile, dump, dumpfile, dumpto
+
+
+def dumped(buf, **kw):
+    f = io.StringIO()
+    dump(buf, fd=f, **kw)
+    return f.getvalue()
+
+
+def test_dump_suppressed():
+    buf = b'\x00'*64 + b'ABCDEFGHIJKLMNOP' + b'\x00'*40
+    out = dumped(buf, header=None, startaddr=0x1000, prefix='A')
+    assert out.splitlines() == [
+        'A 00001000 00000000 00000000 00000000 00000000 ................ ................',
+        'A      3 identical line(s) suppressed',
+        'A 00001040 41424344 45464748 494A4B4C 4D4E4F50 ABCDEFGHIJKLMNOP ...........<(+.&',
+        'A 00001050 00000000 00000000 00000000 00000000 ................ ................',
+        'A      1 identical line(s) suppressed',
+        'A 00001070 00000000 00000000                   ........         ........']
+    logged = []
+    dump(buf, log=logged.append)
+    assert logged == [dumped(buf)[:-1]]
+
+
+def test_dumpto_chunks():
+    buf = os.urandom(1000) + b'\xff'*500 + b'xyz'
+    chunks = [buf[i:i+160] for i in range(0, len(buf), 160)]
+    f = io.StringIO()
+    assert dumpto(f, chunks) == len(buf)
+    assert f.getvalue() == dumped(buf)
+
+
+def test_dumpfile():
+    buf = os.urandom(3000) + b'\x00'*3000 + os.urandom(77)
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, 'dump.bin')
+        with open(path, 'wb') as f:
+            f.write(buf)
+        f = io.StringIO()
+        assert dumpfile(path, offset=2992, length=3040, fd=f, header='H', blocksize=256) == 3040
+        assert f.getvalue() == dumped(buf[2992:6032], header='H', startaddr=2992)
+        f = io.StringIO()
+        assert dumpfile(path, offset=len(buf), fd=f) == 0
+        assert f.getvalue() == path + '\n\n\n'
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_pribles():
+    assert dumpmod.mkprible('cp037') == dumpmod.ebcpribles
+    ep = dumpmod.getprible('cp500')
+    assert dumpmod.getprible('cp500') is ep
+    assert 'cp273' in dumpmod.priblesdict      # ECS code pages precomputed
+    assert ep[0x4f:0x50] == b'!' and ep[0x5a:0x5b] == b'.'
+    assert dumped(b'\x7c\xc1', ecodec='cp273').splitlines()[1].endswith('.A')
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, 'pribles.json')
+        dumpmod.savepribles(path)
+        del dumpmod.priblesdict['cp500']
+        dumpmod.loadpribles(path)
+    finally:
+        shutil.rmtree(tmpdir)
+    assert dumpmod.priblesdict['cp500'] == ep
+
+
+def apply_ops(a, b, ops):
+    """ check that the opcodes cover a and b and rebuild b """
+    out = []
+    i = j = 0
+    for tag, i1, i2, j1, j2 in ops:
+        assert (i1, j1) == (i, j)
+        if tag == 'equal':
+            assert a[i1:i2] == b[j1:j2]
+        out.append(b[j1:j2])
+        i, j = i2, j2
+    assert (i, j) == (len(a), len(b))
+    return b''.join(out)
+
+
+def test_blockdiff_random_edits():
+    rng = random.Random(3)
+    for n in range(300):
+        a = bytes(rng.choice((0, 0x40, rng.randrange(256))) for i in range(rng.randrange(3000)))
+        b = bytearray(a)
+        for e in range(rng.randrange(5)):
+            pos, k = rng.randrange(len(b)+1), rng.randrange(200)
+            edit = rng.randrange(3)
+            if edit == 0:
+                b[pos:pos] = os.urandom(k)
+            elif edit == 1:
+                del b[pos:pos+k]
+            else:
+                b[pos:pos+k] = os.urandom(k)
+        b = bytes(b)
+        ops = list(blockdiff(a, b, block=rng.choice((4, 32)), maxwindow=rng.choice((256, 2**20))))
+        assert apply_ops(a, b, ops) == b
+
+
+def test_diffbinfile():
+    a = os.urandom(100000)
+    b = a[:5000] + b'inserted' + a[5000:60000] + a[61000:]
+    assert [op[0] for op in blockdiff(a, b)] == ['equal', 'insert', 'equal', 'delete', 'equal']
+    d = tempfile.mkdtemp()
+    try:
+        paths = [os.path.join(d, 'a.bin'), os.path.join(d, 'b.bin')]
+        for path, data in zip(paths, (a, b)):
+            with open(path, 'wb') as f:
+                f.write(data)
+        f1, f2 = io.StringIO(), io.StringIO()
+        diffbin(a, b, header1=paths[0], header2=paths[1], fd=f1)
+        diffbinfile(paths[0], paths[1], fd=f2)
+    finally:
+        shutil.rmtree(d)
+    assert f1.getvalue() == f2.getvalue()
+    assert 'INS A+1388(0000) vs. B+1388(0008)' in f1.getvalue()
+    assert 'Simliarity between objects is 99.5%' in f1.getvalue()
 
 
 if __name__=='__main__':
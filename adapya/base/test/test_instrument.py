@@ -0,0 +1,68 @@
+"""Test counters, timers and histograms of the instrument module"""
+import time
+
+from adapya.base.instrument import Histogram, Instruments
+
+
+def test_disabled():
+    ins = Instruments()
+    ins.count('a')
+    ins.observe('h', 5)
+    with ins.timer('t'):
+        pass
+    f = ins.timed('f')(lambda x: x + 1)
+    assert f(1) == 2
+    assert ins.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+def test_timers():
+    ins = Instruments(enabled=True)
+
+    @ins.timed()
+    def sleeper(t):
+        time.sleep(t)
+        return t
+
+    assert sleeper(0.002) == 0.002
+    for i in range(3):
+        with ins.timer('block'):
+            ins.count('loops')
+    snap = ins.snapshot()
+    assert snap['counters'] == {'loops': 3}
+    s = snap['histograms']['sleeper']
+    assert s['count'] == 1 and s['min'] >= 2 * 10**6
+    assert s['p50'] >= s['min'] and s['p99'] > s['max'] / 2
+    assert snap['histograms']['block']['count'] == 3
+
+    lines = []
+    ins.report(lines.append)
+    assert lines[0].startswith('loops') and len(lines) == 3
+    ins.reset()
+    assert ins.snapshot() == {'counters': {}, 'histograms': {}}
+
+
+def test_histogram_merge():
+    a, b = Histogram(), Histogram()
+    for v in range(100):
+        a.add(v)
+    for v in range(1000, 1100):
+        b.add(v)
+    a.merge(b)
+    assert (a.count, a.min, a.max) == (200, 0, 1099)
+    assert a.total == sum(range(100)) + sum(range(1000, 1100))
+    assert a.percentile(50) == 128 and a.percentile(90) == 2048
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
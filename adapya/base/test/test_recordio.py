@@ -0,0 +1,390 @@
+"""Test the record reading and writing functions of the recordio
+and arecordio modules
+
+The asyncio functions are exercised over local socket pairs
+"""
+from __future__ import print_function          # PY3
+
+import asyncio
+import os
+import shutil
+import socket
+import struct
+import tempfile
+from io import BytesIO
+
+from adapya.base.recordio import readrec, writerec, followrec, Checkpoint
+from adapya.base.recordio import unpackfixed
+from adapya.base.datamap import Datamap, Int4, Uint2, Double, Filler, \
+    NETWORKBO
+from adapya.base.recordio import aread_records, awrite_records, awriterec
+
+
+def rdwrec(data, seg=0):
+    """ return record with RDW header """
+    n = len(data)+4
+    return bytes(bytearray((n>>8, n&0xff, seg, 0))) + data
+
+
+def bdwblock(*records):
+    """ return block of RDW records with BDW header """
+    return rdwrec(b''.join(records))
+
+
+records = [b'', b'A', b'record 3', 40000*b'x', b'last record']
+
+
+_unused = []     # keep unused stream ends from being closed
+
+
+def streampair(limit=2**16):
+    """ return coroutine for stream reader and writer connected
+        by a local socket pair
+    """
+    async def _pair():
+        s1, s2 = socket.socketpair()
+        reader, w1 = await asyncio.open_connection(sock=s1, limit=limit)
+        r2, writer = await asyncio.open_connection(sock=s2)
+        _unused.append((w1, r2))
+        return reader, writer
+    return _pair()
+
+
+async def _roundtrip(recs, recform='RDW', limit=2**16, **kw):
+    reader, writer = await streampair(limit=limit)
+
+    async def produce():
+        await awrite_records(writer, recs, recform=recform)
+        writer.close()
+
+    result = []
+    async def consume():
+        async for rec in aread_records(reader, recform=recform, **kw):
+            result.append(rec)
+
+    await asyncio.gather(produce(), consume())
+    return result
+
+
+def test_async_rdw_roundtrip():
+    assert asyncio.run(_roundtrip(records)) == records
+
+
+def test_async_excl4_roundtrip():
+    assert asyncio.run(_roundtrip(records, recform='EXCL4')) == records
+
+
+def test_async_skip_numrec():
+    assert asyncio.run(_roundtrip(records, skiprec=1, numrec=2)) == records[1:3]
+
+
+def test_async_segmented_readable_by_readrec():
+    """ spanned records written by awriterec() can be read by readrec() """
+    class Sink(object):
+        def __init__(self):
+            self.f = BytesIO()
+        def write(self, b):
+            self.f.write(b)
+        async def drain(self):
+            pass
+
+    sink = Sink()
+    async def write():
+        for rec in records[1:]:     # readrec() returns empty records twice
+            await awriterec(sink, rec)
+    asyncio.run(write())
+
+    sink.f.seek(0)
+    assert list(readrec(sink.f, recform='RDW')) == records[1:]
+
+
+def test_async_bdw_and_rdwplus():
+    data = bdwblock(rdwrec(b'abc'), rdwrec(b'de', seg=1)) + \
+           bdwblock(rdwrec(b'fg', seg=3), rdwrec(b'hi', seg=2), rdwrec(b'j'))
+
+    async def read(recform):
+        reader, writer = await streampair()
+        writer.write(data)
+        writer.close()
+        return [r async for r in aread_records(reader, recform=recform)]
+
+    assert asyncio.run(read('BDW')) == [b'abc', b'defghi', b'j']
+    assert asyncio.run(read('BDW+')) == [rdwrec(b'abc'),
+        rdwrec(b'de', seg=1)+b'fghi', rdwrec(b'j')]
+
+
+def test_async_incomplete_record():
+    async def read():
+        reader, writer = await streampair()
+        writer.write(rdwrec(b'complete') + rdwrec(b'truncated')[:-3])
+        writer.close()
+        return [r async for r in aread_records(reader)]
+
+    try:
+        asyncio.run(read())
+    except asyncio.IncompleteReadError as e:
+        assert e.partial == b'trunca'
+    else:
+        assert 0, 'IncompleteReadError expected'
+
+
+def test_async_multiplex():
+    """ one event loop serves several record streams concurrently
+        with small reader buffers (backpressure)
+    """
+    streams = [[(b'%d:%d ' % (s, i)) * (i % 50) for i in range(300)]
+               for s in range(8)]
+    async def multiplex():
+        return await asyncio.gather(
+            *[_roundtrip(recs+records, limit=1024) for recs in streams])
+    assert asyncio.run(multiplex()) == [recs+records for recs in streams]
+
+
+def test_writerec_readrec():
+    f = BytesIO()
+    for rec in records[1:3]:
+        writerec(f, rec, recform='RDW')
+    f.seek(0)
+    assert list(readrec(f, recform='RDW')) == records[1:3]
+
+
+def test_followrec_growing_file():
+    """ partial records are not returned until complete """
+    data = rdwrec(b'one') + rdwrec(b'two', seg=1) + rdwrec(b'+2', seg=2) + \
+           rdwrec(b'three')
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, 'grow.rdw')
+        ckpath = os.path.join(tmpdir, 'grow.ckp')
+        with open(path, 'wb') as w, open(path, 'rb') as f:
+            w.write(data[:10]); w.flush()
+            recs = followrec(f, checkpoint=ckpath, poll=0.001, idle=0.01)
+            assert next(recs) == b'one'
+            assert list(recs) == []     # 'two' is incomplete
+            w.write(data[10:-3]); w.flush()
+            recs = followrec(f, checkpoint=ckpath, poll=0.001, idle=0.01)
+            assert list(recs) == [b'two+2']
+            w.write(data[-3:]); w.flush()
+            recs = followrec(f, checkpoint=ckpath, poll=0.001, idle=0.01)
+            assert list(recs) == [b'three']
+
+        ckp = Checkpoint(ckpath)
+        assert (ckp.offset, ckp.recno) == (len(data), 3)
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_followrec_resume_bdw():
+    """ restart within a block returns unprocessed records only """
+    data = bdwblock(rdwrec(b'a'), rdwrec(b'b'), rdwrec(b'c')) + \
+           bdwblock(rdwrec(b'd'))
+    tmpdir = tempfile.mkdtemp()
+    try:
+        path = os.path.join(tmpdir, 'bdw')
+        ckpath = os.path.join(tmpdir, 'bdw.ckp')
+        with open(path, 'wb') as w:
+            w.write(data)
+
+        with open(path, 'rb') as f:
+            recs = followrec(f, recform='BDW', checkpoint=ckpath, idle=0)
+            assert next(recs) == b'a'
+            assert next(recs) == b'b'   # 'a' processed
+            recs.close()                # 'b' is returned again after restart
+        assert Checkpoint(ckpath).recno == 1
+
+        with open(path, 'rb') as f:
+            assert list(followrec(f, recform='BDW', checkpoint=ckpath,
+                                  idle=0)) == [b'b', b'c', b'd']
+        assert not os.path.exists(ckpath + '.tmp')
+    finally:
+        shutil.rmtree(tmpdir)
+
+
+def test_followrec_excl4_numrec():
+    f = BytesIO()
+    for rec in records:
+        f.write(struct.pack('=L', len(rec)) + rec)
+    f.seek(0)
+    assert list(followrec(f, recform='EXCL4', numrec=3, idle=0)) == records[:3]
+
+
+def test_select_rdw():
+    """ records not selected are not read nor counted for numrec """
+    recs = [b'\x01abc', b'\x02de', b'\x01' + 30000*b'f', b'\x03g', b'\x01h']
+    f = BytesIO()
+    for rec in recs:
+        writerec(f, rec, recform='RDW')   # long record is not segmented
+    f.seek(0)
+    assert list(readrec(f, recform='RDW', select={0: 1})) == \
+        [recs[0], recs[2], recs[4]]
+    f.seek(0)
+    assert list(readrec(f, recform='RDW+', select={4: (2, 3)}, numrec=2)) == \
+        [rdwrec(recs[1]), rdwrec(recs[3])]
+    f.seek(0)
+    assert list(readrec(f, recform='RDW', select={0: 1}, skiprec=1,
+                        numrec=1)) == [recs[2]]
+    f.seek(0)
+    assert list(readrec(f, recform='RDW', select={0: 1}, maxread=4)) == \
+        [recs[0], recs[2]]
+    f.seek(0)
+    assert list(readrec(f, recform='RDW', select={0: 1}, skiprec=1,
+                        maxread=1)) == []
+    f.seek(0)
+    assert list(readrec(f, recform='RDW', select=lambda h: h[1:3] == b'de',
+                        selhdr=3)) == [recs[1]]
+
+
+def test_select_segmented_bdw():
+    data = bdwblock(rdwrec(b'abc'), rdwrec(b'de', seg=1)) + \
+           bdwblock(rdwrec(b'fg', seg=3), rdwrec(b'hi', seg=2), rdwrec(b'aj'))
+    assert list(readrec(BytesIO(data), recform='BDW', select={0: b'a'})) == \
+        [b'abc', b'aj']
+    assert list(readrec(BytesIO(data), recform='BDW', select={0: b'd'})) == \
+        [b'defghi']
+    assert list(readrec(BytesIO(data), recform='BDW', select={0: b'a'},
+                        numrec=1)) == [b'abc']
+    assert list(readrec(BytesIO(data), recform='BDW', select={0: b'a'},
+                        maxread=2)) == [b'abc']
+
+
+def test_select_excl4():
+    f = BytesIO()
+    for rec in records:
+        f.write(struct.pack('=L', len(rec)) + rec)
+    f.seek(0)
+    assert list(readrec(f, recform='EXCL4', select={0: {b'l', b'r'}})) == \
+        [records[2], records[4]]
+    f.seek(0)
+    assert list(readrec(f, recform='EXCL4', select={0: {b'l', b'r'}},
+                        numrec=1)) == [records[2]]
+    f.seek(0)
+    assert list(readrec(f, recform='EXCL4', select={0: {b'l', b'r'}},
+                        maxread=4)) == [records[2]]
+
+
+def test_into_recycling():
+    """ one buffer is reused for all records including segmented ones """
+    data = bdwblock(rdwrec(b'abc'), rdwrec(b'de', seg=1)) + \
+           bdwblock(rdwrec(b'fg', seg=3), rdwrec(b'hi', seg=2), rdwrec(b'j'))
+    buf = bytearray(4)
+    recs = []
+    for rec in readrec(BytesIO(data), recform='BDW+', into=buf):
+        assert isinstance(rec, memoryview)
+        recs.append(bytes(rec))
+    assert recs == [rdwrec(b'abc'), rdwrec(b'de', seg=1)+b'fghi', rdwrec(b'j')]
+
+    f = BytesIO()
+    for rec in records[1:]:
+        writerec(f, rec[:30000], recform='RDW')
+    f.seek(0)
+    views = list(readrec(f, recform='RDW', into=1))
+    assert bytes(views[0]) == records[-1][:1]   # valid until next record
+    assert len(set(id(v.obj) for v in views)) == 1
+
+    f = BytesIO()
+    for rec in records:
+        f.write(struct.pack('=L', len(rec)) + rec)
+    f.seek(0)
+    assert [bytes(r) for r in readrec(f, recform='EXCL4', into=1)] == records
+
+
+fixmap = Datamap('fixed', Int4('i'), Filler('f', 2), Uint2('u'), Double('d'),
+                 byteOrder=NETWORKBO)
+
+
+def fixedfile(n, lrecl=20):
+    return BytesIO(b''.join(
+        struct.pack('!l2xHd', -j, j & 0xffff, j/2.) + (lrecl-16)*b' '
+        for j in range(n)))
+
+
+def test_fixed_records():
+    f = fixedfile(3000)
+    recs = list(readrec(f, recform='FB', lrecl=20, skiprec=10, numrec=2000))
+    assert len(recs) == 2000
+    assert isinstance(recs[0], memoryview)
+    assert bytes(recs[-1]) == struct.pack('!l2xHd', -2009, 2009, 1004.5) + 4*b' '
+    f.seek(0)
+    assert len(list(readrec(f, recform='F', lrecl=20, select={6: b'\x00\x05'}))) == 1
+    f.seek(0)
+    recs = list(readrec(f, recform='FB', lrecl=20, numrec=2,
+                        select=lambda h: h[7] & 1, selhdr=8))
+    assert [bytes(r[6:8]) for r in recs] == [b'\x00\x01', b'\x00\x03']
+    f.seek(0)
+    recs = list(readrec(f, recform='FB', lrecl=20, skiprec=1, maxread=3,
+                        select=lambda h: h[7] & 1, selhdr=8))
+    assert [bytes(r[6:8]) for r in recs] == [b'\x00\x01', b'\x00\x03']
+
+
+def test_fixed_incomplete():
+    f = BytesIO(45*b'x')
+    try:
+        list(readrec(f, recform='F', lrecl=20))
+    except BaseException as e:
+        assert 'Incomplete last record of 5 bytes' in str(e)
+    else:
+        assert 0, 'BaseException expected'
+
+
+def test_unpackfixed():
+    assert fixmap.structformat(20) == '!l2xHd4x'
+    f = fixedfile(100000)
+    values = list(unpackfixed(f, fixmap, lrecl=20))
+    assert len(values) == 100000
+    assert values[77777] == (-77777, 77777 & 0xffff, 77777/2.)
+    f.seek(0)
+    assert list(unpackfixed(f, fixmap, lrecl=20, skiprec=5, numrec=2)) == \
+        [(-5, 5, 2.5), (-6, 6, 3.0)]
+
+
+def bench(n=1000000, lrecl=20):
+    """ throughput of reading fixed length records """
+    import time
+    f = fixedfile(n, lrecl)
+    mb = n * lrecl / 2.**20
+
+    def run(name, fun):
+        f.seek(0)
+        t = time.time()
+        k = fun()
+        t = time.time() - t
+        print('%-32s %8d records %8.2f s %8.1f MB/s %10.0f rec/s' % (
+            name, k, t, mb/t, n/t))
+
+    def slices():
+        f.seek(0)
+        data = f.read()
+        return sum(1 for i in range(0, len(data), lrecl) if data[i:i+lrecl])
+
+    def datamap():
+        k = 0
+        for rec in readrec(f, recform='FB', lrecl=lrecl):
+            fixmap.buffer = rec
+            fixmap.i, fixmap.u, fixmap.d
+            k += 1
+        return k
+
+    run('manual slicing (bytes)', slices)
+    run("readrec(recform='FB')", lambda: sum(1 for r in readrec(
+        f, recform='FB', lrecl=lrecl)))
+    run('readrec + Datamap attributes', datamap)
+    run('unpackfixed', lambda: sum(1 for v in unpackfixed(f, fixmap, lrecl)))
+
+
+if __name__ == '__main__':
+    bench()
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
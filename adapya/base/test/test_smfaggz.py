@@ -0,0 +1,100 @@
+"""Test the streaming aggregation of SMF30 records in smfaggz
+"""
+from __future__ import print_function          # PY3
+
+import pickle
+from io import BytesIO
+
+from adapya.base.smfaggz import Aggregate
+from adapya.base.smfrecordz import SmfReader, SmfFiles
+from adapya.base.test.test_smfrecordz import smf30rec, smfrec, smffiles, shortsection, \
+    tempdir
+
+measures = (('records', 'count', None), ('cpu', 'sum', 'cpu'),
+            ('ziip', 'sum', 'ziip'), ('excp', 'sum', 'tep'),
+            ('mincpt', 'min', 'cpt'), ('maxcpt', 'max', 'cpt'))
+
+
+def smfdata(n=60):
+    recs = []
+    for i in range(n):
+        recs.append(smf30rec(jbn='JOB%d' % (i % 3), grp='GRP%d' % (i % 2),
+                             cpt=i, toz=100, snf=512, tep=10,
+                             dte=124045 + i // 30))
+        recs.append(smfrec(70))
+    return recs
+
+
+def aggregate(recs):
+    agg = Aggregate(keys=('date', 'grp', 'jbn'), measures=measures)
+    SmfReader(BytesIO(b''.join(recs)), rtys=(30,), sinks=[agg]).run()
+    return agg
+
+
+def test_aggregate():
+    agg = aggregate(smfdata())
+    rows = agg.rows()
+    assert len(rows) == 12 and agg.count == 60
+    assert rows[0] == (('2024-02-14', 'GRP0', 'JOB0'),
+                       [5, 0+6+12+18+24, 1000, 50, 0, 24])
+    assert rows[-1] == (('2024-02-15', 'GRP1', 'JOB2'),
+                        [5, 35+41+47+53+59, 1000, 50, 35, 59])
+
+
+def test_short_sections():
+    """ sections shorter than defined (older releases) do not contribute """
+    recs = [smf30rec(cpt=5, toz=100, snf=512, tep=10),
+            shortsection(smf30rec(cpt=1000, toz=1000, tep=20), 0x20),  # Smf30cas
+            shortsection(smf30rec(cpt=7, toz=100, tep=1000), 0x10, 8), # Smf30ura
+            shortsection(smf30rec(cpt=9, toz=100, snf=512, tep=30), 0x38),  # Smf30prf
+            shortsection(smf30rec(cpt=3, tep=40), 0x08)]   # Smf30id
+    agg = aggregate(recs)
+    assert agg.rows() == [(('2024-02-14', 'GROUP1', 'JOB1'),
+                           [4, 5+7+9, 200+100+100, 10+20+30, 5, 9]),
+                          (('2024-02-14', None, None), [1, 3, 0, 40, 3, 3])]
+
+
+def test_merge_partials():
+    recs = smfdata()
+    whole = aggregate(recs)
+    parts = [aggregate(recs[i:i+24]) for i in range(0, len(recs), 24)]
+    merged = pickle.loads(pickle.dumps(parts[0]))
+    for part in parts[1:]:
+        merged.merge(pickle.loads(pickle.dumps(part)))
+    assert merged.rows() == whole.rows()
+    assert merged.count == whole.count
+
+
+def test_function_keys():
+    agg = Aggregate(keys=(lambda rec: rec.sty,),
+                    measures=(('n', 'count', None),
+                              ('cpu', 'sum', lambda rec: 2)))
+    SmfReader(BytesIO(b''.join(smfdata(4))), rtys=(30,), sinks=[agg]).run()
+    assert agg.rows() == [((4,), [4, 8])]
+
+
+def test_smffiles_aggregate():
+    rows = []
+    with tempdir() as tmpdir:
+        pattern = smffiles(tmpdir)
+        for workers in (0, 3):
+            agg = Aggregate(keys=('sid', 'jbn'), measures=measures)
+            SmfFiles([pattern], workers=workers, rtys=(30,), sinks=[agg]).run()
+            rows.append(agg.rows())
+    assert rows[0] == rows[1] and len(rows[0]) == 28
+    assert rows[0][0] == (('SYS0', 'JOB0'), [5, 210, 0, 0, 0, 84])
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
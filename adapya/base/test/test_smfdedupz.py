@@ -0,0 +1,63 @@
+"""Test the de-duplication of SMF records in smfdedupz
+"""
+from adapya.base.smfdedupz import Dedup
+from adapya.base.smfrecordz import SmfReader, SmfFiles
+from adapya.base.test.test_smfrecordz import smf30rec, smfrecords, smfdump, tempdir
+
+
+def dumps(tmpdir, *ranges):
+    """ write one file per (n, start) range of records one minute apart
+        :returns: list of file names
+    """
+    return [smfdump(tmpdir, smfrecords(n, start, step=6000), 'dump%d.smf' % k)
+            for k, (n, start) in enumerate(ranges)]
+
+
+def test_dedup_overlap():
+    with tempdir() as tmpdir:
+        files = dumps(tmpdir, (600, 0), (300, 500), (100, 0))   # 200 + 100 duplicates
+        for capacity in (0, 1000):
+            dedup = Dedup(partition=3600, keep=24, capacity=capacity)
+            files_read = SmfFiles(files, where=dedup).run()
+            assert files_read.recno == 1000
+            assert (dedup.records, dedup.duplicates, dedup.expired) == (1000, 200, 0)
+            assert files_read.selected == 800
+
+
+def test_dedup_bounded():
+    """ only the last 2 hours are kept: the duplicates of the first
+        hours of the third dump are not detected
+    """
+    dedup = Dedup(partition=3600, keep=2)
+    with tempdir() as tmpdir:
+        SmfFiles(dumps(tmpdir, (600, 0), (300, 500), (100, 0)), where=dedup).run()
+    assert len(dedup.parts) == 2 and dedup.evicted == 12
+    assert (dedup.duplicates, dedup.expired) == (100, 100)
+
+
+def test_dedup_select():
+    """ duplicates differ from identical records in other fields """
+    recs = smfrecords(10, step=6000)
+    recs.append(smf30rec(jbn='JOB0', cpt=1, tme=360000))    # cpt differs
+    recs.append(recs[0])
+    dedup = Dedup()
+    with tempdir() as tmpdir:
+        path = smfdump(tmpdir, recs, 'd.smf')
+        assert [r.recno for r in SmfReader(path, rtys=(30,), where=dedup)] == \
+            [1, 4, 7, 10, 11]
+    assert dedup.duplicates == 1
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -0,0 +1,122 @@
+"""Test the export of SMF sections in smfexportz
+
+Run as script to compare the export throughput with printing
+the sections with dprint()
+"""
+from __future__ import print_function          # PY3
+
+import csv
+import gzip
+import json
+import os
+
+from adapya.base.smfexportz import SectionExport, KEYCOLS
+from adapya.base.smfrecordz import SmfReader, SmfFiles, Smf30id, Smf30cas
+from adapya.base.test.test_smfrecordz import smffile, smffiles, tempdir
+
+
+def export(tmpdir, n=100, **kw):
+    exp = SectionExport(tmpdir, sections=(
+        Smf30id, (Smf30cas, ('cpt', 'cps', 'toz'))), **kw)
+    SmfReader(smffile(n), sinks=[exp]).run()
+    return exp
+
+
+def test_export_csv():
+    with tempdir() as tmpdir:
+        exp = export(tmpdir)
+        assert [os.path.basename(f) for f in exp.files] == [
+            'smf30id.000.csv', 'smf30cas.000.csv']
+        assert exp.rows == 68
+        with open(exp.files[1]) as f:
+            rows = list(csv.reader(f))
+        assert rows[0] == list(KEYCOLS) + ['cpt', 'cps', 'toz']
+        assert rows[2][:4] + rows[2][6:] == ['', '4', 'SYSA', '124045', '3', '0', '0']
+        assert len(rows) == 35
+        with open(exp.files[0]) as f:
+            header = next(csv.reader(f))
+        assert header.count('jnm') == 1 and header[6:8] == ['jbn', 'pgm']
+
+
+def test_export_jsonl_gzip_rotation():
+    with tempdir() as tmpdir:
+        exp = export(tmpdir, 300, fmt='jsonl', compress=6, maxsize=4000, batch=10)
+        casfiles = [f for f in exp.files if 'smf30cas' in f]
+        assert len(casfiles) > 2
+        assert os.path.basename(casfiles[1]) == 'smf30cas.001.jsonl.gz'
+        rows = []
+        for path in casfiles:
+            with gzip.open(path, 'rt') as f:
+                rows.extend(json.loads(line) for line in f)
+        assert [r['recno'] for r in rows] == list(range(1, 301, 3))
+        assert rows[1] == {'file': '', 'recno': 4, 'sid': 'SYSA', 'dte': 124045,
+            'tme': 360003, 'jnm': rows[1]['jnm'], 'cpt': 3, 'cps': 0, 'toz': 0}
+
+
+def test_export_smffiles():
+    with tempdir() as tmpdir:
+        pattern = smffiles(tmpdir, nfiles=2, n=50)
+        for workers in (0, 2):
+            outdir = os.path.join(tmpdir, 'w%d' % workers)
+            os.mkdir(outdir)
+            exp = SectionExport(outdir, sections=((Smf30cas, ('cpt',)),))
+            SmfFiles([pattern], workers=workers, rtys=(30,), sinks=[exp]).run()
+            assert [os.path.basename(f) for f in exp.files] == [
+                'smf30cas.f000.000.csv', 'smf30cas.f001.000.csv']
+            assert exp.rows == 34
+            rows = []
+            for path in exp.files:
+                with open(path) as f:
+                    rows.extend(list(csv.reader(f))[1:])
+            assert len(rows) == 34
+            assert len(set((r[0], r[1]) for r in rows)) == 34  # file, recno
+            assert [os.path.basename(r[0]) for r in rows[::17]] == ['sys0.smf', 'sys1.smf']
+
+
+def bench(n=30000):
+    """ compare export with printing all sections by dprint() """
+    import sys
+    import time
+    from adapya.base.smfrecordz import PrintSink
+    from adapya.base.smfrecordz import Smf30pss, Smf30ura, Smf30prf
+    sections = (Smf30pss, Smf30id, Smf30ura, Smf30cas, Smf30prf)
+    f = smffile(n)
+
+    def run(name, sink):
+        f.seek(0)
+        t = time.time()
+        SmfReader(f, rtys=(30,), sinks=[sink]).run()
+        t = time.time() - t
+        print('%-24s %8.2f s %10.0f rec/s' % (name, t, n/3/t), file=sys.stderr)
+
+    stdout = sys.stdout
+    try:
+        sys.stdout = open(os.devnull, 'w')
+        run('dprint', PrintSink(verbose=2))
+    finally:
+        sys.stdout.close()
+        sys.stdout = stdout
+    for fmt in ('csv', 'jsonl'):
+        for compress in (0, 1):
+            with tempdir() as tmpdir:
+                run('export %s%s' % (fmt, ' gzip' if compress else ''),
+                    SectionExport(tmpdir, sections, fmt=fmt, compress=compress))
+
+
+if __name__ == '__main__':
+    bench()
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -0,0 +1,94 @@
+"""Test the synthetic SMF record generator smfgenz
+
+Run as script to benchmark the generator and the reader on a
+generated file
+"""
+from __future__ import print_function          # PY3
+
+import os
+from io import BytesIO
+
+from adapya.base.smfgenz import SmfGenerator
+from adapya.base.smfrecordz import SmfReader, Smf30id, Smf30cas, i2dt
+from adapya.base.test.test_smfrecordz import tempdir
+
+
+def generate(numrec=1000, recform='RDW+', seed=7, **kw):
+    f = BytesIO()
+    SmfGenerator(seed=seed, **kw).write(f, numrec, recform=recform)
+    f.seek(0)
+    return f
+
+
+def test_deterministic():
+    assert generate().getvalue() == generate().getvalue()
+    assert generate().getvalue() != generate(seed=8).getvalue()
+
+
+def test_read_generated():
+    reader = SmfReader(generate(1000, mix={(30, 4): 1, 70: 1}, rate=10,
+                                values={'jbn': ['A', 'B'], 'cpt': (5, 9)}))
+    recs = [(r.rty, r.sty, r.values(Smf30id, 'jbn'), r.values(Smf30cas, 'cpt'))
+            for r in reader]
+    assert reader.counter[30] + reader.counter[70] == len(recs) == 1000
+    assert 400 < reader.counter[30] < 600
+    for rty, sty, jbn, cpt in recs:
+        if rty == 30:
+            assert sty == 4 and jbn[0] in ('A', 'B') and 5 <= cpt[0] <= 9
+        else:
+            assert jbn is None
+    assert i2dt(*reader.oldest) == i2dt(124045, 0)
+    assert i2dt(*reader.latest) == i2dt(124045, 99*100+90)     # 10 rec/s
+
+
+def test_framing_spanned():
+    """ same records with RDW, BDW and spanned in segments """
+    def records(f, recform):
+        return [bytes(r.buffer[4:]) for r in SmfReader(f, recform=recform)]
+    kw = dict(sizes=(100, 3000), jitter=50)
+    expected = records(generate(300, **kw), 'RDW+')
+    for recform, maxseg in (('RDW+', 500), ('BDW+', 32756), ('BDW+', 1000)):
+        f = BytesIO()
+        SmfGenerator(seed=7, **kw).write(f, 300, recform=recform,
+                                         blksize=6000, maxseg=maxseg)
+        f.seek(0)
+        assert records(f, recform) == expected
+
+
+def bench(numrec=1000000):
+    """ write and read a generated file """
+    import time
+    with tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'bench.smf')
+        for recform in ('RDW+', 'BDW+'):
+            t = time.time()
+            with open(path, 'wb') as f:
+                size = SmfGenerator(seed=1).write(f, numrec, recform=recform)
+            t = time.time() - t
+            print('generate %s %8d records %8.1f MB %8.1f MB/s %10.0f rec/s' % (
+                recform, numrec, size/2.**20, size/2.**20/t, numrec/t))
+            t = time.time()
+            for rec in SmfReader(path, recform=recform):
+                pass
+            t = time.time() - t
+            print('read     %s %8d records %8.1f MB %8.1f MB/s %10.0f rec/s' % (
+                recform, numrec, size/2.**20, size/2.**20/t, numrec/t))
+
+
+if __name__ == '__main__':
+    bench()
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -0,0 +1,97 @@
+"""Test the sparse time index of SMF dumps in smfindexz
+with synthetic SMF records that are roughly ordered by time
+"""
+import os
+from datetime import datetime
+
+from adapya.base.smfindexz import SmfIndex, INDEXSUFFIX
+from adapya.base.smfrecordz import SmfReader, i2dt, keydt, dtkey, timekey
+from adapya.base.test.test_smfrecordz import smfrec, smfrecords, smfdump, tempdir
+
+
+def window():
+    return i2dt(124045, 360000+400*100), i2dt(124045, 360000+460*100)
+
+
+def scanned(path, recform='RDW+'):
+    """ records in window by full scan """
+    reader = SmfReader(path, recform=recform, window=window())
+    return [(r.recno, r.rty, r.dt) for r in reader]
+
+
+def test_index_window():
+    with tempdir() as tmpdir:
+        path = smfdump(tmpdir, smfrecords(1000, jitter=300))
+        ix = SmfIndex.forfile(path, every=50)
+        assert os.path.exists(path + INDEXSUFFIX)
+        assert len(ix.blocks) == 20 and ix.nrec == 1000
+
+        expected = scanned(path)
+        start, end = window()
+        assert len(expected) == 60
+        assert all(start <= dt < end for recno, rty, dt in expected)
+
+        reader = SmfReader(path, window=window(), index=1)
+        assert [(r.recno, r.rty, r.dt) for r in reader] == expected
+        assert sum(reader.counter.values()) == 150  # 3 index blocks read
+
+        reader = SmfReader(path, rtys=(30,), window=window(), index=ix)
+        assert [r.recno for r in reader] == [e[0] for e in expected if e[1] == 30]
+
+
+def test_index_blocked():
+    with tempdir() as tmpdir:
+        path = smfdump(tmpdir, smfrecords(1000, jitter=300), blocked=7)
+        ix = SmfIndex.build(path, recform='BDW+', every=50)
+        assert [b[1] for b in ix.blocks[:3]] == [0, 56, 112]
+        reader = SmfReader(path, recform='BDW+', window=window(), index=ix)
+        assert [(r.recno, r.rty, r.dt) for r in reader] == scanned(path, 'BDW+')
+
+
+def test_index_sidecar():
+    with tempdir() as tmpdir:
+        path = smfdump(tmpdir, smfrecords(100, jitter=300))
+        ix = SmfIndex.forfile(path, every=10)
+        ix2 = SmfIndex.load(path + INDEXSUFFIX)
+        assert ix2.blocks == ix.blocks
+        assert (ix2.size, ix2.nrec, ix2.every) == (ix.size, ix.nrec, 10)
+
+        with open(path, 'ab') as f:       # appended records
+            f.write(b''.join(smfrecords(10, jitter=300)))
+        reader = SmfReader(path, index=ix2, window=(datetime(2024, 2, 14), None))
+        assert len(list(reader)) == 110     # appended records read as tail
+        assert SmfIndex.forfile(path, every=10).nrec == 110    # rebuilt
+
+
+def test_index_1999():
+    """ sidecar round trip of records with date 0cyyddd and c=0 """
+    key = timekey(b'\x00\x99\x04\x5f', 100)
+    assert keydt(key) == datetime(1999, 2, 14, 0, 0, 1)
+    assert dtkey(keydt(key)) == key
+    with tempdir() as tmpdir:
+        path = smfdump(tmpdir, [smfrec(70, dte=99045, tme=360000 + i*100)
+                                for i in range(100)])
+        ix = SmfIndex.forfile(path, every=10)
+        ix2 = SmfIndex.load(path + INDEXSUFFIX)
+        assert ix2.blocks == ix.blocks
+        assert keydt(ix2.blocks[0][3]) == datetime(1999, 2, 14, 1, 0)
+        start, end = datetime(1999, 2, 14, 1, 0, 30), datetime(1999, 2, 14, 1, 0, 50)
+        assert ix2.ranges(start, end) == ix.ranges(start, end) == [
+            (ix.blocks[3][0], 30, 20)]
+        reader = SmfReader(path, window=(start, end), index=ix2)
+        assert [r.recno for r in reader] == list(range(31, 51))
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -0,0 +1,336 @@
+"""Test the SMF record reader of the smfrecordz module
+with synthetic SMF records
+
+Run as script to benchmark the reader throughput
+"""
+from __future__ import print_function          # PY3
+
+import os
+import shutil
+import struct
+import tempfile
+from contextlib import contextmanager
+from io import BytesIO, StringIO
+
+from adapya.base.smfrecordz import SmfReader, SmfSink, PrintSink, \
+    AggregateSink, ExportSink, Smf30, Smf30pss, Smf30id, Smf30cas, Smf30ura, \
+    Smf30prf, i2dt, SmfRecord, Smf30Record, register, recordclass, \
+    smftypes, smfrtys, Triplets, SmfError, fieldselect, patternmatch, SmfFiles
+
+
+def smfhdr(rty, sty=0, rlen=0x18, tme=360000, dte=124045, sid='SYSA'):
+    """ return SMF record header with RDW and subtype """
+    return struct.pack('!HxxBBL4s4s4sH', rlen, 0xde, rty, tme,
+        bytes(bytearray.fromhex('%07dF' % dte)), sid.encode('cp037'),
+        b'\xd1\xc5\xe2\xf2', sty)
+
+
+def smfrec(rty, size=100, **kw):
+    """ return SMF record other than SMF30 """
+    return smfhdr(rty, rlen=size, **kw) + (size-0x18)*b'\x00'
+
+
+def smf30rec(sty=4, jbn='JOB1', pgm='PROG', cpt=100, toz=0, tep=0,
+             rud='USER1', grp='GROUP1', snf=256, **kw):
+    """ return SMF30 record with subsystem, id, I/O activity,
+        CPU accounting and performance section
+    """
+    sections = [(Smf30pss, 0x00), (Smf30id, 0x08), (Smf30ura, 0x10),
+                (Smf30cas, 0x20), (Smf30prf, 0x38)]
+    rlen = 0xbc + sum(s().dmlen for s, toff in sections)
+    buf = bytearray(rlen)
+    buf[0:0x18] = smfhdr(30, sty=sty, rlen=rlen, **kw)
+    rec30 = Smf30(buffer=buf)
+    sof = 0xbc
+    for sclass, toff in sections:
+        section = sclass(buffer=buf, offset=sof)
+        rec30.offset = toff
+        rec30.sof, rec30.sln, rec30.son = sof, section.dmlen, 1
+        sof += section.dmlen
+        if sclass is Smf30pss:
+            section.typ = sty
+            section.syn = kw.get('sid', 'SYSA')
+        elif sclass is Smf30id:
+            section.jbn, section.pgm = jbn, pgm
+            section.rud, section.grp = rud, grp
+        elif sclass is Smf30ura:
+            section.tep = tep
+        elif sclass is Smf30cas:
+            section.cpt, section.toz = cpt, toz
+        elif sclass is Smf30prf:
+            section.snf = snf
+    return bytes(buf)
+
+
+def smfrecords(n, start=0, step=100, jitter=0, tme=360000, **kw):
+    """ return list of records start to start+n-1 step 1/100 seconds
+        apart with a disorder of up to jitter 1/100 seconds:
+        every third record is SMF30
+    """
+    recs = []
+    for i in range(start, start+n):
+        t = tme + i*step + (i*7 % 5 - 2) * jitter // 2
+        if i % 3 == 0:
+            recs.append(smf30rec(jbn='JOB%d' % (i%7), cpt=i, tme=t, **kw))
+        else:
+            recs.append(smfrec(70+i%3, tme=t, **kw))
+    return recs
+
+
+@contextmanager
+def tempdir():
+    """ temporary directory that is removed after the with block """
+    path = tempfile.mkdtemp()
+    try:
+        yield path
+    finally:
+        shutil.rmtree(path)
+
+
+def smfdump(tmpdir, recs, name='test.smf', blocked=0):
+    """ write records to file name in tmpdir with BDW blocks of blocked
+        records if blocked > 0
+        :returns: file name
+    """
+    path = os.path.join(tmpdir, name)
+    with open(path, 'wb') as f:
+        if blocked:
+            for i in range(0, len(recs), blocked):
+                block = b''.join(recs[i:i+blocked])
+                f.write(struct.pack('!HH', len(block)+4, 0) + block)
+        else:
+            f.write(b''.join(recs))
+    return path
+
+
+def smffile(n=100):
+    """ return file with n records: every third record is SMF30 """
+    f = BytesIO()
+    for i in range(n):
+        if i % 3 == 0:
+            f.write(smf30rec(sty=4+i%2, jbn='JOB%d' % (i%7), cpt=i, tme=360000+i))
+        else:
+            f.write(smfrec(70+i%3, tme=360000+i))
+    f.seek(0)
+    return f
+
+
+def test_reader_counts():
+    reader = SmfReader(smffile(), rtys=(30,))
+    recs = [(r.recno, r.rty, r.sty) for r in reader]
+    assert recs[:2] == [(1, 30, 4), (4, 30, 5)]
+    assert len(recs) == reader.selected == 34
+    assert reader.recno == 100
+    assert reader.counter == {30: 34, 71: 33, 72: 33}
+    assert i2dt(*reader.latest) == i2dt(124045, 360099)
+
+
+def test_reader_subtypes_where_sections():
+    reader = SmfReader(smffile(), subtypes=(5,),
+                       where=lambda r: r.section(Smf30id).jbn == 'JOB3')
+    recs = [(r.recno, r.section(Smf30cas).cpt, r.sid,
+             [s.dmname for s in r.sections()]) for r in reader]
+    assert recs[0] == (4, 3, 'SYSA', ['Product or Subsystem Section',
+        'Job/Session Id Section', 'I/O activity section',
+        'CPU accounting section', 'Performance section'])
+    assert [r[0] for r in recs] == [4, 46, 88]
+
+
+def test_reader_header_only():
+    """ records without sections are returned with header fields """
+    reader = SmfReader(smffile(10), rtys=(72,), numrec=6)
+    recs = [(r.recno, r.rty, str(r.dt)) for r in reader]
+    assert recs == [(3, 72, '2024-02-14 01:00:00.020000'),
+                    (6, 72, '2024-02-14 01:00:00.050000')]
+    assert reader.recno == 6
+
+
+def test_reader_1999():
+    """ dates of century 0 are 19yy for the window and the record time """
+    f = BytesIO(smf30rec(dte=99045, tme=100) + smfrec(70, dte=124045))
+    window = (i2dt(99045, 0), i2dt(99046, 0))
+    recs = [r.dt for r in SmfReader(f, window=window)]
+    assert recs == [i2dt(99045, 100)] and recs[0].year == 1999
+
+
+def test_sinks():
+    agg = AggregateSink(key=lambda r: r.section(Smf30id).jbn,
+                        value=lambda r: r.section(Smf30cas).cpt)
+    out = StringIO()
+    SmfReader(smffile(), rtys=(30,), sinks=[agg, ExportSink(out)]).run()
+    assert agg.count['JOB0'] == 5
+    assert agg.total['JOB0'] == 0 + 21 + 42 + 63 + 84
+    lines = out.getvalue().splitlines()
+    assert lines[0] == 'recno,rty,sty,sid,ssi,dt'
+    assert lines[1] == '1,30,4,SYSA,JES2,2024-02-14 01:00:00'
+    assert len(lines) == 35
+
+
+def test_registry():
+    class Smf72Record(SmfRecord):
+        pass
+    register(Smf72Record, 72, subtypes=(0,))
+    try:
+        assert recordclass(72, 0) is Smf72Record
+        assert recordclass(72, 1) is None
+        assert recordclass(30, 99) is Smf30Record
+        reader = SmfReader(smffile(9), registered=1)
+        recs = [(r.recno, type(r).__name__) for r in reader]
+        assert recs == [(1, 'Smf30Record'), (3, 'Smf72Record'),
+            (4, 'Smf30Record'), (6, 'Smf72Record'), (7, 'Smf30Record'),
+            (9, 'Smf72Record')]
+        assert reader.counter == {30: 3, 71: 3, 72: 3}
+    finally:
+        del smftypes[(72, 0)]
+        smfrtys.discard(72)
+
+
+def test_values_getter():
+    for rec in SmfReader(smffile(), rtys=(30,), numrec=20):
+        s30id = rec.section(Smf30id)
+        cas = rec.section(Smf30cas)
+        assert rec.values(Smf30id, 'jbn', 'pgm', 'std') == (
+            s30id.jbn, s30id.pgm, s30id.std)
+        assert rec.values(Smf30cas, 'cpt', 'toz', 'tfl1') == (
+            cas.cpt, cas.toz, cas.tfl1)
+    assert rec.values(Smf30pss, 'typ', 'syn') == (4, 'SYSA')
+
+
+def shortsection(rec, toff, sln=16):
+    """ return record with the length in the triplet at toff set to sln """
+    buf = bytearray(rec)
+    struct.pack_into('!H', buf, Smf30Record.tripstart + toff + 4, sln)
+    return bytes(buf)
+
+
+def test_values_short_section():
+    rec = shortsection(smf30rec(cpt=7), 0x20)   # Smf30cas
+    reader = SmfReader(BytesIO(rec), rtys=(30,))
+    for r in reader:
+        assert list(r.sections(select=(Smf30cas,))) == []
+        assert r.values(Smf30cas, 'cpt', 'cps') is None
+        assert r.values(Smf30id, 'jbn') == ('JOB1',)
+    assert reader.selected == 1
+
+
+def test_triplets():
+    rec = smf30rec(jbn='JOBX')
+    walk = list(Smf30Record.triplets().walk(rec))
+    assert [(ix, off, ln) for ix, buf, off, ln in walk] == [
+        (0, 0xbc, 38), (1, 0xbc+38, 250), (2, 0xbc+288, 16),
+        (3, 0xbc+304, 188), (4, 0xbc+492, 216)]
+    assert all(buf is rec for ix, buf, off, ln in walk)
+    assert Smf30Record.triplets().unpack(rec)[1] == (0xbc+38, 250, 1)
+
+    try:
+        list(Smf30Record.triplets().walk(rec[:-1]))
+    except SmfError as e:
+        assert 'Section 4 at offset 680 with 1 x 216 bytes' in str(e)
+    else:
+        assert 0, 'SmfError expected'
+
+
+def test_fieldselect():
+    where = fieldselect(Smf30id, {'jbn': ['JOB1', '*B3', 'J?B[5-6]*'],
+                                  'pgm': 'PR*'})
+    recs = [r.recno for r in SmfReader(smffile(), rtys=(30,), where=where)]
+    expected = [r.recno for r in SmfReader(smffile(), rtys=(30,))
+                if r.section(Smf30id).jbn in ('JOB1', 'JOB3', 'JOB5', 'JOB6')]
+    assert recs == expected and len(recs) == 20
+    nogroup = fieldselect(Smf30id, {'grp': '*OUP*', 'rud': ['*2', 'SYS*']})
+    assert list(SmfReader(smffile(), rtys=(30,), where=nogroup)) == []
+    assert [r.rty for r in SmfReader(smffile(6), rtys=(71,),
+        where=fieldselect(Smf30id, {'jbn': 'X'}))] == [71, 71]  # no section
+
+    match = patternmatch(['ABC', '*[!0-9]'], 8)
+    assert match('ABC     '.encode('cp037'))
+    assert match('XYZ     '.encode('cp037'))
+    assert not match('XY9     '.encode('cp037'))
+    assert not match('AB99    '.encode('cp037'))
+
+
+def smffiles(tmpdir, nfiles=4, n=100):
+    """ write nfiles SMF files with different sid and time to tmpdir
+        :returns: glob pattern of the files
+    """
+    for i in range(nfiles):
+        smfdump(tmpdir, smfrecords(n, step=1, tme=360000 + i*1000, sid='SYS%d' % i),
+                'sys%d.smf' % i)
+    return os.path.join(tmpdir, '*.smf')
+
+
+def test_smffiles():
+    results = []
+    with tempdir() as tmpdir:
+        pattern = smffiles(tmpdir)
+        for workers in (0, 2):
+            agg = AggregateSink(key=lambda r: (r.sid, r.section(Smf30id).jbn),
+                                value=lambda r: r.section(Smf30cas).cpt)
+            files = SmfFiles([pattern], workers=workers, rtys=(30,), sinks=[agg]).run()
+            results.append((files.recno, files.selected, files.counter,
+                            files.oldest, files.latest, agg.count, agg.total,
+                            [r[0] for r in files.results]))
+    assert results[0] == results[1]
+    recno, selected, counter, oldest, latest, count, total, fnames = results[0]
+    assert (recno, selected) == (400, 136)
+    assert counter == {30: 136, 71: 132, 72: 132}
+    assert i2dt(*oldest) == i2dt(124045, 360000)
+    assert i2dt(*latest) == i2dt(124045, 363099)
+    assert count[('SYS3', 'JOB0')] == 5 and total[('SYS3', 'JOB0')] == 210
+    assert [os.path.basename(f) for f in fnames] == [
+        'sys0.smf', 'sys1.smf', 'sys2.smf', 'sys3.smf']
+
+
+def bench(n=100000):
+    """ SmfReader throughput on a synthetic SMF file with one SMF30
+        per three records
+    """
+    import time
+    with tempdir() as tmpdir:
+        path = os.path.join(tmpdir, 'bench.smf')
+        with open(path, 'wb') as f:
+            f.write(smffile(n).getvalue())
+        mb = os.path.getsize(path) / 2.**20
+
+        def run(name, reader, fun=None):
+            t = time.time()
+            k = 0
+            for rec in reader:
+                if fun:
+                    fun(rec)
+                k += 1
+            t = time.time() - t
+            print('%-36s %8d records %8.2f s %8.1f MB/s %10.0f rec/s' % (
+                name, k, t, mb/t, n/t))
+
+        run('all records, header only', SmfReader(path))
+        run('SMF30 only, header only', SmfReader(path, rtys=(30,)))
+        run('SMF30 only, id section', SmfReader(path, rtys=(30,)),
+            lambda r: r.section(Smf30id).jbn)
+        run('SMF30 only, all sections', SmfReader(path, rtys=(30,)),
+            lambda r: [s for s in r.sections()])
+        run('SMF30 only, id values compiled', SmfReader(path, rtys=(30,)),
+            lambda r: r.values(Smf30id, 'jbn', 'pgm'))
+        run('SMF30 only, where jbn decoded', SmfReader(path, rtys=(30,),
+            where=lambda r: r.section(Smf30id).jbn.startswith('JOB1')))
+        run('SMF30 only, where jbn EBCDIC', SmfReader(path, rtys=(30,),
+            where=fieldselect(Smf30id, {'jbn': 'JOB1*'})))
+
+
+if __name__ == '__main__':
+    bench()
+
+
+#  Copyright 2004-2023 Software AG
+#
+#  Licensed under the Apache License, Version 2.0 (the "License");
+#  you may not use this file except in compliance with the License.
+#  You may obtain a copy of the License at
+#
+#      http://www.apache.org/licenses/LICENSE-2.0
+#
+#  Unless required by applicable law or agreed to in writing, software
+#  distributed under the License is distributed on an "AS IS" BASIS,
+#  WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+#  See the License for the specific language governing permissions and
+#  limitations under the License.
@@ -7,6 +7,9 @@ $Rev: 740 $
 """
 from __future__ import print_function          # PY3
 
+import os
+import random
+
 from adapya.base.stck import *
 
 print()
@@ -46,6 +49,62 @@ print( sstckd(stdk1999))
 print( sstckd(s1))
 print( sstckd(s2))
 
+
+def test_stck2iso_localtime():
+    """ local time with the offset per hour is the same as with sstckd()
+        also around the daylight saving time changes
+    """
+    if not hasattr(time, 'tzset'):
+        return
+    oldtz = os.environ.get('TZ')
+    os.environ['TZ'] = 'CET-1CEST,M3.5.0,M10.5.0/3'
+    time.tzset()
+    isosec.clear()
+    try:
+        rnd = random.Random(1)
+        hi = (datetime(2037, 1, 1) - datetime(1900, 1, 1)) // timedelta(microseconds=1)
+        stcks = [rnd.randrange(MICROS1970, hi) << 12 | rnd.randrange(4096)
+                 for i in range(20000)]
+        # hours around the change to and from summer time 2019
+        for dst in (datetime(2019, 3, 31, 1), datetime(2019, 10, 27, 1)):
+            m = (dst - datetime(1900, 1, 1)) // timedelta(microseconds=1)
+            stcks.extend((m + k * 10**6) << 12 for k in range(-3600, 7200, 599))
+        assert stck2iso(stcks) == [sstckd(v)[:26] for v in stcks]
+    finally:
+        if oldtz is None:
+            del os.environ['TZ']
+        else:
+            os.environ['TZ'] = oldtz
+        time.tzset()
+        isosec.clear()
+
+
+def test_stcke_buffer():
+    """ 16 byte STCKE values with epoch index and clock bits after
+        the STCK value
+    """
+    buf = b'\x00\xd6\x9b\x65\x30\x00\x00\xd0\x00' + 7*b'\xff' + \
+          b'\x01' + 15*b'\x00'
+    assert stck2micros(buf, gmt=1, stcke=1) == [
+        stck2micros([0xD69B65300000D000], gmt=1)[0],
+        2**52 - MICROS1970]
+    assert stck2iso(buf[:16], gmt=1, stcke=1) == ['2019-08-21 20:01:34.711821']
+    assert stck2datetimes(buf[16:], gmt=1, stcke=1) == [
+        datetime(2042, 9, 17, 23, 53, 47, 370496)]
+
+
+def test_leapseconds_roundtrip():
+    ctx = StckContext(gmt=1, leapsec=True)
+    for leapdate, leaps in leapseconds:
+        for secs in (-1, 0, 1):
+            dt = leapdate + timedelta(seconds=secs, microseconds=500)
+            m = (dt - datetime(1970, 1, 1)) // timedelta(microseconds=1)
+            assert ctx.micros(ctx.tostck(dt)) == m
+            assert stck2datetimes([ctx.tostck(dt)], context=ctx) == [dt]
+        # the leap second is inserted before leapdate
+        assert ctx.tostck(leapdate) - ctx.tostck(leapdate - timedelta(seconds=1)) == \
+            2 * 10**6 << 12
+
 #  Copyright 2004-2023 Software AG
 #
 #  Licensed under the Apache License, Version 2.0 (the "License");
@@ -77,6 +77,7 @@ setup(  name='adapya-base',
     scripts = ['adapya/base/scripts/ftpz.py',
         'adapya/base/scripts/getfilez.py',
         'adapya/base/scripts/jesjob.py',
+        'adapya/base/scripts/smfgenz.py',
         'adapya/base/scripts/smfreaderz.py'],
     packages=['adapya','adapya.base','adapya.base.scripts'],
     #package_dir={ '':'../..'